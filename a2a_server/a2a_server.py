@@ -1,5 +1,6 @@
 import asyncio
 import sys
+import threading
 import traceback
 
 from beeai_framework.adapters.a2a import A2AServer, A2AServerConfig
@@ -11,14 +12,32 @@ from beeai_framework.tools.search.duckduckgo import DuckDuckGoSearchTool
 from beeai_framework.tools.weather import OpenMeteoTool
 from beeai_framework.errors import FrameworkError
 
+from a2a_server.sessions import AdmissionController, session_executor_factory
 from agents.agent import getAgent
+from rag.model_registry import warmup
+from util import constants
 
 def main() -> None:
 
+    # Tools build their heavy parts on first use. "background" loads the embedding
+    # model while the server is already accepting traffic; "eager" waits for it.
+    if constants.WARMUP_MODE == "eager":
+        warmup()
+    elif constants.WARMUP_MODE == "background":
+        threading.Thread(target=warmup, name="embedding-warmup", daemon=True).start()
+    # agent1 is a prototype: each request runs on a clone that shares its tools
+    # (and their embedder, Chroma client and browser pool) but has the
+    # session's own memory.
     agent1 = getAgent()
+    A2AServer.register_factory(
+        RequirementAgent,
+        session_executor_factory(AdmissionController()),
+        override=True,
+    )
 
     A2AServer(
-        config=A2AServerConfig(port=9999, protocol="jsonrpc"), memory_manager=LRUMemoryManager(maxsize=100)
+        config=A2AServerConfig(port=9999, protocol="jsonrpc"),
+        memory_manager=LRUMemoryManager(maxsize=constants.A2A_MAX_SESSIONS),
     ).register(agent1, send_trajectory=True).serve()
 
 
@@ -0,0 +1,182 @@
+# sessions.py
+"""Per-session agent execution for the A2A server.
+
+Every request runs on its own clone of the registered agent, with the
+session's memory taken from the server's ``LRUMemoryManager``. Clones share
+the tool instances, and through them the process-wide embedder, Chroma
+client, HTTP fetcher and browser pool. An ``AdmissionController`` caps the
+number of concurrent runs; requests beyond that wait in a bounded queue and
+are turned away once the queue is full or they have waited too long.
+"""
+import asyncio
+import statistics
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import a2a.server.agent_execution as a2a_agent_execution
+import a2a.server.events as a2a_server_events
+import a2a.server.tasks as a2a_server_tasks
+import a2a.utils as a2a_utils
+
+from beeai_framework.adapters.a2a.serve.executors.base_a2a_agent_executor import _extract_request_messages
+from beeai_framework.adapters.a2a.serve.executors.tool_calling_agent_executor import ToolCallingAgentExecutor
+from beeai_framework.adapters.a2a.serve.server import A2AServerMetadata, _create_agent_card
+from beeai_framework.agents.requirement import RequirementAgent
+from beeai_framework.serve import MemoryManager, init_agent_memory
+from beeai_framework.utils.cancellation import AbortController
+from agents.memory import SummarizingWindowMemory
+from tools.browser_pool import lease_scope
+from util import constants
+from util.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ServerBusyError(RuntimeError):
+    pass
+
+
+class AdmissionController:
+    """Bounds concurrent agent runs, with a bounded wait queue in front."""
+
+    def __init__(
+        self,
+        max_concurrency: int = constants.A2A_MAX_CONCURRENCY,
+        max_queue: int = constants.A2A_MAX_QUEUE,
+        queue_timeout_s: float = constants.A2A_QUEUE_TIMEOUT_S,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._slots: asyncio.Semaphore | None = None
+        self._waits_ms: deque[float] = deque(maxlen=1000)
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        start = time.perf_counter()
+        if not self._slots.locked():
+            await self._slots.acquire()
+        elif self.queued >= self.max_queue:
+            self.rejected += 1
+            raise ServerBusyError(f"Server busy: {self.active} running, {self.queued} queued. Retry shortly.")
+        else:
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout_s)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise ServerBusyError(f"Server busy: no slot within {self.queue_timeout_s:.0f}s. Retry shortly.")
+            finally:
+                self.queued -= 1
+        self._waits_ms.append((time.perf_counter() - start) * 1000)
+        self.active += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    def stats(self) -> dict[str, float]:
+        waits = sorted(self._waits_ms)
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_p50_ms": statistics.median(waits) if waits else 0.0,
+            "wait_p99_ms": waits[int(0.99 * (len(waits) - 1))] if waits else 0.0,
+        }
+
+
+class SessionAgentExecutor(ToolCallingAgentExecutor):
+    """Runs each request on a fresh agent clone bound to its session's memory.
+
+    Unlike the stock executor, every task gets its own abort controller, so
+    cancelling one task does not abort the others, and any browser session
+    the run leased is returned to the pool as soon as the run ends.
+    """
+
+    def __init__(self, *args, admission: AdmissionController | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.admission = admission or AdmissionController()
+        self._aborts: dict[str, AbortController] = {}
+        self._session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    async def execute(
+        self,
+        context: a2a_agent_execution.RequestContext,
+        event_queue: a2a_server_events.EventQueue,
+    ) -> None:
+        updater = a2a_server_tasks.TaskUpdater(event_queue, context.task_id, context.context_id)
+        if not context.current_task:
+            if not context.message:
+                raise ValueError("No message found in the request context.")
+            context.current_task = a2a_utils.new_task(context.message)
+            await updater.submit()
+
+        # Requests of one session share its memory, so they run one at a time. The session lock
+        # is taken before admission: a request queued behind its own session holds no run slot.
+        session_lock = self._session_locks.setdefault(context.context_id or context.task_id, asyncio.Lock())
+        try:
+            async with session_lock, self.admission.admit():
+                await self._run(context, updater)
+        except ServerBusyError as e:
+            logger.warning(str(e))
+            await updater.failed(message=a2a_utils.new_agent_text_message(str(e)))
+
+    async def _run(self, context: a2a_agent_execution.RequestContext, updater: a2a_server_tasks.TaskUpdater) -> None:
+        agent = await self._runnable.clone()
+        abort = self._aborts[context.task_id] = AbortController()
+        try:
+            async with lease_scope(context.task_id):
+                await init_agent_memory(agent, self._memory_manager, context.context_id)
+                await updater.start_work()
+                response = await agent.run(_extract_request_messages(context), signal=abort.signal).observe(
+                    lambda emitter: self._process_events(emitter, context, updater) if self._send_trajectory else ...
+                )
+            await updater.complete(
+                a2a_utils.new_agent_text_message(response.last_message.text, context.context_id, context.task_id)
+            )
+            if isinstance(agent.memory, SummarizingWindowMemory):
+                logger.info(f"Session {context.context_id} memory: {agent.memory.stats()}")
+        except Exception as e:
+            logger.error(f"Task {context.task_id} failed: {e}")
+            await updater.failed(message=a2a_utils.new_agent_text_message(str(e)))
+        finally:
+            self._aborts.pop(context.task_id, None)
+
+    async def cancel(
+        self,
+        context: a2a_agent_execution.RequestContext,
+        event_queue: a2a_server_events.EventQueue,
+    ) -> None:
+        abort = self._aborts.get(context.task_id)
+        if abort is not None:
+            abort.abort()
+
+
+def session_executor_factory(admission: AdmissionController):
+    """A2AServer factory for ``RequirementAgent`` that builds a ``SessionAgentExecutor``."""
+
+    def factory(
+        agent: RequirementAgent, *, metadata: A2AServerMetadata | None = None, memory_manager: MemoryManager
+    ) -> SessionAgentExecutor:
+        return SessionAgentExecutor(
+            agent=agent,
+            agent_card=_create_agent_card(metadata or {}, agent),
+            memory_manager=memory_manager,
+            send_trajectory=metadata.get("send_trajectory", None) if metadata is not None else None,
+            admission=admission,
+        )
+
+    return factory
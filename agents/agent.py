@@ -2,11 +2,8 @@ import asyncio
 import sys
 import traceback
 
-from beeai_framework.adapters.a2a.serve.server import _react_agent_factory
-
 from beeai_framework.agents.requirement import RequirementAgent
 from beeai_framework.backend import ChatModel
-from beeai_framework.memory import UnconstrainedMemory
 from beeai_framework.tools.search.duckduckgo import DuckDuckGoSearchTool
 from beeai_framework.tools.weather import OpenMeteoTool
 from beeai_framework.errors import FrameworkError
@@ -22,7 +19,15 @@ from tools.web_crawler import (
     AnalyzeWebpagAndDetermineAction,ClickAtCoordinates,ClickElementWithText,EnterTextIntoElement,
     FindElementWithText,GetPageSource,GoToURLTool,ScrollDownScreen
     )
+from tools.batch_crawler import BatchCrawlTool
+from tools.browser_pool import release_on_finish
 from rag.chroma_tool import ChromaRetrieverTool
+from screener.screener_tool import ScreenerTool, TechnicalIndicatorTool
+from agents.memory import SummarizingWindowMemory
+from agents.tool_cache import cache_tool
+from agents.llm_cache import cache_llm
+from rag.store import collection_version
+from util import constants
 
 logger = get_logger(__name__)
 load_dotenv(dotenv_path=".secret")
@@ -39,15 +44,24 @@ def getAgent() -> RequirementAgent:
         provide the stock details as per the US market
         """
     
+    # Responses are recorded to / replayed from disk when LLM_CACHE_MODE is set.
+    llm = cache_llm(ChatModel.from_name("gemini:gemini-2.5-flash"))
     agent = RequirementAgent(
-        llm=ChatModel.from_name("gemini:gemini-2.5-flash"),
+        llm=llm,
         tools=[
             ThinkTool(),  # to reason
-            DuckDuckGoSearchTool(),  # search web
-            ChromaRetrieverTool() # Retrieve the internal stock research 
+            ScreenerTool(),  # filter and rank the local market snapshot
+            TechnicalIndicatorTool(),  # momentum and volatility from the stored price history
+            cache_tool(DuckDuckGoSearchTool()),  # search web
+            # Retrieve the internal stock research; results are dropped when the collection changes
+            cache_tool(ChromaRetrieverTool(), version_fn=lambda: collection_version(constants.CHROMA_COLLECTION)),
+            cache_tool(BatchCrawlTool()),  # fetch several finance pages concurrently
         ],
-        memory=UnconstrainedMemory(),
+        # Recent turns verbatim, older ones folded into a summary written by the same model.
+        memory=SummarizingWindowMemory(llm),
         instructions=system_prompt,
+        # Hand the run's browser back to the pool as soon as the run ends.
+        middlewares=[release_on_finish],
         requirements=[
             # Search only after getting weather and at least once
             ConditionalRequirement(DuckDuckGoSearchTool, force_at_step=1,max_invocations=5),
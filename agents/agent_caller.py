@@ -7,13 +7,12 @@ from beeai_framework.adapters.a2a.agents import A2AAgent, A2AAgentUpdateEvent
 
 from beeai_framework.agents.requirement import RequirementAgent
 
-from beeai_framework.memory import UnconstrainedMemory
-
 from beeai_framework.errors import FrameworkError
 
 from examples.helpers.io import ConsoleReader
 from util.logger import get_logger
 from dotenv import load_dotenv
+from agents.memory import SummarizingWindowMemory
 
 from beeai_framework.emitter import EventMeta
 
@@ -25,7 +24,7 @@ async def main() -> RequirementAgent:
 
 async def getAgent() -> RequirementAgent:
     
-    agent = A2AAgent(url="http://127.0.0.1:9999", memory=UnconstrainedMemory())
+    agent = A2AAgent(url="http://127.0.0.1:9999", memory=SummarizingWindowMemory())
     agent.allow_parallel_tool_calls = True
     reader = ConsoleReader()
     for prompt in reader:
@@ -38,6 +37,7 @@ async def getAgent() -> RequirementAgent:
         response = await agent.run(prompt).on("update", print_update)
 
         reader.write("Agent 🤖 : ", response.last_message.text)
+        logger.debug(f"Session memory: {agent.memory.stats()}")
 
 if __name__ == "__main__":
     try:
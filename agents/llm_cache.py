@@ -0,0 +1,194 @@
+# llm_cache.py
+"""Records and replays chat model responses.
+
+``cache_llm`` wraps a ``ChatModel`` so that each completion is keyed on the
+model id, the conversation (roles and contents, without message ids or
+timestamps), the tool schemas and the sampling parameters. ``LLM_CACHE_MODE``
+picks the behaviour:
+
+- ``off``: the model is left untouched.
+- ``record``: exact repeats recorded in the last ``LLM_CACHE_TTL_S`` seconds
+  are answered from ``LLM_CACHE_PATH``, so live sessions don't serve stale
+  market answers; every other call goes to the model and its response is
+  written there, replacing any older one.
+- ``replay``: every call must be answered from the file, however old the
+  recording. A miss raises
+  ``LLMReplayMissError`` instead of reaching the network, so benchmarks and
+  regression runs of the rest of the pipeline stay offline and deterministic.
+
+A replayed run only follows the recorded one as long as the tools return the
+same results, so record with the tool cache enabled and keep its file.
+"""
+import asyncio
+import hashlib
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncGenerator
+
+from pydantic import BaseModel
+
+from beeai_framework.backend import ChatModel, ChatModelOutput
+from beeai_framework.backend.types import ChatModelInput, ChatModelParameters
+from beeai_framework.errors import FrameworkError
+from beeai_framework.tools import Tool
+from util import constants
+from util.logger import get_logger
+
+logger = get_logger(__name__)
+
+MODES = ("off", "record", "replay")
+
+
+class LLMReplayMissError(FrameworkError):
+    def __init__(self, model_id: str, key: str) -> None:
+        super().__init__(
+            f"No recorded response of {model_id} for this request (key {key[:12]}). "
+            "Record it first with LLM_CACHE_MODE=record.",
+            is_fatal=True,
+            is_retryable=False,
+        )
+
+
+def _schema(value: Any) -> Any:
+    if isinstance(value, type) and issubclass(value, BaseModel):
+        return value.model_json_schema()
+    return value
+
+
+def request_key(model_id: str, input: ChatModelInput) -> str:
+    """Model id, conversation, tool schemas and sampling parameters of one request."""
+    tools = [
+        {"name": tool.name, "description": tool.description, "schema": tool.input_schema.model_json_schema()}
+        for tool in input.tools or []
+    ]
+    tool_choice = input.tool_choice.name if isinstance(input.tool_choice, Tool) else input.tool_choice
+    parameters = {name: getattr(input, name) for name in ChatModelParameters.model_fields if name != "stream"}
+    payload = {
+        "model": model_id,
+        "messages": [
+            [message.role, [content.model_dump(mode="json") for content in message.content]]
+            for message in input.messages
+        ],
+        "tools": tools,
+        "tool_choice": tool_choice,
+        "response_format": _schema(input.response_format),
+        "parallel_tool_calls": input.parallel_tool_calls,
+        "parameters": parameters,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LLMResponseStore:
+    def __init__(self, path: str = constants.LLM_CACHE_PATH) -> None:
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, model TEXT NOT NULL, "
+            "value BLOB NOT NULL, recorded REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, max_age_s: float | None = None) -> ChatModelOutput | None:
+        """The response recorded for ``key``, unless it is older than ``max_age_s``."""
+        with self._lock:
+            row = self._conn.execute("SELECT value, recorded FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or (max_age_s is not None and time.time() - row[1] > max_age_s):
+            return None
+        return pickle.loads(row[0])
+
+    def put(self, key: str, model_id: str, output: ChatModelOutput) -> None:
+        blob = pickle.dumps(output)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, value, recorded) VALUES (?, ?, ?, ?)",
+                (key, model_id, blob, time.time()),
+            )
+            self._conn.commit()
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+        }
+
+
+_store: LLMResponseStore | None = None
+
+
+def get_llm_store() -> LLMResponseStore:
+    global _store
+    if _store is None:
+        _store = LLMResponseStore()
+    return _store
+
+
+def cache_llm(
+    llm: ChatModel,
+    mode: str = constants.LLM_CACHE_MODE,
+    *,
+    store: LLMResponseStore | None = None,
+    ttl_s: float = constants.LLM_CACHE_TTL_S,
+) -> ChatModel:
+    """Wraps ``llm`` in place for ``mode`` and returns it; clones keep the wrapping.
+
+    ``ttl_s`` bounds how old a response record mode may serve; replay serves any.
+    """
+    if mode not in MODES:
+        raise ValueError(f"LLM_CACHE_MODE must be one of {', '.join(MODES)}, got {mode!r}")
+    if mode == "off":
+        return llm
+    store = store or get_llm_store()
+    max_age_s = None if mode == "replay" else ttl_s
+    create, create_stream, clone = llm._create, llm._create_stream, llm.clone
+
+    async def lookup(input: ChatModelInput) -> tuple[str, ChatModelOutput | None]:
+        key = request_key(llm.model_id, input)
+        output = await asyncio.to_thread(store.get, key, max_age_s)
+        if output is not None:
+            store.hits += 1
+            return key, output.model_copy(deep=True)
+        store.misses += 1
+        if mode == "replay":
+            raise LLMReplayMissError(llm.model_id, key)
+        return key, None
+
+    async def cached_create(input: ChatModelInput, run: Any) -> ChatModelOutput:
+        key, output = await lookup(input)
+        if output is None:
+            output = await create(input, run)
+            await asyncio.to_thread(store.put, key, llm.model_id, output)
+        return output
+
+    async def cached_create_stream(input: ChatModelInput, run: Any) -> AsyncGenerator[ChatModelOutput, None]:
+        key, output = await lookup(input)
+        if output is not None:
+            yield output
+            return
+        chunks = []
+        async for chunk in create_stream(input, run):
+            chunks.append(chunk)
+            yield chunk
+        if chunks:
+            await asyncio.to_thread(store.put, key, llm.model_id, ChatModelOutput.from_chunks(chunks))
+
+    async def cached_clone() -> ChatModel:
+        return cache_llm(await clone(), mode, store=store, ttl_s=ttl_s)
+
+    llm._create = cached_create
+    llm._create_stream = cached_create_stream
+    llm.clone = cached_clone
+    logger.debug(f"LLM cache in {mode} mode for {llm.model_id} ({store.path})")
+    return llm
@@ -0,0 +1,207 @@
+# memory.py
+"""Bounded conversation memory: a sliding window plus a running summary.
+
+Every turn the agent resends its whole memory, so an unbounded history makes
+latency and token cost grow with the length of the session.
+``SummarizingWindowMemory`` keeps the recent messages verbatim and folds
+older ones into a single summary message once the window exceeds its token
+budget. Large tool outputs (page content, retrieved passages) are replaced
+on arrival with a short reference that keeps the tool name, the size and the
+first lines. Tokens are estimated at four characters each.
+"""
+import json
+from math import ceil
+
+from beeai_framework.backend import ChatModel
+from beeai_framework.backend.message import (
+    AnyMessage,
+    MessageToolCallContent,
+    MessageToolResultContent,
+    SystemMessage,
+    ToolMessage,
+    UserMessage,
+)
+from beeai_framework.memory import BaseMemory
+from util import constants
+from util.logger import get_logger
+
+logger = get_logger(__name__)
+
+SUMMARY_META = "memory_summary"
+SEEN_META = "memory_seen"
+
+_SUMMARY_PROMPT = """Update the running summary of a conversation between a user and a financial research assistant.
+Keep every ticker, figure, date, source and open question; drop pleasantries and tool mechanics.
+Answer with the updated summary only, at most {max_words} words.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}"""
+
+
+def render(message: AnyMessage) -> str:
+    """Plain-text form of a message, including tool calls and results."""
+    parts = []
+    for content in message.content:
+        if isinstance(content, MessageToolCallContent):
+            parts.append(f"called {content.tool_name}({content.args})")
+        elif isinstance(content, MessageToolResultContent):
+            parts.append(f"{content.tool_name} returned: {content.result}")
+        else:
+            parts.append(getattr(content, "text", ""))
+    return f"{message.role}: {' '.join(parts)}"
+
+
+def estimate_tokens(message: AnyMessage) -> int:
+    return ceil(len(render(message)) / 4)
+
+
+class SummarizingWindowMemory(BaseMemory):
+    def __init__(
+        self,
+        llm: ChatModel | None = None,
+        *,
+        max_tokens: int = constants.MEMORY_MAX_TOKENS,
+        summary_tokens: int = constants.MEMORY_SUMMARY_TOKENS,
+        tool_output_chars: int = constants.MEMORY_TOOL_OUTPUT_CHARS,
+    ) -> None:
+        """
+        Args:
+            llm: Model that writes the running summary. Without one, evicted
+                messages are summarized by keeping the first line of each.
+            max_tokens: Budget for the window (summary included). Once it is
+                exceeded, the oldest messages are summarized until the window
+                is back to three quarters of the budget.
+            summary_tokens: Target length of the running summary.
+            tool_output_chars: Tool results longer than this are replaced
+                with a short reference.
+        """
+        self.llm = llm
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.tool_output_chars = tool_output_chars
+        self.summary = ""
+        self._messages: list[AnyMessage] = []
+        # Counters survive reset(): the agent resets and re-adds its memory at the end of every run.
+        self.tokens_added = 0
+        self.tokens_compacted = 0
+        self.tokens_summarized = 0
+        self.summaries = 0
+
+    @property
+    def messages(self) -> list[AnyMessage]:
+        if not self.summary:
+            return self._messages
+        return [SystemMessage(f"Summary of the earlier conversation:\n{self.summary}", {SUMMARY_META: True}), *self._messages]
+
+    async def add(self, message: AnyMessage, index: int | None = None) -> None:
+        if message.meta.get(SUMMARY_META):
+            # Our own summary coming back after reset(): restore it instead of storing a copy.
+            self.summary = message.text.split("\n", 1)[-1]
+            return
+        if not message.meta.get(SEEN_META):
+            # Messages come back after every reset(); count and compact them only the first time.
+            self.tokens_added += estimate_tokens(message)
+            message = self._compact(message)
+            message.meta[SEEN_META] = True
+        index = len(self._messages) if index is None else max(0, min(index, len(self._messages)))
+        self._messages.insert(index, message)
+        if self._window_tokens() > self.max_tokens:
+            await self._summarize_oldest()
+
+    async def delete(self, message: AnyMessage) -> bool:
+        try:
+            self._messages.remove(message)
+            return True
+        except ValueError:
+            return False
+
+    def reset(self) -> None:
+        self._messages.clear()
+        self.summary = ""
+
+    async def clone(self) -> "SummarizingWindowMemory":
+        cloned = type(self)(
+            self.llm,
+            max_tokens=self.max_tokens,
+            summary_tokens=self.summary_tokens,
+            tool_output_chars=self.tool_output_chars,
+        )
+        cloned._messages = self._messages.copy()
+        cloned.summary = self.summary
+        return cloned
+
+    def stats(self) -> dict[str, int]:
+        window = self._window_tokens()
+        return {
+            "messages": len(self._messages),
+            "window_tokens": window,
+            "tokens_added": self.tokens_added,
+            "tokens_saved": max(0, self.tokens_added - window),
+            "tokens_compacted": self.tokens_compacted,
+            "tokens_summarized": self.tokens_summarized,
+            "summaries": self.summaries,
+        }
+
+    def _window_tokens(self) -> int:
+        return ceil(len(self.summary) / 4) + sum(estimate_tokens(message) for message in self._messages)
+
+    def _compact(self, message: AnyMessage) -> AnyMessage:
+        if not isinstance(message, ToolMessage):
+            return message
+        contents = []
+        changed = False
+        for content in message.get_tool_results():
+            result = content.result if isinstance(content.result, str) else json.dumps(content.result, default=str)
+            if len(result) > self.tool_output_chars:
+                head = result[: self.tool_output_chars // 4].rsplit(" ", 1)[0]
+                reference = f"[{content.tool_name} output of {len(result):,} chars elided; it began: {head} ...]"
+                contents.append(content.model_copy(update={"result": reference}))
+                changed = True
+            else:
+                contents.append(content)
+        if not changed:
+            return message
+        compacted = ToolMessage(contents, dict(message.meta), id=message.id)
+        self.tokens_compacted += estimate_tokens(message) - estimate_tokens(compacted)
+        return compacted
+
+    async def _summarize_oldest(self) -> None:
+        target = self.max_tokens * 3 // 4
+        evicted: list[AnyMessage] = []
+        # Always keep the newest message, and never leave a tool result without its call.
+        while len(self._messages) > 1 and (
+            self._window_tokens() > target or isinstance(self._messages[0], ToolMessage)
+        ):
+            evicted.append(self._messages.pop(0))
+        if not evicted:
+            return
+        evicted_tokens = sum(estimate_tokens(message) for message in evicted)
+        previous = self.summary
+        self.summary = await self._summarize(previous, evicted)
+        self.summaries += 1
+        self.tokens_summarized += evicted_tokens - (ceil(len(self.summary) / 4) - ceil(len(previous) / 4))
+        logger.debug(f"Summarized {len(evicted)} messages ({evicted_tokens} tokens) into the running summary")
+
+    async def _summarize(self, summary: str, messages: list[AnyMessage]) -> str:
+        max_chars = self.summary_tokens * 4
+        if self.llm is not None:
+            prompt = _SUMMARY_PROMPT.format(
+                max_words=self.summary_tokens * 3 // 4,
+                summary=summary or "(none)",
+                messages="\n".join(render(message)[:2000] for message in messages),
+            )
+            try:
+                response = await self.llm.run([UserMessage(prompt)])
+                return response.get_text_content().strip()[:max_chars]
+            except Exception as e:
+                logger.warning(f"Summarizing memory failed, keeping an extractive summary: {e}")
+        lines = [summary] if summary else []
+        lines.extend(render(message).split("\n", 1)[0][:200] for message in messages)
+        text = "\n".join(lines)
+        if len(text) > max_chars:
+            # Keep the most recent lines when the extractive summary outgrows its budget.
+            text = text[-max_chars:].split("\n", 1)[-1]
+        return text
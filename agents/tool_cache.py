@@ -0,0 +1,208 @@
+# tool_cache.py
+"""Memoizes tool results across runs and sessions.
+
+``cache_tool`` wraps a tool's ``_run`` so that a call is answered from the
+cache when the same tool was called with the same (normalized) input within
+its TTL. Identical calls that are in flight at the same time share a single
+execution. Results live in an in-process LRU and, when ``TOOL_CACHE_PATH`` is
+set, in a SQLite file that every server process on the host shares.
+"""
+import asyncio
+import hashlib
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from pydantic import BaseModel
+
+from beeai_framework.tools import Tool
+from util import constants
+from util.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Free-text inputs whose whitespace and case don't change the answer; URLs, tickers and ids are kept verbatim.
+FREE_TEXT_FIELDS = frozenset({"query"})
+
+
+def _drop_unset(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _drop_unset(item) for key, item in value.items() if item is not None}
+    if isinstance(value, list):
+        return [_drop_unset(item) for item in value]
+    return value
+
+
+def _normalize(data: dict) -> dict:
+    data = _drop_unset(data)
+    for field in FREE_TEXT_FIELDS.intersection(data):
+        if isinstance(data[field], str):
+            data[field] = " ".join(data[field].split()).casefold()
+    return data
+
+
+def cache_key(tool_name: str, input: BaseModel | dict, version: Any = None) -> str:
+    """Tool name plus input with unset fields, and whitespace and case of free-text fields, normalized away."""
+    data = input.model_dump(mode="json") if isinstance(input, BaseModel) else input
+    payload = json.dumps([tool_name, _normalize(data), version], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _DiskStore:
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tool_results (key TEXT PRIMARY KEY, tool TEXT NOT NULL, "
+            "value BLOB NOT NULL, expires REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> tuple[float, Any] | None:
+        with self._lock:
+            row = self._conn.execute("SELECT expires, value FROM tool_results WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] <= time.time():
+            return None
+        return row[0], pickle.loads(row[1])
+
+    def put(self, key: str, tool: str, value: Any, expires: float) -> None:
+        try:
+            blob = pickle.dumps(value)
+        except Exception as e:
+            logger.debug(f"Result of {tool} is not picklable, keeping it in memory only: {e}")
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tool_results (key, tool, value, expires) VALUES (?, ?, ?, ?)",
+                (key, tool, blob, expires),
+            )
+            self._conn.execute("DELETE FROM tool_results WHERE expires <= ?", (time.time(),))
+            self._conn.commit()
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class ToolResultCache:
+    def __init__(self, disk_path: str | None = constants.TOOL_CACHE_PATH, max_entries: int = constants.TOOL_CACHE_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[str, _Flight] = {}
+        self._disk = _DiskStore(disk_path) if disk_path else None
+
+    async def get_or_run(self, tool_name: str, key: str, ttl_s: float, run: Callable[[], Awaitable[Any]]) -> Any:
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        flight = self._inflight.get(key)
+        if flight is None:
+            # Registered before the first await, so concurrent callers coalesce onto this one. The call
+            # runs in a task the cache owns: cancelling the caller that started it doesn't cancel it.
+            task = asyncio.get_running_loop().create_task(self._fill(tool_name, key, ttl_s, run))
+            flight = self._inflight[key] = _Flight(task)
+            task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.coalesced += 1
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            # Only the last waiter to leave gives up on the call.
+            if flight.waiters == 1 and not flight.task.done():
+                self._forget(key, flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        # A later call for the same key may already have started a new flight; leave that one alone.
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+    async def _fill(self, tool_name: str, key: str, ttl_s: float, run: Callable[[], Awaitable[Any]]) -> Any:
+        stored = await asyncio.to_thread(self._disk.get, key) if self._disk is not None else None
+        if stored is not None:
+            self.hits += 1
+            self._remember(key, *stored)
+            return stored[1]
+        self.misses += 1
+        # Failures are not cached; every waiter sees the same error.
+        result = await run()
+        expires = time.time() + ttl_s
+        self._remember(key, expires, result)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.put, key, tool_name, result, expires)
+        return result
+
+    def _remember(self, key: str, expires: float, value: Any) -> None:
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, float]:
+        total = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / total if total else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+_cache: ToolResultCache | None = None
+
+
+def get_tool_cache() -> ToolResultCache:
+    global _cache
+    if _cache is None:
+        _cache = ToolResultCache()
+    return _cache
+
+
+def cache_tool(
+    tool: Tool,
+    ttl_s: float | None = None,
+    *,
+    version_fn: Callable[[], Any] | None = None,
+    cache: ToolResultCache | None = None,
+) -> Tool:
+    """Memoizes ``tool`` in place and returns it.
+
+    ``ttl_s`` defaults to the tool's entry in ``TOOL_CACHE_TTLS`` (or
+    ``TOOL_CACHE_DEFAULT_TTL_S``); a TTL of 0 leaves the tool uncached.
+    ``version_fn`` is folded into the key, so results computed against an
+    older version of the underlying data (e.g. the Chroma collection) are
+    never served.
+    """
+    if ttl_s is None:
+        ttl_s = constants.TOOL_CACHE_TTLS.get(tool.name, constants.TOOL_CACHE_DEFAULT_TTL_S)
+    if ttl_s <= 0:
+        return tool
+    cache = cache or get_tool_cache()
+    run = tool._run
+
+    async def cached_run(input: Any, options: Any, context: Any) -> Any:
+        key = cache_key(tool.name, input, version_fn() if version_fn else None)
+        return await cache.get_or_run(tool.name, key, ttl_s, lambda: run(input, options, context))
+
+    tool._run = cached_run
+    return tool
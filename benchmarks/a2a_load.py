@@ -0,0 +1,85 @@
+# a2a_load.py
+"""Load test for the A2A server: throughput and latency vs. concurrent clients.
+
+Each client keeps its own session (A2A context id) and sends requests back to
+back over JSON-RPC ``message/send``. For every concurrency level the run
+reports completed requests per second, p50/p99 latency and how many requests
+the server turned away as busy. Start the server first
+(``python -m a2a_server.a2a_server``), then run
+``python -m benchmarks.a2a_load --clients 1 2 4 8 16``.
+
+To measure the server rather than the model, record one client's run
+(server started with ``LLM_CACHE_MODE=record``, ``--clients 1``) and load
+test a server started with ``LLM_CACHE_MODE=replay``. Every client asks the
+same questions in the same order, so each request replays from the file as
+long as ``--requests`` does not exceed the recorded run.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+QUESTIONS = [
+    "What is NVDA's P/E ratio?",
+    "Summarize Apple's latest quarterly revenue.",
+    "Which sector does JPM belong to?",
+    "How did MSFT's price change over the last year?",
+]
+
+
+async def _client(http: httpx.AsyncClient, url: str, requests: int, latencies: list[float], errors: list[str]) -> None:
+    context_id = str(uuid.uuid4())
+    for i in range(requests):
+        payload = {
+            "jsonrpc": "2.0",
+            "id": str(uuid.uuid4()),
+            "method": "message/send",
+            "params": {
+                "message": {
+                    "role": "user",
+                    "kind": "message",
+                    "messageId": str(uuid.uuid4()),
+                    "contextId": context_id,
+                    "parts": [{"kind": "text", "text": QUESTIONS[i % len(QUESTIONS)]}],
+                }
+            },
+        }
+        start = time.perf_counter()
+        try:
+            response = await http.post(url, json=payload)
+            body = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            errors.append(type(e).__name__)
+            continue
+        state = body.get("result", {}).get("status", {}).get("state")
+        if "error" in body or state == "failed":
+            errors.append(str(body.get("error") or state))
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run(url: str, clients: list[int], requests: int, timeout_s: float) -> None:
+    print(f"{'clients':>7} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'ok':>5} {'failed':>7}")
+    async with httpx.AsyncClient(timeout=timeout_s) as http:
+        for count in clients:
+            latencies: list[float] = []
+            errors: list[str] = []
+            start = time.perf_counter()
+            await asyncio.gather(*[_client(http, url, requests, latencies, errors) for _ in range(count)])
+            elapsed = time.perf_counter() - start
+            p50 = statistics.median(latencies) if latencies else 0.0
+            p99 = sorted(latencies)[int(0.99 * (len(latencies) - 1))] if latencies else 0.0
+            print(f"{count:>7} {len(latencies) / elapsed:>8.2f} {p50:>9.0f} {p99:>9.0f} {len(latencies):>5} {len(errors):>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://127.0.0.1:9999/")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=3, help="requests per client")
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.clients, args.requests, args.timeout))
@@ -0,0 +1,72 @@
+# embedding_backends.py
+"""Compares the torch, ONNX and int8 ONNX embedding backends on CPU.
+
+Reports batch throughput (docs/sec), single-query p50/p99 latency and the
+minimum cosine similarity of each backend's vectors against the fp32 torch
+output. Run with ``python -m benchmarks.embedding_backends``.
+"""
+import argparse
+import csv
+import statistics
+import time
+
+import numpy as np
+
+from rag.model_registry import BACKENDS, COSINE_TOLERANCE, get_model
+from util import constants
+
+
+def load_corpus(path: str = "export.csv") -> list[str]:
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    return [
+        f"{row['Name']} ({row['Ticker']}) is a {row['Sector']} company trading at ${row['Price ($)']} "
+        f"with a P/E of {row['P/E'] or 'n/a'} and a 1-year change of {row['Price 1-Year Change (%)']}%."
+        for row in rows
+    ]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(model_name: str, docs: int, queries: int, batch_size: int) -> None:
+    corpus = load_corpus()
+    texts = [corpus[i % len(corpus)] + f" #{i}" for i in range(docs)]
+    reference = None
+
+    print(f"{'backend':<10} {'docs/sec':>10} {'p50 ms':>8} {'p99 ms':>8} {'min cos':>8} {'tolerance':>10}")
+    for backend in BACKENDS:
+        model = get_model(model_name, backend)
+        model.encode(texts[:batch_size], normalize_embeddings=True)  # warm up kernels
+
+        start = time.perf_counter()
+        vectors = model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+        docs_per_sec = len(texts) / (time.perf_counter() - start)
+
+        latencies = []
+        for i in range(queries):
+            start = time.perf_counter()
+            model.encode([texts[i % len(texts)]], normalize_embeddings=True)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        if reference is None:
+            reference = vectors
+        min_cos = float(np.min(np.sum(reference * vectors, axis=1)))
+        tolerance = COSINE_TOLERANCE[backend]
+        status = "ok" if min_cos >= tolerance else "FAIL"
+        print(
+            f"{backend:<10} {docs_per_sec:>10.1f} {statistics.median(latencies):>8.2f} "
+            f"{percentile(latencies, 99):>8.2f} {min_cos:>8.5f} {tolerance:>7} {status}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default=constants.EMBEDDING_MODEL)
+    parser.add_argument("--docs", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+    run(args.model, args.docs, args.queries, args.batch_size)
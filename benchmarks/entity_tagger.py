@@ -0,0 +1,117 @@
+# entity_tagger.py
+"""Throughput benchmark for the ticker/company entity tagger.
+
+Builds the tagger from the screener snapshot and tags two synthetic corpora
+of ``--mb`` megabytes each: WhatsApp-style chat lines (short, cashtags and
+nicknames) and crawled-page-like prose (long paragraphs built from the
+export's company names). Real files can be added with ``--files``. The
+baseline runs one compiled regex per surface form over the text, which is
+what tagging without the combined trie pattern costs. Reports MB/s and how
+many tickers were found. Run with ``python -m benchmarks.entity_tagger``.
+"""
+import argparse
+import random
+import re
+import time
+
+from rag.entity_tagger import CASHTAG_ONLY, EntityTagger
+
+FILLER = (
+    "the market opened higher on strong earnings guidance while bond yields eased and analysts "
+    "raised their targets after the call management said margins should keep improving next quarter"
+).split()
+
+
+def chat_corpus(tagger: EntityTagger, names: list[str], size: int, rng: random.Random) -> str:
+    symbols = sorted(tagger.symbols)
+    lines, total = [], 0
+    while total < size:
+        words = rng.sample(FILLER, rng.randint(4, 12))
+        if rng.random() < 0.5:
+            words.insert(rng.randrange(len(words)), rng.choice((f"${rng.choice(symbols)}", rng.choice(names).split(",")[0])))
+        line = f"12/03/2025, {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d} - Member {rng.randint(1, 40)}: {' '.join(words)}\n"
+        lines.append(line)
+        total += len(line)
+    return "".join(lines)
+
+
+def page_corpus(tagger: EntityTagger, names: list[str], size: int, rng: random.Random) -> str:
+    symbols = sorted(tagger.symbols)
+    paragraphs, total = [], 0
+    while total < size:
+        words = rng.choices(FILLER, k=rng.randint(80, 200))
+        for _ in range(rng.randint(0, 4)):
+            words.insert(rng.randrange(len(words)), rng.choice((f"({rng.choice(symbols)})", rng.choice(names))))
+        paragraph = " ".join(words).capitalize() + ".\n\n"
+        paragraphs.append(paragraph)
+        total += len(paragraph)
+    return "".join(paragraphs)
+
+
+def naive_tag(patterns: list[tuple[re.Pattern, set[str]]], text: str) -> set[str]:
+    tickers: set[str] = set()
+    for pattern, found in patterns:
+        if pattern.search(text):
+            tickers |= found
+    return tickers
+
+
+def naive_patterns(tagger: EntityTagger) -> list[tuple[re.Pattern, set[str]]]:
+    """One pattern per symbol and per name, with the tagger's case rules."""
+    patterns = [
+        (re.compile(rf"(?<![\w$])\${'' if symbol in CASHTAG_ONLY else '?'}{re.escape(symbol)}(?!\w)"), {symbol})
+        for symbol in tagger.symbols
+    ]
+    for name in tagger.case_insensitive:
+        patterns.append((re.compile(rf"(?<![\w$]){re.escape(name)}(?!\w)", re.IGNORECASE), tagger._names[name]))
+    for name in tagger.case_sensitive:
+        patterns.append((re.compile(rf"(?<![\w$]){re.escape(name)}(?!\w)"), tagger._names[name.casefold()]))
+    return patterns
+
+
+def _throughput(fn, texts: list[str], repeat: int) -> tuple[float, int]:
+    size = sum(len(text.encode("utf-8")) for text in texts)
+    best, found = float("inf"), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        found = sum(len(fn(text)) for text in texts)
+        best = min(best, time.perf_counter() - start)
+    return size / 1e6 / best, found
+
+
+def run(mb: float, repeat: int, files: list[str]) -> None:
+    rng = random.Random(0)
+    start = time.perf_counter()
+    tagger = EntityTagger.from_snapshot()
+    print(f"tagger for {len(tagger.symbols)} symbols, {len(tagger._names)} names built in {(time.perf_counter() - start) * 1000:.0f} ms")
+    names = sorted(tagger._names)
+    start = time.perf_counter()
+    patterns = naive_patterns(tagger)
+    print(f"baseline: {len(patterns)} patterns compiled in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+    size = int(mb * 1e6)
+    chat = chat_corpus(tagger, names, size, rng)
+    corpora = {
+        # Messages are tagged one by one at ingest, pages one document at a time.
+        "chat export": chat.splitlines(),
+        "crawled pages": page_corpus(tagger, names, size, rng).split("\n\n"),
+    }
+    for file in files:
+        with open(file, encoding="utf-8", errors="replace") as f:
+            corpora[file] = [f.read()]
+
+    print(f"{'corpus':<20} {'MB':>6} {'tagger MB/s':>12} {'tickers':>9} {'baseline MB/s':>14} {'tickers':>9}")
+    for name, texts in corpora.items():
+        total = sum(len(text.encode("utf-8")) for text in texts) / 1e6
+        fast, fast_found = _throughput(tagger.tag, texts, repeat)
+        slow, slow_found = _throughput(lambda text: naive_tag(patterns, text), texts, 1)
+        print(f"{name:<20} {total:>6.1f} {fast:>12.1f} {fast_found:>9} {slow:>14.2f} {slow_found:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mb", type=float, default=5.0, help="size of each synthetic corpus")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--files", nargs="*", default=[], help="chat exports or saved pages to tag as well")
+    args = parser.parse_args()
+    run(args.mb, args.repeat, args.files)
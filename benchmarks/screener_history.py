@@ -0,0 +1,120 @@
+# screener_history.py
+"""Ingestion and query benchmark for the screener snapshot history.
+
+Appends synthetic daily snapshots (``--tickers`` symbols, 252 trading days a
+year for ``--years`` years) to a throwaway ``HistoryStore``, then times the
+reads the agent makes: one ticker's full price history, one field across
+all tickers for the last year, and a full cross-section on one day. The
+baseline for the ticker history scans the compressed per-day partitions,
+which is what a store without the memory-mapped matrices would have to do.
+Run with ``python -m benchmarks.screener_history``.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from screener.history import HistoryStore, load_partition
+from screener.snapshot import COLUMNS, NUMBER, Snapshot
+
+
+def synthetic_snapshot(tickers: np.ndarray, prices: np.ndarray, rng: np.random.Generator) -> Snapshot:
+    n = len(tickers)
+    columns = {field: rng.normal(50, 20, n) for field, (_, kind) in COLUMNS.items() if kind == NUMBER}
+    columns.update(
+        ticker=tickers,
+        name=np.char.add(tickers, " Corp"),
+        price=prices,
+        sector=rng.integers(0, 11, n).astype(np.int16),
+        country=rng.integers(0, 5, n).astype(np.int16),
+        sp500=rng.random(n) < 0.1,
+        nasdaq=rng.random(n) < 0.6,
+        next_report_date=np.full(n, np.datetime64("2025-11-01")),
+        next_dividend_date=np.full(n, np.datetime64("NaT"), dtype="datetime64[D]"),
+    )
+    categories = {"sector": [f"Sector {i}" for i in range(11)], "country": [f"Country {i}" for i in range(5)]}
+    return Snapshot(columns, categories)
+
+
+def _size_mb(path: str) -> float:
+    total = sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+    return total / 1e6
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    return sorted(samples)[int(pct / 100 * (len(samples) - 1))]
+
+
+def _time_ms(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def run(tickers: int, years: int, repeat: int, path: str) -> None:
+    rng = np.random.default_rng(0)
+    symbols = np.array([f"T{i:05d}" for i in range(tickers)])
+    prices = rng.uniform(10, 500, tickers)
+    days = [date(2020, 1, 1) + timedelta(days=i) for i in range(years * 252)]
+
+    store = HistoryStore(path)
+    appends = []
+    for day in days:
+        prices = prices * np.exp(rng.normal(0, 0.02, tickers))
+        snapshot = synthetic_snapshot(symbols, prices, rng)
+        start = time.perf_counter()
+        store.append(day, snapshot)
+        appends.append((time.perf_counter() - start) * 1000)
+    partitions = _size_mb(os.path.join(path, "partitions"))
+    print(f"ingested {len(days)} days x {tickers} tickers in {sum(appends) / 1000:.1f}s")
+    print(f"append p50 {statistics.median(appends):.1f} ms, p99 {percentile(appends, 99):.1f} ms")
+    print(f"disk: partitions {partitions:.0f} MB, matrices {_size_mb(path) - partitions:.0f} MB")
+
+    start = time.perf_counter()
+    store = HistoryStore(path)
+    print(f"reopen {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    picks = rng.choice(symbols, repeat)
+    queries = {
+        "ticker history (mean)": lambda: float(np.nanmean(store.history(str(picks[rng.integers(repeat)])))),
+        "field, last year": lambda: float(np.nanmean(store.column("pe")[-252:])),
+        "cross-section, one day": lambda: float(np.nanmax(store.column("price")[int(rng.integers(len(days)))])),
+    }
+    print(f"{'query':<26} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, query in queries.items():
+        samples = _time_ms(query, repeat)
+        print(f"{name:<26} {statistics.median(samples):>9.3f} {percentile(samples, 99):>9.3f}")
+
+    files = sorted(os.listdir(os.path.join(path, "partitions")))
+    target = str(picks[0])
+
+    def scan_partitions() -> None:
+        for file in files:
+            snapshot = load_partition(os.path.join(path, "partitions", file))
+            snapshot.columns["price"][np.flatnonzero(snapshot.columns["ticker"] == target)]
+
+    samples = _time_ms(scan_partitions, 1)
+    print(f"{'history from partitions':<26} {samples[0]:>9.1f} {'-':>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=5000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--path", help="store location; defaults to a temporary directory that is removed afterwards")
+    args = parser.parse_args()
+    path = args.path or tempfile.mkdtemp(prefix="screener_history_")
+    try:
+        run(args.tickers, args.years, args.repeat, path)
+    finally:
+        if not args.path:
+            shutil.rmtree(path, ignore_errors=True)
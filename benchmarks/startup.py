@@ -0,0 +1,123 @@
+# startup.py
+"""Measures cold-start cost per component of the agent stack.
+
+Each component is timed in a fresh interpreter: the import of its module and
+then its first request (model load, Chroma open, browser launch, ...). The
+framework itself is imported before the timer starts for every component
+except ``framework``, so the other rows show only what they add on top.
+Run with ``python -m benchmarks.startup``.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+async def _first_agent() -> None:
+    from agents.agent import getAgent
+
+    getAgent()
+
+
+async def _first_embedding() -> None:
+    from rag.embedding_service import get_embedding_service
+
+    await get_embedding_service().embed_many(["NVDA quarterly revenue growth"])
+
+
+async def _first_retrieval() -> None:
+    from rag.chroma_tool import ChromaRetrieverTool
+
+    await ChromaRetrieverTool().batcher.query("NVDA quarterly revenue growth")
+
+
+async def _first_http_fetch(url: str) -> None:
+    from tools.http_fetcher import get_http_fetcher
+
+    await get_http_fetcher().fetch(url)
+
+
+async def _first_browser_page(url: str) -> None:
+    from tools.browser_pool import get_browser_pool
+
+    pool = get_browser_pool()
+    async with pool.session("startup-benchmark", navigating=True) as session:
+        await asyncio.to_thread(session.driver.get, url)
+    await pool.close()
+
+
+async def _nothing(*_) -> None:
+    pass
+
+
+# name -> (module imported under the timer, first request)
+COMPONENTS = {
+    "framework": ("beeai_framework.backend", _nothing),
+    "agent": ("agents.agent", _first_agent),
+    "embedder": ("rag.embedding_service", _first_embedding),
+    "retriever": ("rag.chroma_tool", _first_retrieval),
+    "http_crawler": ("tools.http_fetcher", _first_http_fetch),
+    "browser": ("tools.web_crawler", _first_browser_page),
+}
+_NEEDS_URL = {_first_http_fetch, _first_browser_page}
+
+
+def _measure(name: str, url: str) -> dict:
+    module, first_request = COMPONENTS[name]
+    if name != "framework":
+        importlib.import_module("beeai_framework.backend")
+    result = {"component": name, "import_ms": None, "first_ms": None, "error": None}
+    try:
+        start = time.perf_counter()
+        importlib.import_module(module)
+        result["import_ms"] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        asyncio.run(first_request(url) if first_request in _NEEDS_URL else first_request())
+        result["first_ms"] = (time.perf_counter() - start) * 1000
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def run(components: list[str], repeat: int, url: str) -> None:
+    print(f"{'component':<14} {'import ms':>10} {'first req ms':>13} {'process ms':>11}")
+    for name in components:
+        imports, firsts, walls, error = [], [], [], None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            child = subprocess.run(
+                [sys.executable, "-m", "benchmarks.startup", "--child", name, "--url", url],
+                capture_output=True,
+                text=True,
+            )
+            walls.append((time.perf_counter() - start) * 1000)
+            lines = child.stdout.strip().splitlines()
+            if child.returncode or not lines:
+                error = (child.stderr.strip().splitlines() or ["no output"])[-1]
+                break
+            result = json.loads(lines[-1])
+            error = result["error"]
+            if result["import_ms"] is not None:
+                imports.append(result["import_ms"])
+            if result["first_ms"] is not None:
+                firsts.append(result["first_ms"])
+        fmt = lambda samples, width: f"{statistics.median(samples):>{width}.1f}" if samples else f"{'-':>{width}}"
+        line = f"{name:<14} {fmt(imports, 10)} {fmt(firsts, 13)} {fmt(walls, 11)}"
+        print(line + (f"  ({error})" if error else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--components", nargs="+", choices=list(COMPONENTS), default=list(COMPONENTS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--url", default="https://example.com/")
+    parser.add_argument("--child", choices=list(COMPONENTS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(_measure(args.child, args.url)))
+    else:
+        run(args.components, args.repeat, args.url)
@@ -1,10 +1,42 @@
-from sentence_transformers import SentenceTransformer
 from beeai_framework.backend.types import EmbeddingModelOutput
 
+from util import constants
+from .embedding_cache import EmbeddingCache, get_shared_cache
+from .embedding_service import run_in_embedding_executor
+from .model_registry import get_model
+
 class BGEEmbedder:
-    def __init__(self):
-        self.model = SentenceTransformer("BAAI/bge-base-en-v1.5")
+    def __init__(
+        self,
+        model_name: str = constants.EMBEDDING_MODEL,
+        cache: EmbeddingCache | None = None,
+        backend: str = constants.EMBEDDING_BACKEND,
+    ):
+        self.model_name = model_name
+        self.backend = backend
+        # Quantized vectors differ slightly from fp32 ones, so they get their own cache keys.
+        self.cache_namespace = model_name if backend == "torch" else f"{model_name}@{backend}"
+        if cache is None and constants.EMBEDDING_CACHE_PATH:
+            cache = get_shared_cache(constants.EMBEDDING_CACHE_PATH, constants.EMBEDDING_CACHE_MAX_ENTRIES)
+        self.cache = cache
+
+    @property
+    def model(self):
+        # Weights live in the process-wide registry; constructing an embedder is free.
+        return get_model(self.model_name, self.backend)
+
+    def encode(self, values: list[str]) -> list[list[float]]:
+        """Embeds ``values``, serving cached vectors and batch-encoding only the misses."""
+        cached = self.cache.get_many(self.cache_namespace, values) if self.cache else {}
+        misses = list(dict.fromkeys(value for value in values if value not in cached))
+        if misses:
+            vectors = self.model.encode(misses, normalize_embeddings=True).tolist()
+            fresh = dict(zip(misses, vectors))
+            if self.cache:
+                self.cache.put_many(self.cache_namespace, fresh)
+            cached.update(fresh)
+        return [cached[value] for value in values]
 
     async def create(self, values: list[str]) -> EmbeddingModelOutput:
-        vectors = self.model.encode(values, normalize_embeddings=True)
-        return EmbeddingModelOutput(values=values, embeddings=vectors.tolist())
\ No newline at end of file
+        embeddings = await run_in_embedding_executor(self.encode, values)
+        return EmbeddingModelOutput(values=values, embeddings=embeddings)
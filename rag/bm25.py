@@ -0,0 +1,266 @@
+# bm25.py
+"""In-process BM25 index over the chunks of a Chroma collection.
+
+Dense retrieval matches ticker symbols, exact company names and figures like
+"P/E 51.75" poorly; a lexical index catches those. Ingest writes each chunk's
+term counts and metadata to ``BM25Store`` (SQLite) alongside every
+upsert/update/delete, so a batch costs O(batch) however large the collection
+is. Every write stamps its rows with a new sequence number and deletions
+leave a tombstone, so the retriever's in-memory ``BM25Index`` catches up by
+reading only the rows changed since its last ``sync``.
+"""
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+from util import constants
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[./&-][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def matches_where(metadata: dict, where: dict | None) -> bool:
+    """Evaluates the subset of Chroma's ``where`` syntax the retriever uses."""
+    if not where:
+        return True
+    for field, condition in where.items():
+        if field == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif field == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(field)
+            for op, operand in condition.items():
+                if op == "$eq" and value != operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$nin" and value in operand:
+                    return False
+                if op in ("$gt", "$gte", "$lt", "$lte"):
+                    if value is None:
+                        return False
+                    if op == "$gt" and not value > operand:
+                        return False
+                    if op == "$gte" and not value >= operand:
+                        return False
+                    if op == "$lt" and not value < operand:
+                        return False
+                    if op == "$lte" and not value <= operand:
+                        return False
+        elif metadata.get(field) != condition:
+            return False
+    return True
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.seq = 0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._postings: dict[str, dict[str, int]] = {}
+        self._lengths: dict[str, int] = {}
+        self._metadatas: dict[str, dict] = {}
+        self._terms: dict[str, list[str]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, ids: list[str], texts: list[str], metadatas: list[dict]) -> None:
+        """Indexes (or re-indexes) the given chunks."""
+        with self._lock:
+            self._remove(ids)
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                self._insert(chunk_id, Counter(tokenize(text)), metadata)
+
+    def _insert(self, chunk_id: str, counts: dict[str, int], metadata: dict) -> None:
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[chunk_id] = tf
+        length = sum(counts.values())
+        self._terms[chunk_id] = list(counts)
+        self._lengths[chunk_id] = length
+        self._metadatas[chunk_id] = metadata
+        self._total_length += length
+
+    def remove(self, ids: list[str]) -> None:
+        with self._lock:
+            self._remove(ids)
+
+    def _remove(self, ids: list[str]) -> None:
+        for chunk_id in ids:
+            if chunk_id not in self._lengths:
+                continue
+            self._total_length -= self._lengths.pop(chunk_id)
+            self._metadatas.pop(chunk_id, None)
+            for term in self._terms.pop(chunk_id):
+                postings = self._postings[term]
+                del postings[chunk_id]
+                if not postings:
+                    del self._postings[term]
+
+    def sync(self, store: "BM25Store") -> int:
+        """Applies the rows ``store`` changed since the last sync; returns how many."""
+        # Serialized, so a slow sync can't apply older rows over the ones a later sync read.
+        with self._sync_lock:
+            changes = store.changes(self.seq)
+            with self._lock:
+                for chunk_id, counts, metadata, seq in changes:
+                    self._remove([chunk_id])
+                    if counts is not None:
+                        self._insert(chunk_id, counts, metadata)
+                    self.seq = seq
+            return len(changes)
+
+    def search(self, query: str, n_results: int = 10, where: dict | None = None) -> list[tuple[str, float]]:
+        """Returns up to ``n_results`` (chunk id, score) pairs, best first."""
+        with self._lock:
+            if not self._lengths:
+                return []
+            n_docs = len(self._lengths)
+            avg_length = self._total_length / n_docs
+            scores: dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            if where:
+                scores = {chunk_id: score for chunk_id, score in scores.items() if matches_where(self._metadatas[chunk_id], where)}
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
+
+
+class BM25Store:
+    """Term counts and metadata of every chunk of ``collection``, in SQLite."""
+
+    def __init__(self, path: str = constants.BM25_INDEX_PATH, collection: str = constants.CHROMA_COLLECTION) -> None:
+        self.path = path
+        self.collection = collection
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                collection TEXT NOT NULL,
+                id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                counts TEXT,
+                metadata TEXT,
+                PRIMARY KEY (collection, id)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_seq ON chunks (collection, seq)")
+        self._conn.commit()
+
+    def _next_seq(self) -> int:
+        # Called inside BEGIN IMMEDIATE, so writers in other processes get distinct, increasing numbers.
+        (seq,) = self._conn.execute(
+            "SELECT COALESCE(MAX(seq), 0) + 1 FROM chunks WHERE collection = ?", (self.collection,)
+        ).fetchone()
+        return seq
+
+    def _write(self, statement: str, rows) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                seq = self._next_seq()
+                self._conn.executemany(statement, [(seq, *row) for row in rows])
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def write(self, ids: list[str], texts: list[str], metadatas: list[dict]) -> None:
+        rows = [
+            (json.dumps(Counter(tokenize(text))), json.dumps(metadata), self.collection, chunk_id)
+            for chunk_id, text, metadata in zip(ids, texts, metadatas)
+        ]
+        self._write(
+            "INSERT INTO chunks (seq, counts, metadata, collection, id) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (collection, id) DO UPDATE SET seq = excluded.seq, counts = excluded.counts, metadata = excluded.metadata",
+            rows,
+        )
+
+    def update_metadata(self, ids: list[str], metadatas: list[dict]) -> None:
+        self._write(
+            "UPDATE chunks SET seq = ?, metadata = ? WHERE collection = ? AND id = ? AND counts IS NOT NULL",
+            [(json.dumps(metadata), self.collection, chunk_id) for chunk_id, metadata in zip(ids, metadatas)],
+        )
+
+    def delete(self, ids: list[str]) -> None:
+        # A tombstone rather than a DELETE, so readers learn about the removal on their next sync.
+        self._write(
+            "UPDATE chunks SET seq = ?, counts = NULL, metadata = NULL WHERE collection = ? AND id = ?",
+            [(self.collection, chunk_id) for chunk_id in ids],
+        )
+
+    def changes(self, since: int) -> list[tuple[str, dict | None, dict | None, int]]:
+        """(chunk id, term counts, metadata, seq) of the rows written after ``since``; counts are None for deletions."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, counts, metadata, seq FROM chunks WHERE collection = ? AND seq > ? ORDER BY seq",
+                (self.collection, since),
+            ).fetchall()
+        return [
+            (chunk_id, json.loads(counts) if counts is not None else None, json.loads(metadata) if metadata else None, seq)
+            for chunk_id, counts, metadata, seq in rows
+        ]
+
+    def count(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM chunks WHERE collection = ? AND counts IS NOT NULL", (self.collection,)
+            ).fetchone()
+        return count
+
+
+_stores: dict[tuple[str, str], BM25Store] = {}
+_stores_lock = threading.Lock()
+
+
+def get_bm25_store(collection: str = constants.CHROMA_COLLECTION, path: str = constants.BM25_INDEX_PATH) -> BM25Store:
+    """Returns one store per collection so ingest and the retriever in one process share a connection."""
+    with _stores_lock:
+        store = _stores.get((path, collection))
+        if store is None:
+            store = _stores[(path, collection)] = BM25Store(path, collection)
+        return store
+
+
+def rebuild_from_collection(collection, store: BM25Store, page_size: int = 1000) -> None:
+    """Fills ``store`` from everything already in ``collection`` (first run on an existing store)."""
+    offset = 0
+    while True:
+        page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        store.write(page["ids"], page["documents"], page["metadatas"])
+        offset += len(page["ids"])
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> list[str]:
+    """Merges ranked id lists; each id scores sum(1 / (k + rank))."""
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
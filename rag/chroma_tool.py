@@ -1,30 +1,130 @@
 # chroma_tool.py
+import asyncio
+from datetime import date
+
 from beeai_framework.tools import Tool
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from beeai_framework.tools import StringToolOutput
-from .bge_embedder import BGEEmbedder
-from chromadb import Client
-from chromadb.config import Settings
+from screener.indicators import IndicatorCondition
+from util import constants
+from .bm25 import reciprocal_rank_fusion
+from .chunking import merge_passages
+from .entity_tagger import EntityTagger, get_entity_tagger, where_any
+from .retrieval_batcher import RetrievalBatcher, get_retrieval_batcher
 
 class RAGQuery(BaseModel):
     query: str
+    n_results: int = Field(5, ge=1, le=20, description="Maximum number of source documents to return.")
+    symbol: str | None = Field(None, description="Only return documents about this ticker symbol, e.g. NVDA.")
+    since: date | None = Field(None, description="Only return documents ingested on or after this date (YYYY-MM-DD).")
+    until: date | None = Field(None, description="Only return documents ingested on or before this date (YYYY-MM-DD).")
+    indicators: list[IndicatorCondition] = Field(
+        default_factory=list,
+        description="Only return documents about stocks whose technical indicators meet all of these, e.g. rsi_14 < 30.",
+    )
+
+    def where(self) -> dict | None:
+        """Translates the filters into a Chroma metadata ``where`` clause."""
+        clauses = []
+        if self.symbol:
+            clauses.append({"symbol": self.symbol.upper()})
+        if self.since:
+            clauses.append({"date": {"$gte": int(self.since.strftime("%Y%m%d"))}})
+        if self.until:
+            clauses.append({"date": {"$lte": int(self.until.strftime("%Y%m%d"))}})
+        clauses.extend(condition.where() for condition in self.indicators)
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
 
 class ChromaRetrieverTool(Tool):
     name = "retrieve_from_chromadb"
-    description = "Retrieves relevant documents from ChromaDB using BGE embeddings"
+    description = (
+        "Retrieves relevant documents from ChromaDB using BGE embeddings. "
+        "Optionally filter by ticker symbol, ingestion date range and technical indicators; "
+        "without a symbol, documents about the tickers or companies the query names rank first."
+    )
     input_schema = RAGQuery
 
-    def __init__(self):
+    def __init__(
+        self,
+        candidates: int = constants.RETRIEVER_CHUNK_CANDIDATES,
+        char_budget: int = constants.RETRIEVER_CHAR_BUDGET,
+        batcher: RetrievalBatcher | None = None,
+        tagger: EntityTagger | None = None,
+    ):
         super().__init__()
-        self.embedder = BGEEmbedder()
-        self.collection = Client(Settings(persist_directory="./chroma_store")) \
-            .get_or_create_collection(name="financial_docs")
+        self.candidates = candidates
+        self.char_budget = char_budget
+        self._batcher = batcher
+        self._tagger = tagger
+
+    @property
+    def batcher(self) -> RetrievalBatcher:
+        # Built on first use, so registering the tool doesn't open Chroma or load the embedder.
+        # Parallel tool calls in one agent step share a single encode and a single Chroma query.
+        if self._batcher is None:
+            self._batcher = get_retrieval_batcher()
+        return self._batcher
+
+    @property
+    def tagger(self) -> EntityTagger:
+        if self._tagger is None:
+            self._tagger = get_entity_tagger()
+        return self._tagger
 
     async def _run(self, input: RAGQuery, options, context) -> StringToolOutput:
-        res = await self.embedder.create([input.query])
-        results = self.collection.query(query_embeddings=res.vectors, n_results=5)
-        docs = results['documents'][0]
-        return StringToolOutput("\n---\n".join(docs))
+        n_results = max(self.candidates, input.n_results * 4)
+        where = input.where()
+        mentioned = where_any(self.tagger.tag(input.query, query=True)) if not input.symbol else None
+        if mentioned is None:
+            documents, metadatas = await self.batcher.query(input.query, where, n_results)
+            return StringToolOutput(self.format_passages(documents, metadatas, input.n_results))
+        # Tags boost rather than filter: a question can name companies the tagger misses ("MU") or
+        # read a company into an ordinary word ("apple pie"), so the unrestricted ranking stays in.
+        tagged_where = mentioned if where is None else {"$and": [where, mentioned]}
+        unrestricted, tagged = await asyncio.gather(
+            self.batcher.query(input.query, where, n_results),
+            self.batcher.query(input.query, tagged_where, n_results),
+        )
+        documents, metadatas = self.fuse([unrestricted, tagged], n_results)
+        return StringToolOutput(self.format_passages(documents, metadatas, input.n_results))
+
+    def fuse(self, rankings: list[tuple[list[str], list[dict]]], n_results: int) -> tuple[list[str], list[dict]]:
+        """Merges (documents, metadatas) rankings with reciprocal rank fusion; chunks are keyed by doc_id and index."""
+        chunks: dict[str, tuple[str, dict]] = {}
+        ids = []
+        for documents, metadatas in rankings:
+            ranking = []
+            for text, metadata in zip(documents, metadatas):
+                chunk_id = f"{metadata.get('doc_id', text)}#{metadata.get('chunk', 0)}"
+                chunks[chunk_id] = (text, metadata)
+                ranking.append(chunk_id)
+            ids.append(ranking)
+        fused = reciprocal_rank_fusion(ids, constants.RETRIEVER_RRF_K)[:n_results]
+        return [chunks[chunk_id][0] for chunk_id in fused], [chunks[chunk_id][1] for chunk_id in fused]
+
+    def format_passages(self, documents: list[str], metadatas: list[dict], max_parents: int | None = None) -> str:
+        """Groups matched chunks by parent document (best match first), merges
+        overlapping chunks and stops once ``char_budget`` is spent."""
+        parents: dict[str, list[tuple[int, int, str]]] = {}
+        for text, metadata in zip(documents, metadatas):
+            parent_id = metadata.get("doc_id", text)
+            if parent_id not in parents and max_parents is not None and len(parents) >= max_parents:
+                continue
+            parents.setdefault(parent_id, []).append((metadata.get("start", 0), metadata.get("end", len(text)), text))
+
+        sections = []
+        remaining = self.char_budget
+        for parent_id, chunks in parents.items():
+            passage = " ... ".join(merge_passages(chunks))
+            header = f"[{parent_id}]\n"
+            if remaining <= len(header):
+                break
+            passage = passage[:remaining - len(header)]
+            sections.append(header + passage)
+            remaining -= len(header) + len(passage)
+        return "\n---\n".join(sections)
 
     def _create_emitter(self):
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,51 @@
+# chunking.py
+"""Token-aware chunking with overlap, and re-assembly of matched chunks.
+
+Tokens are approximated with a word/punctuation regex. BGE's WordPiece
+vocabulary splits rare words further, so the default chunk size leaves
+headroom below the model's 512-token window.
+"""
+import re
+from dataclasses import dataclass
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+@dataclass
+class Span:
+    start: int
+    end: int
+
+
+def chunk_spans(text: str, max_tokens: int = 256, overlap: int = 32) -> list[Span]:
+    """Splits ``text`` into character spans of at most ``max_tokens`` tokens, each
+    sharing ``overlap`` tokens with the previous one."""
+    if overlap >= max_tokens:
+        raise ValueError("overlap must be smaller than max_tokens")
+    tokens = [match.span() for match in _TOKEN.finditer(text)]
+    if not tokens:
+        return [Span(0, len(text))] if text else []
+    spans = []
+    step = max_tokens - overlap
+    for first in range(0, len(tokens), step):
+        last = min(first + max_tokens, len(tokens)) - 1
+        spans.append(Span(tokens[first][0], tokens[last][1]))
+        if last == len(tokens) - 1:
+            break
+    return spans
+
+
+def merge_passages(chunks: list[tuple[int, int, str]]) -> list[str]:
+    """Merges ``(start, end, text)`` chunks of one parent document into
+    contiguous passages, so overlapping or adjacent matches are sent once."""
+    passages: list[str] = []
+    current_end = -1
+    for start, end, text in sorted(chunks):
+        if passages and start <= current_end:
+            if end > current_end:
+                passages[-1] += text[current_end - start:]
+                current_end = end
+        else:
+            passages.append(text)
+            current_end = end
+    return passages
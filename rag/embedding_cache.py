@@ -0,0 +1,126 @@
+# embedding_cache.py
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+
+
+class EmbeddingCache:
+    """On-disk embedding cache keyed by model name plus a hash of the text.
+
+    Vectors are stored as float32 blobs in SQLite. Every hit refreshes the
+    entry's access time so that, once the cache grows beyond ``max_entries``,
+    the least recently used vectors are evicted first.
+    """
+
+    def __init__(self, path: str, max_entries: int = 200000) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_lru ON embeddings (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: list[str]) -> dict[str, list[float]]:
+        """Returns the cached vectors for ``texts``, keyed by text."""
+        if not texts:
+            return {}
+        keys = {self.key(model, text): text for text in texts}
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            rows = []
+            key_list = list(keys)
+            # Stay well below SQLite's bound-parameter limit.
+            for start in range(0, len(key_list), 500):
+                chunk = key_list[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(
+                    self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                    ).fetchall()
+                )
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE key = ?", [(now, key) for key, _ in rows]
+            )
+            self._conn.commit()
+        for key, blob in rows:
+            found[keys[key]] = array("f", blob).tolist()
+        for text in texts:
+            if text in found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return found
+
+    def put_many(self, model: str, items: dict[str, list[float]]) -> None:
+        """Stores ``items`` (text -> vector) and evicts the oldest entries past ``max_entries``."""
+        if not items:
+            return
+        now = time.time()
+        rows = [
+            (self.key(model, text), model, array("f", vector).tobytes(), now)
+            for text, vector in items.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector, last_access) VALUES (?, ?, ?, ?)", rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_shared: dict[str, EmbeddingCache] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_cache(path: str, max_entries: int = 200000) -> EmbeddingCache:
+    """Returns one cache per path so every embedder in the process shares a connection."""
+    with _shared_lock:
+        cache = _shared.get(path)
+        if cache is None:
+            cache = _shared[path] = EmbeddingCache(path, max_entries)
+        return cache
@@ -0,0 +1,55 @@
+# embedding_service.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from .bge_embedder import BGEEmbedder
+
+# One worker: forward passes already use every core through torch's intra-op
+# threads, so running two at once only makes both slower.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+
+
+async def run_in_embedding_executor(fn: Callable[[list[str]], list[list[float]]], values: list[str]) -> list[list[float]]:
+    """Runs a blocking encode call off the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(_executor, fn, values)
+
+
+class EmbeddingService:
+    """Runs embedding batches on the dedicated embedding thread.
+
+    Batching happens upstream: ``RetrievalBatcher`` coalesces concurrent
+    queries and ingest already has full lists, so every call here is one
+    forward pass.
+    """
+
+    def __init__(self, embedder: "BGEEmbedder") -> None:
+        self.embedder = embedder
+        self.batches = 0
+        self.requests = 0
+
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        self.batches += 1
+        self.requests += len(texts)
+        return await run_in_embedding_executor(self.embedder.encode, texts)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+        }
+
+
+_service: EmbeddingService | None = None
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Returns the process-wide service wrapping the default embedder."""
+    global _service
+    if _service is None:
+        from .bge_embedder import BGEEmbedder
+
+        _service = EmbeddingService(BGEEmbedder())
+    return _service
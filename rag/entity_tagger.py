@@ -0,0 +1,220 @@
+# entity_tagger.py
+"""Finds the tickers a text talks about, by symbol or by company name.
+
+The dictionary comes from the screener snapshot (ticker and company name of
+every row) plus ``ALIASES`` for names the export doesn't spell out
+("Google" -> GOOG, GOOGL). All surface forms are folded into a trie, and the
+trie is compiled into a single prefix-factored regular expression, so a text
+is tagged in one left-to-right pass in which each position only follows the
+branch of the trie that matches; the number of entities does not add
+alternatives to try. Matches need word boundaries on both sides and the
+longest form wins (GOOGL over GOOG).
+
+To keep ordinary words from being read as entities:
+
+- symbols match in upper case only, and symbols that are also common words
+  (``COST``, ``NOW``, ``ALL``, ...) only with a cashtag (``$COST``);
+- multi-word names match in any case, single-word names only as written,
+  capitalized or in capitals ("Apple", "APPLE", "QUALCOMM" -> "Qualcomm",
+  but not "apple"), except when tagging a question (``query=True``), which
+  is short and about stocks.
+
+At ingest every chunk gets a ``t_<TICKER>: True`` metadata flag per tagged
+ticker (``metadata``). At query time the retriever searches once without and
+once with an ``$or`` of the question's flags (``where_any``) and fuses the
+two rankings, so tagged documents rank higher without hiding the rest.
+"""
+import logging
+import re
+import threading
+from typing import Iterable
+
+from screener.snapshot import Snapshot, get_snapshot
+
+logger = logging.getLogger(__name__)
+
+TAG_PREFIX = "t_"
+
+ALIASES: dict[str, list[str]] = {
+    "Alphabet": ["GOOG", "GOOGL"],
+    "Google": ["GOOG", "GOOGL"],
+    "YouTube": ["GOOG", "GOOGL"],
+    "Facebook": ["META"],
+    "Instagram": ["META"],
+    "WhatsApp": ["META"],
+    "Meta": ["META"],
+    "Amazon": ["AMZN"],
+    "AWS": ["AMZN"],
+    "Microsoft": ["MSFT"],
+    "Azure": ["MSFT"],
+    "Costco": ["COST"],
+    "Micron": ["MU"],
+    "Cisco": ["CSCO"],
+    "Palantir": ["PLTR"],
+    "T-Mobile": ["TMUS"],
+    "Pepsi": ["PEP"],
+    "Booking.com": ["BKNG"],
+    "Temu": ["PDD"],
+    "Pinduoduo": ["PDD"],
+    "Arm": ["ARM"],
+    "Nvidia": ["NVDA"],
+    "JPMorgan": ["JPM"],
+    "JP Morgan": ["JPM"],
+    "Visa": ["V"],
+}
+
+# Symbols that are also everyday words (or single letters); they need a cashtag.
+CASHTAG_ONLY = {
+    "A", "ALL", "APP", "ARE", "ARM", "BE", "CAN", "COST", "DD", "EV", "FOR", "GO", "HAS", "IT", "KEY",
+    "LIN", "LOW", "MU", "NOW", "ON", "ONE", "OPEN", "REAL", "SEE", "SHOP", "SO", "TV", "V",
+}
+
+_LEGAL_SUFFIX = re.compile(
+    r",?\s+(inc\.?|incorporated|corporation|corp\.?|company|co\.?|plc|n\.v\.|s\.a\.|ag|se|ltd\.?|limited|llc)$",
+    re.IGNORECASE,
+)
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """A regex matching any of ``words``, factored by common prefixes, longest first."""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        end = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # Greedy optional group: try the longer continuation first, fall back to ending here.
+        return f"(?:{body})?" if end else body
+
+    return build(trie)
+
+
+def company_names(name: str) -> list[str]:
+    """The export's company name and the name without its legal suffix."""
+    names = [name.strip()]
+    short = name.strip()
+    while True:
+        stripped = _LEGAL_SUFFIX.sub("", short).strip()
+        if stripped == short:
+            break
+        short = stripped
+    if short and short != names[0]:
+        names.append(short)
+    return names
+
+
+class EntityTagger:
+    def __init__(self, symbols: Iterable[str], names: dict[str, Iterable[str]]) -> None:
+        """
+        Args:
+            symbols: Ticker symbols.
+            names: Company name or alias -> the tickers it refers to.
+        """
+        self.symbols = {symbol.upper() for symbol in symbols}
+        self._names: dict[str, set[str]] = {}
+        case_sensitive: set[str] = set()
+        case_insensitive: set[str] = set()
+        for name, tickers in names.items():
+            if " " in name.strip():
+                case_insensitive.add(name.casefold())
+                variants = [name]
+            else:
+                variants = {name, name[:1].upper() + name[1:], name.upper()}
+                if name.isupper():
+                    # Exports often write the name in capitals ("QUALCOMM"); prose writes "Qualcomm".
+                    variants.add(name.capitalize())
+                case_sensitive.update(variants)
+            for variant in variants:
+                self._names.setdefault(variant.casefold(), set()).update(ticker.upper() for ticker in tickers)
+
+        # Surface forms: exact spellings, and casefolded multi-word names that match in any case.
+        self.case_sensitive, self.case_insensitive = case_sensitive, case_insensitive
+
+        cashtag = _trie_pattern(self.symbols)
+        bare = _trie_pattern(self.symbols - CASHTAG_ONLY)
+        symbols = [rf"\$(?P<cashtag>{cashtag})"]
+        if bare:
+            symbols.append(f"(?P<symbol>{bare})")
+        name_patterns = []
+        if case_insensitive:
+            name_patterns.append(f"(?i:{_trie_pattern(case_insensitive)})")
+        if case_sensitive:
+            name_patterns.append(_trie_pattern(case_sensitive))
+        self._pattern = self._compile(symbols, name_patterns)
+        # Questions are often typed in lower case; there every name matches in any case.
+        all_names = {name.casefold() for name in case_insensitive | case_sensitive}
+        self._query_pattern = self._compile(symbols, [f"(?i:{_trie_pattern(all_names)})"] if all_names else [])
+
+    @staticmethod
+    def _compile(symbols: list[str], name_patterns: list[str]) -> re.Pattern:
+        alternatives = list(symbols)
+        if name_patterns:
+            alternatives.append(f"(?P<name>{'|'.join(name_patterns)})")
+        return re.compile(rf"(?<![\w$])(?:{'|'.join(alternatives)})(?!\w)")
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        snapshot: Snapshot | None = None,
+        aliases: dict[str, list[str]] = ALIASES,
+        extra_symbols: Iterable[str] = (),
+    ) -> "EntityTagger":
+        snapshot = snapshot or get_snapshot()
+        symbols = set(snapshot.columns["ticker"].tolist()) | set(extra_symbols)
+        symbols.update(ticker for tickers in aliases.values() for ticker in tickers)
+        names: dict[str, set[str]] = {}
+        for ticker, name in zip(snapshot.columns["ticker"].tolist(), snapshot.columns["name"].tolist()):
+            for variant in company_names(name):
+                names.setdefault(variant, set()).add(ticker)
+        for alias, tickers in aliases.items():
+            names.setdefault(alias, set()).update(tickers)
+        return cls(symbols, names)
+
+    def mentions(self, text: str, query: bool = False) -> Iterable[tuple[int, int, set[str]]]:
+        """(start, end, tickers) for every mention in ``text``, in order.
+
+        With ``query``, company names match in any case ("google").
+        """
+        pattern = self._query_pattern if query else self._pattern
+        for match in pattern.finditer(text):
+            symbol = match["cashtag"] or match["symbol"]
+            tickers = {symbol} if symbol else self._names.get(match["name"].casefold(), set())
+            yield match.start(), match.end(), tickers
+
+    def tag(self, text: str, query: bool = False) -> set[str]:
+        tickers: set[str] = set()
+        for _, _, found in self.mentions(text, query):
+            tickers |= found
+        return tickers
+
+    def metadata(self, text: str) -> dict[str, bool]:
+        """``t_<TICKER>: True`` for every ticker mentioned in ``text``."""
+        return {f"{TAG_PREFIX}{ticker}": True for ticker in sorted(self.tag(text))}
+
+
+def where_any(tickers: Iterable[str]) -> dict | None:
+    """Chroma ``where`` clause matching documents tagged with any of ``tickers``."""
+    clauses = [{f"{TAG_PREFIX}{ticker}": True} for ticker in sorted(tickers)]
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+_tagger: EntityTagger | None = None
+_lock = threading.Lock()
+
+
+def get_entity_tagger() -> EntityTagger:
+    global _tagger
+    with _lock:
+        if _tagger is None:
+            _tagger = EntityTagger.from_snapshot()
+            logger.debug(f"Entity tagger built for {len(_tagger.symbols)} symbols")
+        return _tagger
@@ -1,48 +1,396 @@
 # ingest.py
+"""Streaming ingestion: fetch -> chunk -> embed (bounded batches) -> upsert.
+
+Stages are connected by bounded queues, so a slow embedder pushes back on the
+fetchers and memory stays flat no matter how many symbols are ingested.
+Completed symbols are appended to a checkpoint file; an interrupted run picks
+up where it stopped, and the checkpoint is cleared once a run reaches the end.
+
+Ingestion is incremental: every chunk carries the content hash of its source
+document, only new or changed documents are re-embedded, and documents whose
+source disappeared from the universe are deleted at the end of a run.
+"""
+import argparse
 import asyncio
-from chromadb import Client
-from chromadb.config import Settings
-from rag.bge_embedder import BGEEmbedder
-from llama_index.core.schema import Document
+import csv
+import hashlib
+import os
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List
-from beeai_framework.backend import search_web
+from typing import Awaitable, Callable, Iterable, Iterator
+
+from rag.bge_embedder import BGEEmbedder
+from rag.bm25 import BM25Store, get_bm25_store, rebuild_from_collection
+from rag.chunking import chunk_spans
+from rag.entity_tagger import TAG_PREFIX, get_entity_tagger
+from rag.store import bump_collection_version, get_collection
+from screener.indicators import INDICATORS, get_indicator_engine, indicator_metadata
+from util import constants
+from util.logger import get_logger
+
+logger = get_logger(__name__)
 
-# Step 1: Setup ChromaDB
-chroma_client = Client(Settings(persist_directory="D:\\projects\\chromadb"))
-collection = chroma_client.get_or_create_collection(name="stock_docs")
+SOURCE = "stock_profile"
 
-# Step 2: Define stock symbols to fetch
+# Default universe when no symbols file is given
 STOCK_SYMBOLS = ["AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "NVDA", "META", "NFLX", "JPM", "V"]
 
-# Step 3: Fetch stock details from the web
-async def fetch_stock_descriptions(symbols: List[str]) -> List[str]:
-    tasks = [
-        search_web({"query": f"{symbol} stock profile"}) for symbol in symbols
+_DONE = object()
+
+
+@dataclass
+class SourceDocument:
+    id: str
+    text: str
+    metadata: dict
+
+    @property
+    def content_hash(self) -> str:
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Chunk:
+    id: str
+    text: str
+    metadata: dict
+
+
+@dataclass
+class IngestReport:
+    fetched: int = 0
+    failed: int = 0
+    skipped: int = 0
+    chunks: int = 0
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    indicators_refreshed: int = 0
+    failed_ids: list[str] = field(default_factory=list)
+
+
+class IngestCheckpoint:
+    """Append-only record of the document ids that made it into the collection."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._done: set[str] = set()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._done = {line.strip() for line in f if line.strip()}
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._done
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def mark(self, doc_ids: list[str]) -> None:
+        self._done.update(doc_ids)
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(f"{doc_id}\n" for doc_id in doc_ids)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self) -> None:
+        self._done.clear()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def read_symbols(path: str) -> Iterator[str]:
+    """Streams tickers from a screener export (``Ticker`` column) or a one-per-line file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(f):
+                if row.get("Ticker"):
+                    yield row["Ticker"].strip()
+        else:
+            for line in f:
+                if line.strip():
+                    yield line.strip()
+
+
+_search_tool = None
+
+
+def _search():
+    global _search_tool
+    if _search_tool is None:
+        # ddgs is only needed to fetch stock profiles; ingesters of local data never import it.
+        from beeai_framework.tools.search.duckduckgo import DuckDuckGoSearchTool
+
+        _search_tool = DuckDuckGoSearchTool(max_results=1)
+    return _search_tool
+
+
+# Fetch a stock description from the web
+async def fetch_stock_description(symbol: str) -> str | None:
+    output = await _search().run({"query": f"{symbol} stock profile"})
+    if output.results:
+        top = output.results[0]
+        return f"{top.title}\n{top.description}"
+    return None
+
+
+def chunk_document(
+    doc: SourceDocument,
+    max_tokens: int = constants.INGEST_CHUNK_TOKENS,
+    overlap: int = constants.INGEST_CHUNK_OVERLAP,
+) -> list[Chunk]:
+    # Every chunk carries the tickers its document mentions, so retrieval can filter on them.
+    metadata = {**get_entity_tagger().metadata(doc.text), **doc.metadata, "doc_id": doc.id, "content_hash": doc.content_hash}
+    return [
+        Chunk(
+            id=f"{doc.id}#{i}",
+            text=doc.text[span.start:span.end],
+            metadata={**metadata, "chunk": i, "start": span.start, "end": span.end},
+        )
+        for i, span in enumerate(chunk_spans(doc.text, max_tokens, overlap))
     ]
-    results = await asyncio.gather(*tasks)
-    descriptions = []
-    for result in results:
-        if result and result.get("web_results"):
-            top = result["web_results"][0]
-            descriptions.append(f"{top['title']}\n{top['snippet']}")
+
+
+async def _feed(symbols: Iterable[str], checkpoint: IngestCheckpoint, queue: asyncio.Queue, workers: int, report: IngestReport, seen: set[str]) -> None:
+    for symbol in symbols:
+        seen.add(symbol)
+        if symbol in checkpoint:
+            report.skipped += 1
+            continue
+        await queue.put(symbol)
+    for _ in range(workers):
+        await queue.put(_DONE)
+
+
+async def _fetch(symbols: asyncio.Queue, docs: asyncio.Queue, report: IngestReport, fetch: Callable[[str], Awaitable[str | None]]) -> None:
+    while (symbol := await symbols.get()) is not _DONE:
+        try:
+            text = await fetch(symbol)
+        except Exception as e:
+            logger.warning(f"Fetching {symbol} failed: {e}")
+            text = None
+        if text is None:
+            # Not checkpointed, so the next run retries it.
+            report.failed += 1
+            report.failed_ids.append(symbol)
+            continue
+        report.fetched += 1
+        now = datetime.utcnow()
+        doc = SourceDocument(
+            id=symbol,
+            text=text,
+            # ``date`` is numeric (YYYYMMDD) so the retriever can range-filter on it.
+            metadata={
+                "source": SOURCE,
+                "symbol": symbol,
+                f"{TAG_PREFIX}{symbol}": True,
+                "timestamp": str(now),
+                "date": int(now.strftime("%Y%m%d")),
+            },
+        )
+        await docs.put((doc, chunk_document(doc)))
+    await docs.put(_DONE)
+
+
+class CollectionWriter:
+    """Applies every write to both the Chroma collection and its BM25 store."""
+
+    def __init__(self, collection, lexical: BM25Store | None = None) -> None:
+        self.collection = collection
+        self.lexical = lexical or get_bm25_store(collection.name)
+        if not self.lexical.count() and collection.count():
+            logger.info("Building BM25 index from the existing collection")
+            rebuild_from_collection(collection, self.lexical)
+
+    async def upsert(self, chunks: list[Chunk], embeddings: list[list[float]]) -> None:
+        ids = [chunk.id for chunk in chunks]
+        documents = [chunk.text for chunk in chunks]
+        metadatas = [chunk.metadata for chunk in chunks]
+        await asyncio.to_thread(
+            self.collection.upsert, ids=ids, documents=documents, embeddings=embeddings, metadatas=metadatas
+        )
+        await asyncio.to_thread(self.lexical.write, ids, documents, metadatas)
+
+    async def update_metadata(self, ids: list[str], metadatas: list[dict]) -> None:
+        await asyncio.to_thread(self.collection.update, ids=ids, metadatas=metadatas)
+        await asyncio.to_thread(self.lexical.update_metadata, ids, metadatas)
+
+    async def delete(self, ids: list[str]) -> None:
+        await asyncio.to_thread(self.collection.delete, ids=ids)
+        await asyncio.to_thread(self.lexical.delete, ids)
+
+    def commit(self) -> None:
+        # The BM25 rows are already written, batch by batch; the bump is what makes the
+        # retriever drop its cached results and pull the changed rows into its index.
+        bump_collection_version(self.collection.name)
+
+
+async def _stored_versions(collection, doc_ids: list[str]) -> dict[str, tuple[str, set[str]]]:
+    """Returns doc_id -> (content hash, chunk ids) for the documents already in the collection."""
+    existing = await asyncio.to_thread(
+        collection.get, where={"doc_id": {"$in": doc_ids}}, include=["metadatas"]
+    )
+    versions: dict[str, tuple[str, set[str]]] = {}
+    for chunk_id, metadata in zip(existing["ids"], existing["metadatas"]):
+        _, chunk_ids = versions.setdefault(metadata["doc_id"], (metadata.get("content_hash", ""), set()))
+        chunk_ids.add(chunk_id)
+    return versions
+
+
+async def _upsert(batch: list[tuple[SourceDocument, list[Chunk]]], embedder: BGEEmbedder, writer: CollectionWriter, checkpoint: IngestCheckpoint | None, report: IngestReport) -> None:
+    versions = await _stored_versions(writer.collection, [doc.id for doc, _ in batch])
+    chunks: list[Chunk] = []
+    stale: list[str] = []
+    for doc, doc_chunks in batch:
+        previous = versions.get(doc.id)
+        if previous is None:
+            report.added += 1
+        elif previous[0] == doc.content_hash:
+            report.unchanged += 1
+            continue
         else:
-            descriptions.append("No data found.")
-    return descriptions
-
-# Step 4: Embed and persist
-async def ingest_stocks():
-    embedder = BGEEmbedder()
-    descriptions = await fetch_stock_descriptions(STOCK_SYMBOLS)
-    embedding_res = await embedder.create(descriptions)
-
-    # Add to ChromaDB
-    collection.add(
-        documents=descriptions,
-        embeddings=embedding_res.vectors,
-        ids=STOCK_SYMBOLS,
-        metadatas=[{"symbol": s, "timestamp": str(datetime.utcnow())} for s in STOCK_SYMBOLS]
+            report.updated += 1
+            # A shorter document leaves trailing chunks behind that upsert won't overwrite.
+            stale.extend(previous[1] - {chunk.id for chunk in doc_chunks})
+        chunks.extend(doc_chunks)
+
+    if chunks:
+        embedding_res = await embedder.create([chunk.text for chunk in chunks])
+        await writer.upsert(chunks, embedding_res.embeddings)
+    if stale:
+        await writer.delete(stale)
+    if chunks or stale:
+        writer.commit()
+    report.chunks += len(chunks)
+    if checkpoint is not None:
+        checkpoint.mark([doc.id for doc, _ in batch])
+
+
+async def _prune(writer: CollectionWriter, source: str, seen: set[str], page_size: int = 1000) -> int:
+    """Deletes chunks of ``source`` whose document is no longer in the universe; returns how many documents."""
+    gone: list[str] = []
+    gone_docs: set[str] = set()
+    offset = 0
+    while True:
+        page = await asyncio.to_thread(
+            writer.collection.get, where={"source": source}, include=["metadatas"], limit=page_size, offset=offset
+        )
+        if not page["ids"]:
+            break
+        for chunk_id, metadata in zip(page["ids"], page["metadatas"]):
+            if metadata["doc_id"] not in seen:
+                gone.append(chunk_id)
+                gone_docs.add(metadata["doc_id"])
+        offset += len(page["ids"])
+    if gone:
+        await writer.delete(gone)
+        writer.commit()
+    return len(gone_docs)
+
+
+async def refresh_indicator_metadata(writer: CollectionWriter, source: str = SOURCE, page_size: int = 1000) -> int:
+    """Stamps every chunk of ``source`` with its stock's latest technical indicators.
+
+    Only metadata changes, so nothing is re-embedded. Returns how many chunks changed.
+    """
+    if not os.path.exists(os.path.join(constants.SCREENER_HISTORY_PATH, "meta.json")):
+        return 0
+    engine = await asyncio.to_thread(get_indicator_engine)
+    latest = await asyncio.to_thread(engine.latest)
+    stale_keys = {*INDICATORS, "indicators_date"}
+
+    def restamp(chunk_ids: list[str], metadatas: list[dict]) -> tuple[list[str], list[dict]]:
+        changed_ids, changed_metadatas = [], []
+        for chunk_id, metadata in zip(chunk_ids, metadatas):
+            updated = {key: value for key, value in metadata.items() if key not in stale_keys}
+            updated.update(indicator_metadata(metadata.get("symbol", ""), engine, latest))
+            if updated != metadata:
+                changed_ids.append(chunk_id)
+                changed_metadatas.append(updated)
+        return changed_ids, changed_metadatas
+
+    changed = 0
+    offset = 0
+    while True:
+        page = await asyncio.to_thread(
+            writer.collection.get, where={"source": source}, include=["metadatas"], limit=page_size, offset=offset
+        )
+        if not page["ids"]:
+            break
+        ids, metadatas = await asyncio.to_thread(restamp, page["ids"], page["metadatas"])
+        if ids:
+            await writer.update_metadata(ids, metadatas)
+            changed += len(ids)
+        offset += len(page["ids"])
+    if changed:
+        writer.commit()
+    return changed
+
+
+async def _embed_and_upsert(docs: asyncio.Queue, workers: int, embedder: BGEEmbedder, writer: CollectionWriter, checkpoint: IngestCheckpoint, batch_size: int, report: IngestReport) -> None:
+    batch: list[tuple[SourceDocument, list[Chunk]]] = []
+    pending = 0
+    finished = 0
+    while finished < workers:
+        item = await docs.get()
+        if item is _DONE:
+            finished += 1
+            continue
+        batch.append(item)
+        pending += len(item[1])
+        # Documents are never split across batches, so a checkpointed id is always complete.
+        if pending >= batch_size:
+            await _upsert(batch, embedder, writer, checkpoint, report)
+            batch, pending = [], 0
+    if batch:
+        await _upsert(batch, embedder, writer, checkpoint, report)
+
+
+async def ingest_stocks(
+    symbols: Iterable[str] = STOCK_SYMBOLS,
+    *,
+    concurrency: int = constants.INGEST_CONCURRENCY,
+    batch_size: int = constants.INGEST_BATCH_SIZE,
+    queue_size: int = constants.INGEST_QUEUE_SIZE,
+    checkpoint_path: str = constants.INGEST_CHECKPOINT_PATH,
+    collection=None,
+    prune: bool = True,
+    fetch: Callable[[str], Awaitable[str | None]] = fetch_stock_description,
+    embedder: BGEEmbedder | None = None,
+) -> IngestReport:
+    embedder = embedder or BGEEmbedder()
+    writer = CollectionWriter(collection if collection is not None else get_collection())
+    checkpoint = IngestCheckpoint(checkpoint_path)
+    if len(checkpoint):
+        logger.info(f"Resuming ingest, {len(checkpoint)} documents already done")
+
+    report = IngestReport()
+    seen: set[str] = set()
+    symbol_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    doc_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    # A TaskGroup cancels the other stages if one fails, instead of leaving them blocked on a queue.
+    async with asyncio.TaskGroup() as group:
+        group.create_task(_feed(symbols, checkpoint, symbol_queue, concurrency, report, seen))
+        for _ in range(concurrency):
+            group.create_task(_fetch(symbol_queue, doc_queue, report, fetch))
+        group.create_task(_embed_and_upsert(doc_queue, concurrency, embedder, writer, checkpoint, batch_size, report))
+
+    if prune:
+        report.deleted = await _prune(writer, SOURCE, seen)
+    report.indicators_refreshed = await refresh_indicator_metadata(writer)
+    # The run completed; failed symbols are reported and retried by the next run.
+    checkpoint.clear()
+    logger.info(
+        f"Ingest finished: {report.added} added, {report.updated} updated, {report.unchanged} unchanged, "
+        f"{report.deleted} deleted, {report.indicators_refreshed} re-tagged with indicators, {report.failed} failed, {report.skipped} resumed, "
+        f"{report.chunks} chunks embedded"
     )
+    return report
+
 
 if __name__ == "__main__":
-    asyncio.run(ingest_stocks())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Ingest stock profiles into ChromaDB")
+    parser.add_argument("--symbols-file", help="screener CSV (Ticker column) or one symbol per line")
+    args = parser.parse_args()
+    asyncio.run(ingest_stocks(read_symbols(args.symbols_file) if args.symbols_file else STOCK_SYMBOLS))
@@ -0,0 +1,78 @@
+# model_registry.py
+"""Process-wide embedding models, loaded once on first use.
+
+Three CPU backends are available:
+
+- ``torch``: the reference fp32 SentenceTransformer path.
+- ``onnx``: the same fp32 weights run through ONNX Runtime. Cosine similarity
+  to the torch vectors stays >= 0.9999.
+- ``onnx-int8``: ONNX with dynamic int8 quantization of the linear layers
+  (``EMBEDDING_QUANTIZATION`` picks the arm64/avx2/avx512/avx512_vnni kernel
+  set). Cosine similarity to the torch vectors stays >= 0.99.
+
+``benchmarks/embedding_backends.py`` checks these tolerances and measures
+throughput and latency on the current machine.
+"""
+import os
+import threading
+from typing import TYPE_CHECKING
+
+from util import constants
+from util.logger import get_logger
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+logger = get_logger(__name__)
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+COSINE_TOLERANCE = {"torch": 1.0, "onnx": 0.9999, "onnx-int8": 0.99}
+
+_models: dict[tuple[str, str], "SentenceTransformer"] = {}
+_lock = threading.Lock()
+
+
+def _load(name: str, backend: str) -> "SentenceTransformer":
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(name)
+    if backend == "onnx":
+        return SentenceTransformer(name, backend="onnx")
+    if backend == "onnx-int8":
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        # Quantize once into a local copy; later processes load the int8 file directly.
+        local_dir = os.path.join(constants.EMBEDDING_ONNX_DIR, name.replace("/", "__"))
+        file_name = f"onnx/model_qint8_{constants.EMBEDDING_QUANTIZATION}.onnx"
+        if not os.path.exists(os.path.join(local_dir, file_name)):
+            model = SentenceTransformer(name, backend="onnx")
+            model.save_pretrained(local_dir)
+            export_dynamic_quantized_onnx_model(model, constants.EMBEDDING_QUANTIZATION, local_dir)
+        return SentenceTransformer(local_dir, backend="onnx", model_kwargs={"file_name": file_name})
+    raise ValueError(f"Unknown embedding backend '{backend}', expected one of {BACKENDS}")
+
+
+def get_model(name: str = constants.EMBEDDING_MODEL, backend: str = constants.EMBEDDING_BACKEND) -> "SentenceTransformer":
+    """Returns the process-wide instance of ``name`` on ``backend``, loading it on first use."""
+    key = (name, backend)
+    model = _models.get(key)
+    if model is not None:
+        return model
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            logger.info(f"Loading embedding model {name} ({backend})")
+            model = _load(name, backend)
+            _models[key] = model
+    return model
+
+
+def warmup(names: list[str] | None = None, backend: str = constants.EMBEDDING_BACKEND) -> None:
+    """Loads ``names`` (default: the configured embedding model) ahead of the first request."""
+    for name in names or [constants.EMBEDDING_MODEL]:
+        get_model(name, backend)
+
+
+def loaded_models() -> list[tuple[str, str]]:
+    return list(_models)
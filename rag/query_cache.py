@@ -0,0 +1,101 @@
+# query_cache.py
+import time
+from typing import Any, Callable
+
+import numpy as np
+
+from util import constants
+
+
+class SemanticQueryCache:
+    """Caches retrieval results by query embedding.
+
+    A lookup hits when a cached query with the same filter is within
+    ``threshold`` cosine similarity (vectors are normalized, so a dot product)
+    and asked for at least as many results. Entries expire after ``ttl_s``,
+    and everything is dropped as soon as ``version_fn`` reports that ingest
+    has written to the collection.
+    """
+
+    def __init__(
+        self,
+        threshold: float = constants.RAG_CACHE_THRESHOLD,
+        ttl_s: float = constants.RAG_CACHE_TTL_S,
+        max_entries: int = constants.RAG_CACHE_MAX_ENTRIES,
+        version_fn: Callable[[], int] | None = None,
+    ) -> None:
+        self.threshold = threshold
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.version_fn = version_fn
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._version = version_fn() if version_fn else 0
+        self._clear()
+
+    def _clear(self) -> None:
+        self._vectors: list[np.ndarray] = []
+        self._keys: list[str] = []
+        self._n_results: list[int] = []
+        self._created: list[float] = []
+        self._results: list[Any] = []
+        self._matrix: np.ndarray | None = None
+
+    def _check_version(self) -> None:
+        if self.version_fn is None:
+            return
+        version = self.version_fn()
+        if version != self._version:
+            self._version = version
+            self.invalidations += 1
+            self._clear()
+
+    def _expire(self, now: float) -> None:
+        # Entries are appended in creation order, so expired ones form a prefix.
+        expired = 0
+        while expired < len(self._created) and now - self._created[expired] > self.ttl_s:
+            expired += 1
+        overflow = max(0, len(self._created) - expired - self.max_entries)
+        self._drop(expired + overflow)
+
+    def _drop(self, count: int) -> None:
+        if count:
+            for column in (self._vectors, self._keys, self._n_results, self._created, self._results):
+                del column[:count]
+            self._matrix = None
+
+    def get(self, vector: list[float], key: str, n_results: int) -> Any | None:
+        self._check_version()
+        self._expire(time.monotonic())
+        if self._vectors:
+            if self._matrix is None:
+                self._matrix = np.vstack(self._vectors)
+            similarities = self._matrix @ np.asarray(vector, dtype=np.float32)
+            for i in np.argsort(-similarities):
+                if similarities[i] < self.threshold:
+                    break
+                if self._keys[i] == key and self._n_results[i] >= n_results:
+                    self.hits += 1
+                    return self._results[i]
+        self.misses += 1
+        return None
+
+    def put(self, vector: list[float], key: str, n_results: int, result: Any) -> None:
+        self._vectors.append(np.asarray(vector, dtype=np.float32))
+        self._keys.append(key)
+        self._n_results.append(n_results)
+        self._created.append(time.monotonic())
+        self._results.append(result)
+        self._matrix = None
+        self._expire(time.monotonic())
+
+    def stats(self) -> dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+            "size": len(self._vectors),
+        }
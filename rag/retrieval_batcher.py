@@ -0,0 +1,203 @@
+# retrieval_batcher.py
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+
+from util import constants
+from util.logger import get_logger
+from .bm25 import BM25Index, BM25Store, get_bm25_store, reciprocal_rank_fusion
+from .embedding_service import EmbeddingService, get_embedding_service
+from .store import collection_version, get_collection
+
+if TYPE_CHECKING:
+    from .query_cache import SemanticQueryCache
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class _Request:
+    query: str
+    where: dict | None
+    n_results: int
+    future: asyncio.Future
+
+
+class RetrievalBatcher:
+    """Coalesces retrieval calls that are in flight together.
+
+    All queries collected within ``max_wait_ms`` are embedded with a single
+    encode call, and queries sharing the same metadata filter go to Chroma as
+    one ``query_embeddings`` list. Results are fanned back out to each caller.
+    Near-duplicate queries are answered from ``cache`` without touching Chroma.
+
+    With ``lexical_store`` set, every query also runs against the BM25
+    index in parallel and the two rankings are merged with reciprocal rank
+    fusion. Whenever ``version_fn`` reports a new collection version, the
+    rows ingest changed since are pulled into the index off the event loop.
+    """
+
+    def __init__(
+        self,
+        embedding_service: EmbeddingService,
+        collection,
+        max_wait_ms: float = constants.RETRIEVER_MAX_WAIT_MS,
+        max_batch_size: int = constants.EMBEDDING_MAX_BATCH_SIZE,
+        cache: "SemanticQueryCache | None" = None,
+        lexical_store: BM25Store | None = None,
+        version_fn: Callable[[], int] | None = None,
+        rrf_k: int = constants.RETRIEVER_RRF_K,
+    ) -> None:
+        self.embedding_service = embedding_service
+        self.collection = collection
+        self.cache = cache
+        self.lexical_store = lexical_store
+        self.version_fn = version_fn
+        self.rrf_k = rrf_k
+        self._lexical_index = BM25Index()
+        self._lexical_version: int | None = None
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.requests = 0
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def query(self, query: str, where: dict | None = None, n_results: int = 10) -> tuple[list[str], list[dict]]:
+        """Returns the matching (documents, metadatas) for one query."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._drain())
+        future = loop.create_future()
+        await self._queue.put(_Request(query, where, n_results, future))
+        return await future
+
+    async def _drain(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[_Request]) -> None:
+        self.batches += 1
+        self.requests += len(batch)
+        try:
+            vectors = await self.embedding_service.embed_many([request.query for request in batch])
+            groups: dict[str, list[tuple[_Request, list[float]]]] = {}
+            for request, vector in zip(batch, vectors):
+                key = json.dumps(request.where, sort_keys=True)
+                cached = self.cache.get(vector, key, request.n_results) if self.cache else None
+                if cached is not None:
+                    # The caller may have been cancelled while the batch was being embedded.
+                    if not request.future.done():
+                        request.future.set_result((cached[0][:request.n_results], cached[1][:request.n_results]))
+                    continue
+                groups.setdefault(key, []).append((request, vector))
+            await asyncio.gather(*[self._query_group(group) for group in groups.values()])
+        except Exception as e:
+            logger.error(f"Retrieval batch of {len(batch)} failed: {e}")
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+
+    async def _query_group(self, group: list[tuple[_Request, list[float]]]) -> None:
+        where = group[0][0].where
+        n_results = max(request.n_results for request, _ in group)
+        dense = asyncio.to_thread(
+            self.collection.query,
+            query_embeddings=[vector for _, vector in group],
+            n_results=n_results,
+            where=where,
+            include=["documents", "metadatas"],
+        )
+        index = await self._lexical()
+        if index is None:
+            results = await dense
+        else:
+            results, *lexical = await asyncio.gather(
+                dense, *[asyncio.to_thread(index.search, request.query, n_results, where) for request, _ in group]
+            )
+            results = await self._fuse(results, lexical, n_results)
+        key = json.dumps(where, sort_keys=True)
+        for i, (request, vector) in enumerate(group):
+            if self.cache:
+                self.cache.put(vector, key, n_results, (results["documents"][i], results["metadatas"][i]))
+            if not request.future.done():
+                request.future.set_result(
+                    (results["documents"][i][:request.n_results], results["metadatas"][i][:request.n_results])
+                )
+
+    async def _lexical(self) -> BM25Index | None:
+        if self.lexical_store is None:
+            return None
+        version = self.version_fn() if self.version_fn else 0
+        if version != self._lexical_version:
+            changed = await asyncio.to_thread(self._lexical_index.sync, self.lexical_store)
+            self._lexical_version = version
+            if changed:
+                logger.debug(f"BM25 index caught up with {changed} changed chunks")
+        return self._lexical_index
+
+    async def _fuse(self, dense: dict, lexical: list[list[tuple[str, float]]], n_results: int) -> dict:
+        """Merges each query's dense and BM25 rankings with reciprocal rank fusion."""
+        known: dict[str, tuple[str, dict]] = {}
+        fused_ids = []
+        for ids, documents, metadatas, hits in zip(dense["ids"], dense["documents"], dense["metadatas"], lexical):
+            known.update(zip(ids, zip(documents, metadatas)))
+            fused_ids.append(reciprocal_rank_fusion([ids, [chunk_id for chunk_id, _ in hits]], self.rrf_k)[:n_results])
+        # Lexical-only hits still need their text; fetch them for the whole group at once.
+        missing = list({chunk_id for ids in fused_ids for chunk_id in ids if chunk_id not in known})
+        if missing:
+            extra = await asyncio.to_thread(self.collection.get, ids=missing, include=["documents", "metadatas"])
+            known.update(zip(extra["ids"], zip(extra["documents"], extra["metadatas"])))
+        fused = {"ids": [], "documents": [], "metadatas": []}
+        for ids in fused_ids:
+            ids = [chunk_id for chunk_id in ids if chunk_id in known]
+            fused["ids"].append(ids)
+            fused["documents"].append([known[chunk_id][0] for chunk_id in ids])
+            fused["metadatas"].append([known[chunk_id][1] for chunk_id in ids])
+        return fused
+
+    def stats(self) -> dict[str, float]:
+        stats = {
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+        }
+        if self.cache:
+            stats.update({f"cache_{name}": value for name, value in self.cache.stats().items()})
+        return stats
+
+
+_batchers: dict[str, RetrievalBatcher] = {}
+
+
+def get_retrieval_batcher(collection_name: str = constants.CHROMA_COLLECTION) -> RetrievalBatcher:
+    """Returns one batcher per collection, shared by every retriever tool instance."""
+    batcher = _batchers.get(collection_name)
+    if batcher is None:
+        # numpy (via the query cache) and chromadb load here, on the first retrieval.
+        from .query_cache import SemanticQueryCache
+
+        version_fn = lambda: collection_version(collection_name)
+        batcher = _batchers[collection_name] = RetrievalBatcher(
+            get_embedding_service(),
+            get_collection(collection_name),
+            cache=SemanticQueryCache(version_fn=version_fn),
+            lexical_store=get_bm25_store(collection_name) if constants.RETRIEVER_HYBRID else None,
+            version_fn=version_fn,
+        )
+    return batcher
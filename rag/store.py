@@ -0,0 +1,47 @@
+# store.py
+import os
+import threading
+
+from util import constants
+
+_clients: dict[str, object] = {}
+_lock = threading.Lock()
+
+
+def get_client(path: str = constants.CHROMA_PATH):
+    """Returns one persistent Chroma client per path, shared by ingest and the retriever."""
+    with _lock:
+        client = _clients.get(path)
+        if client is None:
+            from chromadb import PersistentClient
+
+            client = _clients[path] = PersistentClient(path=path)
+        return client
+
+
+def get_collection(name: str = constants.CHROMA_COLLECTION, path: str = constants.CHROMA_PATH):
+    return get_client(path).get_or_create_collection(name=name)
+
+
+def _version_path(name: str, path: str) -> str:
+    return os.path.join(path, f"{name}.version")
+
+
+def collection_version(name: str = constants.CHROMA_COLLECTION, path: str = constants.CHROMA_PATH) -> int:
+    """Returns a counter that changes whenever ingest writes to ``name``, in any process."""
+    try:
+        with open(_version_path(name, path), encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def bump_collection_version(name: str = constants.CHROMA_COLLECTION, path: str = constants.CHROMA_PATH) -> int:
+    with _lock:
+        version = collection_version(name, path) + 1
+        os.makedirs(path, exist_ok=True)
+        tmp = _version_path(name, path) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(str(version))
+        os.replace(tmp, _version_path(name, path))
+        return version
@@ -0,0 +1,269 @@
+# whatsapp.py
+"""Streaming ingestion of WhatsApp chat exports (the finance-tips chat).
+
+The export is read one line at a time, so memory stays flat however many
+years of chat it spans. A line that starts with a timestamp header opens a
+new message; any other line continues the previous one. Both export styles
+are understood:
+
+    Android: 31/12/2023, 21:15 - Jane: text        12/31/23, 9:15 PM - Jane: text
+    iOS:     [31/12/2023, 21:15:42] Jane: text     [12/31/23, 9:15:42 PM] Jane: text
+
+Day/month order is sniffed from the first lines of the file unless
+``WHATSAPP_DATE_ORDER`` pins it. System notices, media placeholders and
+messages shorter than ``WHATSAPP_MIN_CHARS`` are dropped.
+
+A message's document id is the hash of its normalized text, so a tip that is
+forwarded again (by anyone, at any time) maps onto the document that is
+already stored and is not embedded twice; a window of recent hashes skips
+repeats within a run before they reach the store. Messages go through the
+regular chunk -> embed -> upsert path in ``INGEST_BATCH_SIZE`` batches, and
+after every batch the chat's cursor (timestamp of the newest ingested
+message) is saved, so a daily re-import of the full export skips straight
+to the new lines.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator
+
+from rag.bge_embedder import BGEEmbedder
+from rag.ingest import Chunk, CollectionWriter, IngestReport, SourceDocument, _upsert, chunk_document
+from rag.store import get_collection
+from util import constants
+from util.logger import get_logger
+
+logger = get_logger(__name__)
+
+SOURCE = "whatsapp"
+
+_DATE = r"\d{1,4}[/.\-]\d{1,2}[/.\-]\d{1,4}"
+_TIME = r"\d{1,2}[:.]\d{2}(?:[:.]\d{2})?(?:\s?[APap]\.?\s?[Mm]\.?)?"
+_ANDROID = re.compile(rf"^(?P<date>{_DATE}),?\s(?P<time>{_TIME})\s[-–]\s(?P<rest>.*)$")
+_IOS = re.compile(rf"^\[(?P<date>{_DATE}),?\s(?P<time>{_TIME})\]\s(?P<rest>.*)$")
+# Invisible marks and the narrow/non-breaking spaces newer exports put around times.
+_INVISIBLE = str.maketrans({"\u200e": None, "\u200f": None, "\ufeff": None, "\u202f": " ", "\xa0": " "})
+_CLOCK = re.compile(r"(\d{1,2})[:.](\d{2})(?:[:.](\d{2}))?\s?([ap])?")
+_NOISE = re.compile(
+    r"^(<media omitted>|<attached: [^>]*>|(image|video|audio|sticker|gif|document|contact card) omitted"
+    r"|this message was deleted|you deleted this message|missed (voice|video) call.*|null)$",
+    re.IGNORECASE,
+)
+EDITED_MARK = "<This message was edited>"
+MAX_MESSAGE_CHARS = 20000
+
+
+@dataclass
+class ChatMessage:
+    timestamp: datetime
+    sender: str
+    text: str
+
+    @property
+    def content_hash(self) -> str:
+        normalized = " ".join(self.text.split()).casefold()
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _match(line: str) -> re.Match | None:
+    return _IOS.match(line) if line.startswith("[") else _ANDROID.match(line)
+
+
+def detect_date_order(path: str, sample_lines: int = 5000) -> str:
+    """``dmy``, ``mdy`` or ``ymd``, judged from the first headers of the export."""
+    with open(path, encoding="utf-8-sig", errors="replace") as f:
+        for i, line in enumerate(f):
+            if i >= sample_lines:
+                break
+            match = _match(line.translate(_INVISIBLE))
+            if not match:
+                continue
+            first, second, _ = (int(part) for part in re.split(r"[/.\-]", match["date"]))
+            if first > 31:
+                return "ymd"
+            if first > 12:
+                return "dmy"
+            if second > 12:
+                return "mdy"
+    return "dmy"
+
+
+def parse_timestamp(date_text: str, time_text: str, order: str) -> datetime:
+    parts = [int(part) for part in re.split(r"[/.\-]", date_text)]
+    year, month, day = {
+        "dmy": (parts[2], parts[1], parts[0]),
+        "mdy": (parts[2], parts[0], parts[1]),
+        "ymd": (parts[0], parts[1], parts[2]),
+    }[order]
+    if year < 100:
+        year += 2000
+    clock = _CLOCK.match(time_text.lower())
+    if clock is None:
+        raise ValueError(f"unreadable time {time_text!r}")
+    hour, minute, second = int(clock[1]), int(clock[2]), int(clock[3] or 0)
+    meridiem = clock[4]
+    if meridiem == "p" and hour < 12:
+        hour += 12
+    elif meridiem == "a" and hour == 12:
+        hour = 0
+    return datetime(year, month, day, hour, minute, second)
+
+
+def read_messages(path: str, date_order: str = constants.WHATSAPP_DATE_ORDER) -> Iterator[ChatMessage]:
+    """Streams the messages of an export, joining continuation lines."""
+    order = detect_date_order(path) if date_order == "auto" else date_order
+    current: ChatMessage | None = None
+    with open(path, encoding="utf-8-sig", errors="replace") as f:
+        for raw in f:
+            line = raw.rstrip("\r\n").translate(_INVISIBLE)
+            match = _match(line)
+            if match is None:
+                if current is not None and len(current.text) < MAX_MESSAGE_CHARS:
+                    current.text += "\n" + line
+                continue
+            if current is not None:
+                yield _finish(current)
+                current = None
+            sender, separator, text = match["rest"].partition(": ")
+            if not separator:
+                # System notice (joined, changed the subject, ...), not a message.
+                continue
+            try:
+                timestamp = parse_timestamp(match["date"], match["time"], order)
+            except ValueError:
+                logger.debug(f"Skipping a line with an unreadable timestamp: {line[:80]}")
+                continue
+            current = ChatMessage(timestamp, sender.strip(), text)
+    if current is not None:
+        yield _finish(current)
+
+
+def _finish(message: ChatMessage) -> ChatMessage:
+    message.text = message.text.replace(EDITED_MARK, "").strip()
+    return message
+
+
+def is_noise(message: ChatMessage, min_chars: int = constants.WHATSAPP_MIN_CHARS) -> bool:
+    return len(message.text) < min_chars or _NOISE.match(message.text) is not None
+
+
+class ChatCursor:
+    """Timestamp of the newest ingested message, per chat, in a small JSON file."""
+
+    def __init__(self, path: str = constants.WHATSAPP_CURSOR_PATH) -> None:
+        self.path = path
+        self._cursors: dict[str, str] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._cursors = json.load(f)
+
+    def get(self, chat: str) -> datetime | None:
+        value = self._cursors.get(chat)
+        return datetime.fromisoformat(value) if value else None
+
+    def advance(self, chat: str, timestamp: datetime) -> None:
+        previous = self.get(chat)
+        if previous is not None and previous >= timestamp:
+            return
+        self._cursors[chat] = timestamp.isoformat()
+        if self.path:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._cursors, f, indent=2)
+            os.replace(tmp, self.path)
+
+
+def to_document(chat: str, message: ChatMessage) -> SourceDocument:
+    content_hash = message.content_hash
+    return SourceDocument(
+        id=f"{SOURCE}:{chat}:{content_hash[:24]}",
+        text=message.text,
+        metadata={
+            "source": SOURCE,
+            "chat": chat,
+            "sender": message.sender,
+            "timestamp": message.timestamp.isoformat(),
+            "date": int(message.timestamp.strftime("%Y%m%d")),
+        },
+    )
+
+
+async def ingest_chat(
+    path: str,
+    chat: str | None = None,
+    *,
+    date_order: str = constants.WHATSAPP_DATE_ORDER,
+    batch_size: int = constants.INGEST_BATCH_SIZE,
+    min_chars: int = constants.WHATSAPP_MIN_CHARS,
+    dedupe_window: int = constants.WHATSAPP_DEDUPE_WINDOW,
+    cursor: ChatCursor | None = None,
+    collection=None,
+) -> IngestReport:
+    chat = chat or os.path.splitext(os.path.basename(path))[0]
+    cursor = cursor or ChatCursor()
+    embedder = BGEEmbedder()
+    writer = CollectionWriter(collection if collection is not None else get_collection())
+    report = IngestReport()
+    since = cursor.get(chat)
+    if since is not None:
+        logger.info(f"Resuming {chat} from {since.isoformat()}")
+
+    recent: OrderedDict[str, None] = OrderedDict()
+    batch: list[tuple[SourceDocument, list[Chunk]]] = []
+    pending = 0
+    newest: datetime | None = None
+
+    async def flush() -> None:
+        nonlocal batch, pending
+        await _upsert(batch, embedder, writer, None, report)
+        # Messages sharing the cursor's minute are read again next time; their ids make that a no-op.
+        cursor.advance(chat, newest)
+        batch, pending = [], 0
+
+    for message in read_messages(path, date_order):
+        report.fetched += 1
+        if since is not None and message.timestamp < since:
+            report.skipped += 1
+            continue
+        if is_noise(message, min_chars):
+            report.skipped += 1
+            continue
+        content_hash = message.content_hash
+        if content_hash in recent:
+            recent.move_to_end(content_hash)
+            report.unchanged += 1
+            continue
+        recent[content_hash] = None
+        if len(recent) > dedupe_window:
+            recent.popitem(last=False)
+
+        doc = to_document(chat, message)
+        chunks = chunk_document(doc)
+        batch.append((doc, chunks))
+        pending += len(chunks)
+        newest = max(newest, message.timestamp) if newest else message.timestamp
+        if pending >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+
+    logger.info(
+        f"Chat {chat}: {report.fetched} messages read, {report.skipped} skipped (before cursor or noise), "
+        f"{report.added} added, {report.updated} updated, {report.unchanged} repeats, {report.chunks} chunks embedded"
+    )
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest a WhatsApp chat export into ChromaDB")
+    parser.add_argument("path", help="exported chat .txt")
+    parser.add_argument("--chat", help="chat name stored with every message; defaults to the file name")
+    parser.add_argument("--date-order", choices=["auto", "dmy", "mdy", "ymd"], default=constants.WHATSAPP_DATE_ORDER)
+    args = parser.parse_args()
+    asyncio.run(ingest_chat(args.path, args.chat, date_order=args.date_order))
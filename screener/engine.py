@@ -0,0 +1,126 @@
+# engine.py
+"""Vectorized filtering, sorting and top-N ranking over a ``Snapshot``.
+
+A query is a list of conditions that are ANDed together, an optional sort
+field and a row limit. Each condition becomes one boolean mask computed over
+a whole column; blanks (NaN / NaT) never match a comparison. Ranking uses
+``argpartition`` so that only the top ``limit`` rows are fully sorted.
+"""
+import operator
+from typing import Literal
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from util import constants
+from .snapshot import CATEGORY, COLUMNS, DATE, FLAG, NUMBER, Snapshot
+
+FieldName = Literal[tuple(COLUMNS)]
+
+_COMPARISONS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+class Condition(BaseModel):
+    field: FieldName
+    op: Literal["<", "<=", ">", ">=", "==", "!=", "in", "contains"] = "=="
+    value: float | bool | str | list[float | str] = Field(
+        ..., description="Number, true/false, date (YYYY-MM-DD) or text; a list for 'in'."
+    )
+
+
+class ScreenQuery(BaseModel):
+    filters: list[Condition] = Field(default_factory=list, description="Conditions that must all hold.")
+    sort_by: FieldName | None = Field(None, description="Field to rank the matches by.")
+    descending: bool = Field(True, description="Rank from the largest value down.")
+    limit: int = Field(10, ge=1, le=constants.SCREENER_MAX_ROWS, description="Number of rows to return.")
+    columns: list[FieldName] | None = Field(None, description="Fields to show; defaults to the ones the query uses.")
+
+
+def _kind(field: str) -> str:
+    return COLUMNS[field][1]
+
+
+def _scalar(field: str, value: float | bool | str):
+    kind = _kind(field)
+    if kind == NUMBER:
+        return float(value)
+    if kind == DATE:
+        return np.datetime64(str(value), "D")
+    if kind == FLAG:
+        # The value union coerces a JSON 1 or 0 to a float before it gets here.
+        if isinstance(value, (bool, int, float)):
+            return bool(value)
+        return str(value).strip().lower() in ("true", "yes", "1")
+    return str(value).strip().casefold()
+
+
+def condition_mask(snapshot: Snapshot, condition: Condition) -> np.ndarray:
+    field, op, kind = condition.field, condition.op, _kind(condition.field)
+    values = condition.value if isinstance(condition.value, list) else [condition.value]
+    if kind == CATEGORY:
+        # Compare integer codes: the value is looked up once in the category list.
+        labels = [label.casefold() for label in snapshot.categories[field]]
+        codes = [labels.index(_scalar(field, value)) for value in values if _scalar(field, value) in labels]
+        column = snapshot.columns[field]
+        if op in ("==", "in"):
+            return np.isin(column, codes)
+        if op == "!=":
+            return ~np.isin(column, codes)
+        raise ValueError(f"{field} only supports ==, != and in")
+
+    column = snapshot.columns[field]
+    if kind == "text":
+        column = np.char.lower(column)
+        if op == "contains":
+            return np.char.find(column, _scalar(field, values[0])) >= 0
+        if op in ("==", "in"):
+            return np.isin(column, [_scalar(field, value) for value in values])
+        if op == "!=":
+            return ~np.isin(column, [_scalar(field, value) for value in values])
+        raise ValueError(f"{field} only supports ==, !=, in and contains")
+
+    if op == "in":
+        return np.isin(column, [_scalar(field, value) for value in values])
+    if op == "contains":
+        raise ValueError(f"contains only applies to ticker and name, not {field}")
+    if kind == FLAG and op not in ("==", "!="):
+        raise ValueError(f"{field} only supports == and !=")
+    with np.errstate(invalid="ignore"):
+        return _COMPARISONS[op](column, _scalar(field, values[0]))
+
+
+def rank(snapshot: Snapshot, indices: np.ndarray, field: str, descending: bool, limit: int) -> np.ndarray:
+    """The ``limit`` best of ``indices`` by ``field``; blanks always rank last."""
+    kind = _kind(field)
+    if kind in (NUMBER, DATE, FLAG):
+        column = snapshot.columns[field][indices]
+        if kind == DATE:
+            keys = np.where(np.isnat(column), np.nan, column.astype(np.int64))
+        else:
+            keys = column.astype(np.float64)
+        keys = -keys if descending else keys
+        keys = np.where(np.isnan(keys), np.inf, keys)
+        if limit < len(keys):
+            top = np.argpartition(keys, limit - 1)[:limit]
+            return indices[top[np.argsort(keys[top], kind="stable")]]
+        return indices[np.argsort(keys, kind="stable")]
+    order = np.argsort(snapshot.values(field)[indices], kind="stable")
+    return indices[order[::-1] if descending else order][:limit]
+
+
+def screen(snapshot: Snapshot, query: ScreenQuery) -> tuple[np.ndarray, int]:
+    """Row indices of the top matches, and the total number of matches."""
+    mask = np.ones(len(snapshot), dtype=bool)
+    for condition in query.filters:
+        mask &= condition_mask(snapshot, condition)
+    indices = np.flatnonzero(mask)
+    if query.sort_by is None:
+        return indices[: query.limit], len(indices)
+    return rank(snapshot, indices, query.sort_by, query.descending, query.limit), len(indices)
@@ -0,0 +1,290 @@
+# history.py
+"""Date-partitioned history of screener snapshots.
+
+Each appended snapshot is kept twice under ``SCREENER_HISTORY_PATH``:
+
+- ``partitions/<YYYY-MM-DD>.npz``: the full snapshot, every column, compressed.
+- ``<field>.npy``: one ``float64`` matrix per numeric field with a row per
+  date and a column per ticker. The matrices are memory-mapped, so one
+  field across all dates (``column``) and one ticker's history
+  (``history``) are views into the mapped file and nothing is copied or
+  parsed.
+
+``tickers.json`` maps each ticker to its matrix column, ``dates.npy`` holds
+the row dates, ``versions.npy`` the store version that last wrote each row,
+and ``meta.json`` records how many rows are committed and a version that
+every append bumps. Committed rows are never written before ``meta.json``
+is: a new day goes into the first spare row, and a re-appended latest day is
+staged in that spare row (its partition next to the old one) and only copied
+over the committed row once ``meta.json`` records the staging. A crash
+mid-append therefore leaves the previous state readable, and a crash
+mid-copy is finished by the next append. Readers map the files read-only and
+call ``refresh`` to pick up new days. Matrices are allocated with spare rows
+and columns and doubled when full, so appending a day costs O(tickers).
+"""
+import json
+import logging
+import os
+import re
+import threading
+from datetime import date, datetime
+
+import numpy as np
+
+from util import constants
+from .snapshot import COLUMNS, NUMBER, Snapshot, load_snapshot
+
+# Stdlib logging: importing beeai's logger first would trip its circular import
+# when this module is the entry point (python -m ...).
+logger = logging.getLogger(__name__)
+
+NUMERIC_FIELDS = [field for field, (_, kind) in COLUMNS.items() if kind == NUMBER]
+_CATEGORY_PREFIX = "categories__"
+
+
+def save_partition(path: str, snapshot: Snapshot) -> None:
+    arrays = dict(snapshot.columns)
+    arrays.update({_CATEGORY_PREFIX + field: np.asarray(labels, dtype=str) for field, labels in snapshot.categories.items()})
+    tmp = path + ".tmp.npz"
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def load_partition(path: str) -> Snapshot:
+    with np.load(path) as data:
+        columns = {name: data[name] for name in data.files if not name.startswith(_CATEGORY_PREFIX)}
+        categories = {
+            name[len(_CATEGORY_PREFIX):]: data[name].tolist() for name in data.files if name.startswith(_CATEGORY_PREFIX)
+        }
+    return Snapshot(columns, categories, source=path)
+
+
+def snapshot_date(path: str) -> date:
+    """Date in the file name (YYYY-MM-DD or YYYYMMDD), else the file's modification date."""
+    match = re.search(r"(\d{4})-?(\d{2})-?(\d{2})", os.path.basename(path))
+    if match:
+        return date(*map(int, match.groups()))
+    return datetime.fromtimestamp(os.path.getmtime(path)).date()
+
+
+class HistoryStore:
+    def __init__(self, path: str = constants.SCREENER_HISTORY_PATH) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(path, "partitions"), exist_ok=True)
+        self.version = -1
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """Picks up appends made by other processes; returns whether anything changed."""
+        meta = self._read_json("meta", {"dates": 0, "version": 0})
+        self._staged: dict | None = meta.get("staged")
+        if meta["version"] == self.version:
+            return False
+        with self._lock:
+            self._tickers: list[str] = self._read_json("tickers", [])
+            self._index = {ticker: position for position, ticker in enumerate(self._tickers)}
+            self._rows = meta["dates"]
+            self.version = meta["version"]
+            self._dates = self._open("dates")
+            self._versions = self._open("versions")
+            self._matrices = {field: self._open(field) for field in NUMERIC_FIELDS}
+        return True
+
+    def _read_json(self, name: str, default):
+        try:
+            with open(os.path.join(self.path, f"{name}.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.npy")
+
+    def _open(self, name: str) -> np.memmap | None:
+        return np.load(self._file(name), mmap_mode="r") if os.path.exists(self._file(name)) else None
+
+    def _writable(self, name: str) -> np.memmap:
+        # Writes land in the shared mapping, so the read-only views see them too.
+        return np.load(self._file(name), mmap_mode="r+")
+
+    def _partition(self, day: date, staged: bool = False) -> str:
+        return os.path.join(self.path, "partitions", f"{day.isoformat()}{'.staged' if staged else ''}.npz")
+
+    def _grow(self, rows: int, cols: int) -> None:
+        """Makes room for ``rows`` dates and ``cols`` tickers, doubling capacity as needed."""
+        capacity_rows = len(self._dates) if self._dates is not None else 0
+        capacity_cols = self._matrices[NUMERIC_FIELDS[0]].shape[1] if self._dates is not None else 0
+        if rows <= capacity_rows and cols <= capacity_cols and self._versions is not None:
+            return
+        new_rows = capacity_rows if rows <= capacity_rows else max(rows, capacity_rows * 2, 256)
+        new_cols = capacity_cols if cols <= capacity_cols else max(cols, capacity_cols * 2, 64)
+        used = self._rows
+        dates = self._reallocate("dates", (new_rows,), "datetime64[D]", np.datetime64("NaT"))
+        if self._dates is not None:
+            dates[:used] = self._dates[:used]
+        self._dates = self._commit_file("dates", dates)
+        versions = self._reallocate("versions", (new_rows,), np.int64, 0)
+        if self._versions is not None:
+            versions[:used] = self._versions[:used]
+        self._versions = self._commit_file("versions", versions)
+        for field in NUMERIC_FIELDS:
+            matrix = self._reallocate(field, (new_rows, new_cols), np.float64, np.nan)
+            old = self._matrices[field]
+            if old is not None:
+                matrix[:used, : old.shape[1]] = old[:used]
+            self._matrices[field] = self._commit_file(field, matrix)
+        logger.debug(f"History matrices resized to {new_rows} dates x {new_cols} tickers")
+
+    def _reallocate(self, name: str, shape: tuple[int, ...], dtype, fill) -> np.memmap:
+        array = np.lib.format.open_memmap(self._file(name) + ".tmp", mode="w+", dtype=dtype, shape=shape)
+        array[...] = fill
+        return array
+
+    def _commit_file(self, name: str, array: np.memmap) -> np.memmap:
+        array.flush()
+        del array
+        os.replace(self._file(name) + ".tmp", self._file(name))
+        return np.load(self._file(name), mmap_mode="r")
+
+    def _write_meta(self) -> None:
+        meta = {"dates": self._rows, "version": self.version}
+        if self._staged is not None:
+            meta["staged"] = self._staged
+        for name, payload in (("tickers", self._tickers), ("meta", meta)):
+            tmp = os.path.join(self.path, f"{name}.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp, os.path.join(self.path, f"{name}.json"))
+
+    def append(self, day: date, snapshot: Snapshot) -> None:
+        """Adds ``snapshot`` as the row for ``day``.
+
+        Days must arrive in order; appending the latest day again replaces it.
+        """
+        self.refresh()
+        with self._lock:
+            if self._staged is not None:
+                self._apply_staged()
+            day64 = np.datetime64(day, "D")
+            latest = self._dates[self._rows - 1] if self._rows else None
+            if latest is not None and day64 < latest:
+                raise ValueError(f"History ends at {latest}; snapshots must be appended in date order, got {day}")
+            row = self._rows - 1 if latest is not None and day64 == latest else self._rows
+            # Written while uncommitted, so readers and a crash never see a half-written row.
+            spare = self._rows
+
+            tickers = snapshot.columns["ticker"].tolist()
+            for ticker in tickers:
+                if ticker not in self._index:
+                    self._index[ticker] = len(self._tickers)
+                    self._tickers.append(ticker)
+            self._grow(spare + 1, len(self._tickers))
+            positions = np.fromiter((self._index[ticker] for ticker in tickers), dtype=np.int64, count=len(tickers))
+
+            save_partition(self._partition(day, staged=row != spare), snapshot)
+            for field in NUMERIC_FIELDS:
+                matrix = self._writable(field)
+                matrix[spare] = np.nan
+                matrix[spare, positions] = snapshot.columns[field]
+                matrix.flush()
+            self.version += 1
+            for name, value in (("dates", day64), ("versions", self.version)):
+                array = self._writable(name)
+                array[spare] = value
+                array.flush()
+            self._rows = row + 1
+            if row != spare:
+                self._staged = {"row": spare, "into": row, "day": day.isoformat()}
+            self._write_meta()
+            if row != spare:
+                self._apply_staged()
+
+    def _apply_staged(self) -> None:
+        """Copies a committed re-append from its spare row over the row it replaces; safe to repeat."""
+        staged = self._staged
+        for name in ("dates", "versions", *NUMERIC_FIELDS):
+            array = self._writable(name)
+            array[staged["into"]] = array[staged["row"]]
+            array.flush()
+        day = date.fromisoformat(staged["day"])
+        if os.path.exists(self._partition(day, staged=True)):
+            os.replace(self._partition(day, staged=True), self._partition(day))
+        self._staged = None
+        self._write_meta()
+
+    def changed_since(self, version: int) -> int:
+        """Index of the first row written after store version ``version``, or ``len(dates)`` if none was.
+
+        Only the latest row is ever rewritten, so row versions never decrease down the history.
+        """
+        if self._versions is None:  # nothing appended yet, or written before rows were versioned
+            return self._rows
+        return int(np.searchsorted(self._versions[: self._rows], version, side="right"))
+
+    def ingest_csv(self, path: str, day: date | None = None) -> date:
+        day = day or snapshot_date(path)
+        self.append(day, load_snapshot(path))
+        return day
+
+    @property
+    def tickers(self) -> list[str]:
+        return self._tickers
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self._dates[: self._rows] if self._dates is not None else np.empty(0, dtype="datetime64[D]")
+
+    def position(self, ticker: str) -> int:
+        try:
+            return self._index[ticker.upper()]
+        except KeyError:
+            raise KeyError(f"{ticker} is not in the screener history") from None
+
+    def column(self, field: str) -> np.ndarray:
+        """``field`` for every stored date (rows) and ticker (columns), as a view."""
+        if field not in self._matrices:
+            raise KeyError(f"{field} is not a numeric screener field; choose from {', '.join(NUMERIC_FIELDS)}")
+        matrix = self._matrices[field]
+        if matrix is None:
+            return np.empty((0, 0))
+        return matrix[: self._rows, : len(self._tickers)]
+
+    def history(self, ticker: str, field: str = "price") -> np.ndarray:
+        """One ticker's ``field`` across all stored dates, as a strided view."""
+        return self.column(field)[:, self.position(ticker)]
+
+    def window(self, field: str, start: date | None = None, end: date | None = None) -> np.ndarray:
+        """Rows of ``field`` whose date lies in [start, end], as a view."""
+        dates = self.dates
+        lo = np.searchsorted(dates, np.datetime64(start, "D")) if start else 0
+        hi = np.searchsorted(dates, np.datetime64(end, "D"), side="right") if end else len(dates)
+        return self.column(field)[lo:hi]
+
+    def snapshot(self, day: date) -> Snapshot:
+        """The full snapshot stored for ``day``, read from its compressed partition."""
+        path = self._partition(day)
+        if not os.path.exists(path):
+            raise KeyError(f"No snapshot stored for {day}")
+        return load_partition(path)
+
+
+_store: HistoryStore | None = None
+
+
+def get_history_store() -> HistoryStore:
+    global _store
+    if _store is None:
+        _store = HistoryStore()
+    return _store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Append screener exports to the snapshot history")
+    parser.add_argument("files", nargs="+", help="export CSVs; the date comes from the file name or its mtime")
+    args = parser.parse_args()
+    store = get_history_store()
+    for file in sorted(args.files, key=snapshot_date):
+        print(f"{file}: stored as {store.ingest_csv(file)}")
@@ -0,0 +1,291 @@
+# indicators.py
+"""Technical indicators over the screener history, updated one day at a time.
+
+``IndicatorEngine`` keeps running state for every ticker (rolling sums,
+exponential averages, Wilder's average gain/loss, 52-week extremes) and
+folds each new history row into it with a handful of vectorized operations
+across all tickers, so a new day costs O(tickers) whatever the window
+lengths. Values leaving a window are read back from the memory-mapped
+history. The 52-week high/low is only rescanned for the tickers whose
+extreme just left the window.
+
+Indicators need a full window of observations (RSI: 14 price changes) and
+are NaN until then. The state is saved next to the history in
+``indicators.npz``.
+"""
+import logging
+import os
+import threading
+import warnings
+
+from typing import Literal
+
+import numpy as np
+from pydantic import BaseModel
+
+from .history import HistoryStore, get_history_store
+
+logger = logging.getLogger(__name__)
+
+SMA_WINDOWS = (20, 50)
+EMA_SPANS = (12, 26)
+RSI_PERIOD = 14
+VOLATILITY_WINDOW = 20
+RELATIVE_VOLUME_WINDOW = 20
+TRADING_DAYS = 252
+
+INDICATORS = (
+    *(f"sma_{window}" for window in SMA_WINDOWS),
+    *(f"ema_{span}" for span in EMA_SPANS),
+    f"rsi_{RSI_PERIOD}",
+    f"volatility_{VOLATILITY_WINDOW}",
+    "relative_volume_z",
+    "pct_from_52w_high",
+    "pct_from_52w_low",
+)
+
+IndicatorName = Literal[INDICATORS]
+
+_CHROMA_OPS = {"<": "$lt", "<=": "$lte", ">": "$gt", ">=": "$gte"}
+
+
+class IndicatorCondition(BaseModel):
+    field: IndicatorName
+    op: Literal["<", "<=", ">", ">="]
+    value: float
+
+    def mask(self, values: np.ndarray) -> np.ndarray:
+        with np.errstate(invalid="ignore"):
+            return {"<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal}[self.op](values, self.value)
+
+    def where(self) -> dict:
+        """The condition as a Chroma metadata clause."""
+        return {self.field: {_CHROMA_OPS[self.op]: self.value}}
+
+
+# Running sums: name -> (history field, window, transform of the raw rows).
+_ROLLING = {
+    **{f"price_{window}": ("price", window, "level") for window in SMA_WINDOWS},
+    "returns": ("price", VOLATILITY_WINDOW, "log_return"),
+    "relative_volume": ("relative_volume", RELATIVE_VOLUME_WINDOW, "level"),
+}
+
+
+def _fresh_state(tickers: int) -> dict[str, np.ndarray]:
+    nan = lambda: np.full(tickers, np.nan)
+    zero = lambda: np.zeros(tickers)
+    state = {"price": nan(), "observed": zero(), "avg_gain": zero(), "avg_loss": zero(), "changes": zero()}
+    state.update({"high": nan(), "low": nan(), "relative_volume_today": nan()})
+    state.update({f"ema_{span}": nan() for span in EMA_SPANS})
+    for name in _ROLLING:
+        state.update({f"{name}_sum": zero(), f"{name}_sumsq": zero(), f"{name}_count": zero()})
+    return state
+
+
+def _pad(state: dict[str, np.ndarray], tickers: int) -> dict[str, np.ndarray]:
+    """Extends the state with fresh entries for tickers added to the history since."""
+    known = len(state["price"])
+    if known >= tickers:
+        return state
+    fresh = _fresh_state(tickers - known)
+    return {name: np.concatenate([value, fresh[name]]) for name, value in state.items()}
+
+
+class IndicatorEngine:
+    def __init__(self, store: HistoryStore | None = None, state_path: str | None = None) -> None:
+        self.store = store or get_history_store()
+        self.state_path = state_path or os.path.join(self.store.path, "indicators.npz")
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.version = -1
+        self.state = _fresh_state(0)
+        self._previous: dict[str, np.ndarray] | None = None
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.state_path):
+            return
+        with np.load(self.state_path) as data:
+            self.rows = int(data["rows"])
+            self.version = int(data["version"])
+            self.state = {name: data[name] for name in data.files if name in _fresh_state(0)}
+            previous = {name[len("previous__"):]: data[name] for name in data.files if name.startswith("previous__")}
+            self._previous = previous or None
+
+    def _save(self) -> None:
+        arrays = dict(self.state, rows=self.rows, version=self.version)
+        if self._previous is not None:
+            arrays.update({f"previous__{name}": value for name, value in self._previous.items()})
+        tmp = self.state_path + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, self.state_path)
+
+    def update(self) -> int:
+        """Folds every history row not seen yet into the state; returns how many."""
+        with self._lock:
+            self.store.refresh()
+            rows = len(self.store.dates)
+            changed = self.store.changed_since(self.version)
+            if rows < self.rows or self.store.version < self.version:
+                logger.warning("Screener history shrank; recomputing indicators from scratch")
+                self.rows, self._previous, self.state = 0, None, _fresh_state(0)
+            elif changed == self.rows - 1 and self._previous is not None:
+                # The latest day folded in was re-appended with new figures (possibly with
+                # newer days after it): undo it and fold it in again.
+                self.state, self.rows = self._previous, changed
+            elif changed < self.rows:
+                logger.warning(f"Screener history row {changed} was rewritten; recomputing indicators from scratch")
+                self.rows, self._previous, self.state = 0, None, _fresh_state(0)
+            start = self.rows
+            tickers = len(self.store.tickers)
+            self.state = _pad(self.state, tickers)
+            for row in range(start, rows):
+                self._previous = {name: value.copy() for name, value in self.state.items()}
+                self._step(row)
+                self.rows = row + 1
+            self.version = self.store.version
+            if rows != start:
+                self._save()
+            return rows - start
+
+    def _step(self, t: int) -> None:
+        s = self.state
+        prices = self.store.column("price")
+        price = prices[t]
+        valid = ~np.isnan(price)
+        previous = s["price"]
+
+        s["observed"] += valid
+        for span in EMA_SPANS:
+            ema = s[f"ema_{span}"]
+            alpha = 2 / (span + 1)
+            s[f"ema_{span}"] = np.where(valid, np.where(np.isnan(ema), price, ema + alpha * (price - ema)), ema)
+
+        # Wilder smoothing; the first RSI_PERIOD changes are a plain average.
+        change = price - previous
+        moved = ~np.isnan(change)
+        s["changes"] += moved
+        n = np.minimum(s["changes"], RSI_PERIOD)
+        safe_n = np.maximum(n, 1)
+        gain, loss = np.clip(np.nan_to_num(change), 0, None), np.clip(-np.nan_to_num(change), 0, None)
+        s["avg_gain"] = np.where(moved, (s["avg_gain"] * (n - 1) + gain) / safe_n, s["avg_gain"])
+        s["avg_loss"] = np.where(moved, (s["avg_loss"] * (n - 1) + loss) / safe_n, s["avg_loss"])
+
+        for name, (field, window, transform) in _ROLLING.items():
+            self._roll(name, self.store.column(field), t, window, transform)
+        s["relative_volume_today"] = self.store.column("relative_volume")[t].copy()
+
+        self._extremes(prices, t, price)
+        s["price"] = np.where(valid, price, previous)
+
+    def _values(self, matrix: np.ndarray, t: int, transform: str) -> np.ndarray:
+        if transform == "log_return":
+            if t < 1:
+                return np.full(matrix.shape[1], np.nan)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return np.log(matrix[t] / matrix[t - 1])
+        return matrix[t]
+
+    def _roll(self, name: str, matrix: np.ndarray, t: int, window: int, transform: str) -> None:
+        s = self.state
+        entering = self._values(matrix, t, transform)
+        mask = np.isfinite(entering)
+        value = np.where(mask, entering, 0.0)
+        s[f"{name}_sum"] += value
+        s[f"{name}_sumsq"] += value * value
+        s[f"{name}_count"] += mask
+        if t >= window:
+            leaving = self._values(matrix, t - window, transform)
+            mask = np.isfinite(leaving)
+            value = np.where(mask, leaving, 0.0)
+            s[f"{name}_sum"] -= value
+            s[f"{name}_sumsq"] -= value * value
+            s[f"{name}_count"] -= mask
+
+    def _extremes(self, prices: np.ndarray, t: int, price: np.ndarray) -> None:
+        s = self.state
+        high, low = np.fmax(s["high"], price), np.fmin(s["low"], price)
+        if t >= TRADING_DAYS:
+            leaving = prices[t - TRADING_DAYS]
+            stale = np.flatnonzero((leaving == s["high"]) | (leaving == s["low"]))
+            if len(stale):
+                window = prices[t - TRADING_DAYS + 1 : t + 1, stale]
+                with warnings.catch_warnings():
+                    # Tickers without any price in the window stay NaN.
+                    warnings.simplefilter("ignore", RuntimeWarning)
+                    high[stale] = np.nanmax(window, axis=0)
+                    low[stale] = np.nanmin(window, axis=0)
+        s["high"], s["low"] = high, low
+
+    def latest(self) -> dict[str, np.ndarray]:
+        """Current value of every indicator, one entry per ticker in ``store.tickers``."""
+        s = self.state
+        out: dict[str, np.ndarray] = {"price": s["price"]}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for window in SMA_WINDOWS:
+                count = s[f"price_{window}_count"]
+                out[f"sma_{window}"] = np.where(count >= window, s[f"price_{window}_sum"] / count, np.nan)
+            for span in EMA_SPANS:
+                out[f"ema_{span}"] = np.where(s["observed"] >= span, s[f"ema_{span}"], np.nan)
+            rs = s["avg_gain"] / s["avg_loss"]
+            rsi = np.where(s["avg_loss"] == 0, 100.0, 100 - 100 / (1 + rs))
+            out[f"rsi_{RSI_PERIOD}"] = np.where(s["changes"] >= RSI_PERIOD, rsi, np.nan)
+            returns_std = _std("returns", s)
+            out[f"volatility_{VOLATILITY_WINDOW}"] = np.where(
+                s["returns_count"] >= VOLATILITY_WINDOW, returns_std * np.sqrt(TRADING_DAYS) * 100, np.nan
+            )
+            count = s["relative_volume_count"]
+            mean = s["relative_volume_sum"] / count
+            out["relative_volume_z"] = np.where(
+                count >= RELATIVE_VOLUME_WINDOW, (s["relative_volume_today"] - mean) / _std("relative_volume", s), np.nan
+            )
+            out["pct_from_52w_high"] = (s["price"] / s["high"] - 1) * 100
+            out["pct_from_52w_low"] = (s["price"] / s["low"] - 1) * 100
+        return out
+
+    def for_ticker(self, ticker: str) -> dict[str, float]:
+        position = self.store.position(ticker)
+        return {name: float(values[position]) for name, values in self.latest().items()}
+
+
+def _std(name: str, state: dict[str, np.ndarray]) -> np.ndarray:
+    count = state[f"{name}_count"]
+    variance = (state[f"{name}_sumsq"] - state[f"{name}_sum"] ** 2 / count) / (count - 1)
+    return np.sqrt(np.clip(variance, 0, None))
+
+
+def indicator_metadata(
+    ticker: str, engine: "IndicatorEngine | None" = None, latest: dict[str, np.ndarray] | None = None
+) -> dict[str, float]:
+    """Indicators of ``ticker`` as flat Chroma metadata; blanks are left out.
+
+    Pass ``engine.latest()`` as ``latest`` when stamping many tickers, so it is computed once.
+    """
+    engine = engine or get_indicator_engine()
+    try:
+        position = engine.store.position(ticker)
+    except KeyError:
+        return {}
+    latest = latest if latest is not None else engine.latest()
+    metadata = {
+        name: round(float(values[position]), 4)
+        for name, values in latest.items()
+        if name in INDICATORS and np.isfinite(values[position])
+    }
+    if metadata:
+        metadata["indicators_date"] = int(str(engine.store.dates[engine.rows - 1]).replace("-", ""))
+    return metadata
+
+
+_engine: IndicatorEngine | None = None
+_engine_lock = threading.Lock()
+
+
+def get_indicator_engine() -> IndicatorEngine:
+    """The process-wide engine, brought up to date with the history on every call."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = IndicatorEngine()
+    _engine.update()
+    return _engine
@@ -0,0 +1,130 @@
+# screener_tool.py
+import asyncio
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from beeai_framework.emitter import Emitter
+from beeai_framework.tools import StringToolOutput, Tool
+from util import constants
+
+from .engine import ScreenQuery, screen
+from .indicators import INDICATORS, IndicatorCondition, IndicatorEngine, IndicatorName, get_indicator_engine
+from .snapshot import Snapshot, get_snapshot
+
+_DEFAULT_COLUMNS = ["ticker", "name", "sector", "price"]
+
+
+def _cell(value) -> str:
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return "-"
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return str(value)
+
+
+class ScreenerTool(Tool):
+    name = "stock_screener"
+    description = (
+        "Filters, sorts and ranks the local market snapshot (US large caps: price, market cap, sector, country, "
+        "1-day and 1-year change, relative volume, P/E, dividends, revenue, EPS). Use it before searching the web "
+        "for figures of listed stocks, e.g. technology names with pe < 40 and relative_volume > 1.2."
+    )
+    input_schema = ScreenQuery
+
+    def __init__(self, snapshot: Snapshot | None = None):
+        super().__init__()
+        self._snapshot = snapshot
+
+    @property
+    def snapshot(self) -> Snapshot:
+        return self._snapshot or get_snapshot()
+
+    async def _run(self, input: ScreenQuery, options, context) -> StringToolOutput:
+        snapshot = self.snapshot
+        indices, matches = screen(snapshot, input)
+        return StringToolOutput(self.format_rows(snapshot, indices, matches, input))
+
+    def format_rows(self, snapshot: Snapshot, indices, matches: int, query: ScreenQuery) -> str:
+        columns = query.columns or list(
+            dict.fromkeys(_DEFAULT_COLUMNS + [c.field for c in query.filters] + ([query.sort_by] if query.sort_by else []))
+        )
+        lines = [f"{matches} of {len(snapshot)} stocks match; showing {len(indices)}.", " | ".join(columns)]
+        for index in indices:
+            row = snapshot.row(int(index), columns)
+            lines.append(" | ".join(_cell(row[column]) for column in columns))
+        return "\n".join(lines)
+
+    def _create_emitter(self) -> Emitter:
+        return Emitter.root().child(
+            namespace=["tool", "stock_screener"],
+            creator=self,
+        )
+
+
+class IndicatorQuery(BaseModel):
+    tickers: list[str] | None = Field(None, description="Only these ticker symbols; all stored tickers when omitted.")
+    filters: list[IndicatorCondition] = Field(default_factory=list, description="Conditions that must all hold.")
+    sort_by: IndicatorName | None = Field(None, description="Indicator to rank the matches by.")
+    descending: bool = Field(True, description="Rank from the largest value down.")
+    limit: int = Field(10, ge=1, le=constants.SCREENER_MAX_ROWS, description="Number of rows to return.")
+
+
+class TechnicalIndicatorTool(Tool):
+    name = "technical_indicators"
+    description = (
+        "Momentum and volatility signals from the stored daily price history: SMA 20/50, EMA 12/26, RSI 14, "
+        "annualized 20-day volatility (%), relative-volume z-score and % distance from the 52-week high/low. "
+        "Look up given tickers or screen all of them, e.g. rsi_14 < 30 sorted by pct_from_52w_high."
+    )
+    input_schema = IndicatorQuery
+
+    def __init__(self, engine: IndicatorEngine | None = None):
+        super().__init__()
+        self._engine = engine
+
+    async def _run(self, input: IndicatorQuery, options, context) -> StringToolOutput:
+        engine = await asyncio.to_thread(self._current_engine)
+        tickers = engine.store.tickers
+        if not engine.rows:
+            return StringToolOutput("No price history is stored yet, so no indicators are available.")
+        values = engine.latest()
+
+        unknown = []
+        if input.tickers:
+            index = {ticker: position for position, ticker in enumerate(tickers)}
+            unknown = [ticker for ticker in input.tickers if ticker.upper() not in index]
+            candidates = np.array([index[t.upper()] for t in input.tickers if t.upper() in index], dtype=np.int64)
+        else:
+            candidates = np.arange(len(tickers))
+        mask = np.ones(len(candidates), dtype=bool)
+        for condition in input.filters:
+            mask &= condition.mask(values[condition.field][candidates])
+        matches = candidates[mask]
+        if input.sort_by is not None:
+            keys = values[input.sort_by][matches]
+            keys = np.where(np.isnan(keys), np.inf, -keys if input.descending else keys)
+            matches = matches[np.argsort(keys, kind="stable")]
+        shown = matches[: input.limit]
+
+        as_of = engine.store.dates[engine.rows - 1]
+        columns = ["ticker", "price", *INDICATORS]
+        lines = [f"Indicators as of {as_of}; {len(matches)} tickers match, showing {len(shown)}.", " | ".join(columns)]
+        for position in shown:
+            cells = [tickers[position]] + [_cell(float(values[name][position])) for name in columns[1:]]
+            lines.append(" | ".join(cells))
+        if unknown:
+            lines.append(f"No history for: {', '.join(unknown)}")
+        return StringToolOutput("\n".join(lines))
+
+    def _current_engine(self) -> IndicatorEngine:
+        if self._engine is None:
+            return get_indicator_engine()
+        self._engine.update()
+        return self._engine
+
+    def _create_emitter(self) -> Emitter:
+        return Emitter.root().child(
+            namespace=["tool", "technical_indicators"],
+            creator=self,
+        )
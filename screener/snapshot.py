@@ -0,0 +1,117 @@
+# snapshot.py
+"""Columnar, typed view of a screener export (``export.csv``).
+
+Every CSV column becomes one NumPy array, so filters and rankings run as
+vectorized operations over whole columns. Numeric columns are ``float64``
+with NaN for blanks, flags are ``bool``, dates are ``datetime64[D]`` with NaT
+for blanks, and low-cardinality text (sector, country) is stored as integer
+codes into a sorted list of categories.
+"""
+import csv
+import os
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from util import constants
+
+NUMBER, FLAG, DATE, CATEGORY, TEXT = "number", "flag", "date", "category", "text"
+
+# field -> (CSV header, kind). The export's last three headers contain double spaces.
+COLUMNS: dict[str, tuple[str, str]] = {
+    "ticker": ("Ticker", TEXT),
+    "name": ("Name", TEXT),
+    "market_cap": ("Market Cap ($)", NUMBER),
+    "sector": ("Sector", CATEGORY),
+    "country": ("Country", CATEGORY),
+    "price": ("Price ($)", NUMBER),
+    "change_1d_pct": ("Price 1-Day Change (%)", NUMBER),
+    "relative_volume": ("30-Day Relative Volume", NUMBER),
+    "change_1y_pct": ("Price 1-Year Change (%)", NUMBER),
+    "sp500": ("S&P 500", FLAG),
+    "nasdaq": ("Nasdaq", FLAG),
+    "pe": ("P/E", NUMBER),
+    "next_report_date": ("Next Report Date", DATE),
+    "next_dividend_date": ("Next Dividend Date", DATE),
+    "dividend_yield_pct": ("Ttm Dividend Yield (%)", NUMBER),
+    "dividend_per_share": ("Annual Dividend Per Share  ($)", NUMBER),
+    "revenue": ("Annual Revenue  ($)", NUMBER),
+    "eps": ("Annual Eps Diluted  ($)", NUMBER),
+}
+
+
+def _number(value: str) -> float:
+    try:
+        return float(value.replace(",", "")) if value.strip() else np.nan
+    except ValueError:
+        return np.nan
+
+
+def _column(values: list[str], kind: str) -> tuple[np.ndarray, list[str] | None]:
+    if kind == NUMBER:
+        return np.array([_number(value) for value in values], dtype=np.float64), None
+    if kind == FLAG:
+        return np.array([value.strip().lower() in ("true", "yes", "1") for value in values], dtype=bool), None
+    if kind == DATE:
+        return np.array([value.strip() or "NaT" for value in values], dtype="datetime64[D]"), None
+    if kind == CATEGORY:
+        categories, codes = np.unique(np.array([value.strip() for value in values], dtype=str), return_inverse=True)
+        return codes.astype(np.int16), categories.tolist()
+    return np.array([value.strip() for value in values], dtype=str), None
+
+
+@dataclass
+class Snapshot:
+    columns: dict[str, np.ndarray]
+    categories: dict[str, list[str]]
+    source: str = ""
+    mtime: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.columns["ticker"])
+
+    def values(self, field: str) -> np.ndarray:
+        """Column ``field`` with categories decoded back to strings."""
+        column = self.columns[field]
+        if field in self.categories:
+            return np.asarray(self.categories[field], dtype=str)[column]
+        return column
+
+    def row(self, index: int, fields: list[str] | None = None) -> dict:
+        row = {}
+        for field in fields or COLUMNS:
+            value = self.values(field)[index]
+            if isinstance(value, np.datetime64):
+                value = None if np.isnat(value) else str(value)
+            elif isinstance(value, np.floating):
+                value = None if np.isnan(value) else float(value)
+            else:
+                value = value.item()
+            row[field] = value
+        return row
+
+
+def load_snapshot(path: str = constants.SCREENER_SNAPSHOT_PATH) -> Snapshot:
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [row for row in csv.DictReader(f) if (row.get("Ticker") or "").strip()]
+    columns, categories = {}, {}
+    for field, (header, kind) in COLUMNS.items():
+        column, labels = _column([row.get(header) or "" for row in rows], kind)
+        columns[field] = column
+        if labels is not None:
+            categories[field] = labels
+    return Snapshot(columns, categories, source=path, mtime=os.path.getmtime(path))
+
+
+_snapshot: Snapshot | None = None
+_lock = threading.Lock()
+
+
+def get_snapshot(path: str = constants.SCREENER_SNAPSHOT_PATH) -> Snapshot:
+    """The process-wide snapshot, reloaded when the export file changes."""
+    global _snapshot
+    with _lock:
+        if _snapshot is None or _snapshot.source != path or os.path.getmtime(path) != _snapshot.mtime:
+            _snapshot = load_snapshot(path)
+        return _snapshot
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tools.batch_crawler import BatchCrawler, PolitenessScheduler, RobotsCache
+from tools.http_fetcher import HttpFetcher
+from util import constants
+
+ROBOTS = f"""User-agent: {constants.CRAWLER_USER_AGENT_TOKEN}
+Disallow: /private
+Crawl-delay: 1
+
+User-agent: *
+Disallow: /
+"""
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    requests: list[tuple[str, str, float]] = []
+    robots_status = 200
+    robots_delay_s = 0.0
+
+    def do_GET(self) -> None:
+        self.requests.append((self.path, self.headers.get("User-Agent", ""), time.monotonic()))
+        if self.path == "/robots.txt":
+            time.sleep(self.robots_delay_s)
+            self._send(self.robots_status, ROBOTS if self.robots_status == 200 else "unavailable", "text/plain")
+        elif self.path == "/old":
+            self.send_response(302)
+            self.send_header("Location", "/page")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.path in ("/page", "/private"):
+            self._send(200, "<html><body><p>Quarterly revenue grew.</p></body></html>", "text/html")
+        else:
+            self._send(404, "not found", "text/plain")
+
+    def _send(self, status: int, body: str, content_type: str) -> None:
+        payload = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def site():
+    SiteHandler.requests = []
+    SiteHandler.robots_status, SiteHandler.robots_delay_s = 200, 0.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_crawl_honors_robots_and_reports_each_url(site):
+    urls = [f"{site}/old", f"{site}/missing", f"{site}/private", "http://127.0.0.1:port/"]
+
+    async def crawl() -> dict:
+        fetcher = HttpFetcher(user_agent=constants.CRAWLER_USER_AGENT_TOKEN)
+        crawler = BatchCrawler(fetcher, PolitenessScheduler(domain_interval_s=0), max_retries=0)
+        try:
+            return {result.url: result async for result in crawler.crawl(urls)}
+        finally:
+            await fetcher.close()
+
+    results = asyncio.run(crawl())
+
+    assert results[f"{site}/old"].status == 200
+    assert "Quarterly revenue grew." in results[f"{site}/old"].html
+    assert results[f"{site}/missing"].error == "HTTP 404"
+    assert results[f"{site}/private"].error == "disallowed by robots.txt"
+    # The malformed URL fails alone; the rest of the batch still came back.
+    assert results["http://127.0.0.1:port/"].error.startswith("InvalidURL")
+
+    paths = [path for path, _, _ in SiteHandler.requests]
+    assert "/private" not in paths and paths.count("/robots.txt") == 1
+    assert {agent for _, agent, _ in SiteHandler.requests} == {constants.CRAWLER_USER_AGENT_TOKEN}
+    starts = sorted(at for path, _, at in SiteHandler.requests if path in ("/old", "/missing"))
+    assert starts[1] - starts[0] >= 0.9
+
+
+def test_cancelling_one_url_does_not_cancel_the_robots_load_others_wait_on(site):
+    SiteHandler.robots_delay_s = 0.3
+
+    async def scenario() -> tuple:
+        fetcher = HttpFetcher(user_agent=constants.CRAWLER_USER_AGENT_TOKEN)
+        crawler = BatchCrawler(fetcher, PolitenessScheduler(domain_interval_s=0), max_retries=0)
+        try:
+            first = asyncio.create_task(crawler.fetch(f"{site}/page"))
+            second = asyncio.create_task(crawler.fetch(f"{site}/missing"))
+            await asyncio.sleep(0.1)  # both are waiting on the one robots.txt request
+            first.cancel()
+            return first, await second
+        finally:
+            await fetcher.close()
+
+    first, second = asyncio.run(scenario())
+    assert first.cancelled()
+    assert second.error == "HTTP 404"
+
+
+@pytest.mark.parametrize("status", [500, 503, 429])
+def test_robots_server_error_disallows_until_the_short_ttl_expires(site, status):
+    SiteHandler.robots_status = status
+
+    async def scenario() -> list[bool]:
+        fetcher = HttpFetcher(user_agent=constants.CRAWLER_USER_AGENT_TOKEN)
+        robots = RobotsCache(fetcher, failure_ttl_s=0.2)
+        try:
+            allowed = [(await robots.allowed(f"{site}/page"))[0]]
+            SiteHandler.robots_status = 200
+            allowed.append((await robots.allowed(f"{site}/page"))[0])
+            await asyncio.sleep(0.25)
+            allowed.append((await robots.allowed(f"{site}/page"))[0])
+            return allowed
+        finally:
+            await fetcher.close()
+
+    assert asyncio.run(scenario()) == [False, False, True]
+
+
+def test_robots_network_error_disallows():
+    async def scenario() -> bool:
+        fetcher = HttpFetcher(user_agent=constants.CRAWLER_USER_AGENT_TOKEN, timeout_s=1)
+        try:
+            # Nothing listens on port 9 (discard) here, so the connection is refused.
+            return (await RobotsCache(fetcher).allowed("http://127.0.0.1:9/page"))[0]
+        finally:
+            await fetcher.close()
+
+    assert asyncio.run(scenario()) is False
@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+import beeai_framework.backend  # noqa: F401  (loads beeai in an order that avoids its circular import)
+from beeai_framework.context import RunContext
+from beeai_framework.emitter import Emitter
+
+import tools.browser_pool as browser_pool
+from tools.browser_pool import BrowserPool, lease_key, release_on_finish
+
+
+class FakeDriver:
+    current_url = "about:blank"
+
+    def quit(self) -> None:
+        pass
+
+
+class FakeAgent:
+    def __init__(self) -> None:
+        self.emitter = Emitter.root().child(namespace=["agent", "fake"], creator=self)
+
+
+def test_waiting_acquire_reclaims_a_stale_lease():
+    async def scenario() -> float:
+        pool = BrowserPool(max_sessions=1, idle_timeout_s=0.2, driver_factory=FakeDriver)
+        first = await pool.acquire("run-a")
+        start = time.monotonic()
+        # run-a never releases; run-b must not wait forever for a notify that never comes.
+        second = await asyncio.wait_for(pool.acquire("run-b"), 2)
+        assert second is first
+        return time.monotonic() - start
+
+    assert asyncio.run(scenario()) < 1
+
+
+def test_agent_run_releases_its_lease_when_it_ends(monkeypatch):
+    pool = BrowserPool(max_sessions=1, driver_factory=FakeDriver)
+    monkeypatch.setattr(browser_pool, "_pool", pool)
+
+    async def uses_browser(context: RunContext) -> None:
+        await pool.acquire(lease_key(context))
+        assert pool.stats()["leased"] == 1
+        raise ValueError("tool failed")
+
+    async def scenario() -> None:
+        try:
+            await RunContext.enter(FakeAgent(), uses_browser).middleware(release_on_finish)
+        except Exception:
+            pass
+
+    asyncio.run(scenario())
+    assert pool.stats() == {"idle": 1, "leased": 0, "created": 1, "recycled": 0}
@@ -0,0 +1,45 @@
+import asyncio
+
+import beeai_framework.backend  # noqa: F401  (loads beeai in an order that avoids its circular import)
+
+from rag.bm25 import matches_where
+from rag.chroma_tool import ChromaRetrieverTool, RAGQuery
+from rag.entity_tagger import EntityTagger
+
+CHUNKS = [
+    ("AMD", "Advanced Micro Devices guides data center GPU sales higher.", {"t_AMD": True}),
+    ("MU", "Micron sees HBM memory sold out through next year.", {}),
+    ("INTC", "Intel foundry losses widen as it compares nodes.", {"t_INTC": True}),
+    ("AAPL", "Apple services revenue hits a record.", {"t_AAPL": True}),
+]
+
+
+class FakeBatcher:
+    """Returns the stored chunks in fixed relevance order, honoring ``where``."""
+
+    async def query(self, query: str, where: dict | None = None, n_results: int = 10):
+        rows = [
+            (text, {"doc_id": doc_id, "chunk": 0, **tags})
+            for doc_id, text, tags in CHUNKS
+            if matches_where({"doc_id": doc_id, **tags}, where)
+        ][:n_results]
+        return [text for text, _ in rows], [metadata for _, metadata in rows]
+
+
+def retrieve(query: str) -> list[str]:
+    tagger = EntityTagger(["INTC", "AAPL", "MU"], {"Intel": ["INTC"], "Apple": ["AAPL"]})
+    tool = ChromaRetrieverTool(batcher=FakeBatcher(), tagger=tagger)
+    output = asyncio.run(tool._run(RAGQuery(query=query, n_results=4), None, None))
+    return [section.split("\n", 1)[0].strip("[]") for section in output.get_text_content().split("\n---\n")]
+
+
+def test_tagged_companies_rank_first_without_hiding_the_rest():
+    # Only "intel" resolves to a ticker here; AMD must still come back.
+    ranked = retrieve("compare amd and intel")
+    assert ranked[0] == "INTC"
+    assert set(ranked) == {"AMD", "MU", "INTC", "AAPL"}
+
+
+def test_misread_word_does_not_filter_results():
+    ranked = retrieve("apple pie recipe with memory tips")
+    assert ranked[0] == "AAPL" and "MU" in ranked
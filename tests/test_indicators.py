@@ -0,0 +1,38 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from screener.history import NUMERIC_FIELDS, HistoryStore
+from screener.indicators import IndicatorEngine
+from screener.snapshot import Snapshot
+
+TICKERS = np.array(["NVDA", "PLTR", "ARM"])
+
+
+def make_snapshot(prices: np.ndarray, relative_volume: np.ndarray) -> Snapshot:
+    columns = {field: np.full(len(TICKERS), np.nan) for field in NUMERIC_FIELDS}
+    columns.update(ticker=TICKERS, price=prices, relative_volume=relative_volume)
+    return Snapshot(columns, categories={})
+
+
+def test_reappended_day_followed_by_a_new_day_matches_a_full_recompute(tmp_path):
+    rng = np.random.default_rng(0)
+    store = HistoryStore(str(tmp_path / "history"))
+    engine = IndicatorEngine(store, state_path=str(tmp_path / "incremental.npz"))
+    prices = np.array([900.0, 25.0, 120.0])
+    days = [date(2024, 1, 1) + timedelta(days=i) for i in range(30)]
+    for day in days:
+        prices = prices * np.exp(rng.normal(0, 0.02, len(TICKERS)))
+        store.append(day, make_snapshot(prices, rng.uniform(0.5, 2, len(TICKERS))))
+    engine.update()
+
+    # The last day is corrected and the next one lands before the engine catches up.
+    store.append(days[-1], make_snapshot(prices * 1.1, rng.uniform(0.5, 2, len(TICKERS))))
+    store.append(days[-1] + timedelta(days=1), make_snapshot(prices * 1.05, rng.uniform(0.5, 2, len(TICKERS))))
+    assert engine.update() == 2
+
+    incremental = engine.latest()
+    recomputed = IndicatorEngine(store, state_path=str(tmp_path / "full.npz"))
+    recomputed.update()
+    for name, values in recomputed.latest().items():
+        np.testing.assert_allclose(incremental[name], values, err_msg=name)
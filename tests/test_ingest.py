@@ -0,0 +1,162 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import rag.ingest as ingest
+from rag.bm25 import BM25Index, BM25Store, matches_where
+from util import constants
+
+
+class MemoryCollection:
+    """The slice of the Chroma collection API that ingest uses, kept in a dict."""
+
+    def __init__(self, name: str = "test_docs") -> None:
+        self.name = name
+        self.rows: dict[str, tuple[str, dict]] = {}
+
+    def count(self) -> int:
+        return len(self.rows)
+
+    def upsert(self, ids, documents, embeddings, metadatas) -> None:
+        for chunk_id, document, metadata in zip(ids, documents, metadatas):
+            self.rows[chunk_id] = (document, metadata)
+
+    def update(self, ids, metadatas) -> None:
+        for chunk_id, metadata in zip(ids, metadatas):
+            self.rows[chunk_id] = (self.rows[chunk_id][0], metadata)
+
+    def delete(self, ids) -> None:
+        for chunk_id in ids:
+            self.rows.pop(chunk_id, None)
+
+    def get(self, ids=None, where=None, include=(), limit=None, offset=0) -> dict:
+        selected = [
+            chunk_id
+            for chunk_id, (_, metadata) in sorted(self.rows.items())
+            if (ids is None or chunk_id in ids) and matches_where(metadata, where)
+        ]
+        selected = selected[offset : offset + limit if limit else None]
+        return {
+            "ids": selected,
+            "documents": [self.rows[chunk_id][0] for chunk_id in selected],
+            "metadatas": [self.rows[chunk_id][1] for chunk_id in selected],
+        }
+
+
+class FakeEmbedder:
+    def __init__(self) -> None:
+        self.embedded: list[str] = []
+
+    async def create(self, values: list[str]):
+        self.embedded.extend(values)
+        return SimpleNamespace(embeddings=[[float(len(value))] for value in values])
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "get_bm25_store", lambda name: BM25Store(str(tmp_path / "bm25.sqlite3"), name))
+    monkeypatch.setattr(ingest, "bump_collection_version", lambda name: 0)
+    monkeypatch.setattr(constants, "SCREENER_HISTORY_PATH", str(tmp_path / "history"))
+    return tmp_path
+
+
+def run_ingest(symbols, fetch, collection, embedder, tmp_path):
+    return asyncio.run(
+        ingest.ingest_stocks(
+            symbols,
+            concurrency=2,
+            batch_size=2,
+            checkpoint_path=str(tmp_path / "checkpoint.txt"),
+            collection=collection,
+            fetch=fetch,
+            embedder=embedder,
+        )
+    )
+
+
+def test_pipeline_embeds_new_and_changed_documents_only(store):
+    profiles = {"NVDA": "NVIDIA Corporation designs GPUs.", "MSFT": "Microsoft builds software.", "AAPL": None}
+
+    async def fetch(symbol: str) -> str | None:
+        return profiles[symbol]
+
+    collection, embedder = MemoryCollection(), FakeEmbedder()
+    report = run_ingest(list(profiles), fetch, collection, embedder, store)
+    assert (report.fetched, report.failed, report.added) == (2, 1, 2)
+    assert report.failed_ids == ["AAPL"]
+    assert {metadata["doc_id"] for _, metadata in collection.rows.values()} == {"NVDA", "MSFT"}
+    assert collection.rows["NVDA#0"][1]["t_NVDA"] is True
+
+    profiles["MSFT"] = "Microsoft builds software and cloud services."
+    embedder = FakeEmbedder()
+    report = run_ingest(["NVDA", "MSFT"], fetch, collection, embedder, store)
+    assert (report.added, report.updated, report.unchanged) == (0, 1, 1)
+    assert embedder.embedded == [profiles["MSFT"]]
+
+
+def test_pipeline_prunes_documents_that_left_the_universe(store):
+    # Long enough to be split into several chunks; it still counts as one deleted document.
+    profiles = {"NVDA": "NVDA company profile", "MSFT": " ".join(["Microsoft builds software."] * 400)}
+
+    async def fetch(symbol: str) -> str:
+        return profiles[symbol]
+
+    collection = MemoryCollection()
+    run_ingest(["NVDA", "MSFT"], fetch, collection, FakeEmbedder(), store)
+    assert len([chunk_id for chunk_id in collection.rows if chunk_id.startswith("MSFT#")]) > 1
+    report = run_ingest(["NVDA"], fetch, collection, FakeEmbedder(), store)
+    assert report.deleted == 1
+    assert {metadata["doc_id"] for _, metadata in collection.rows.values()} == {"NVDA"}
+
+
+def test_lexical_index_follows_ingest_incrementally(store):
+    profiles = {"NVDA": "NVIDIA designs GPUs.", "MSFT": "Microsoft builds software."}
+
+    async def fetch(symbol: str) -> str:
+        return profiles[symbol]
+
+    collection = MemoryCollection()
+    lexical = BM25Store(str(store / "bm25.sqlite3"), collection.name)
+    index = BM25Index()
+    run_ingest(["NVDA", "MSFT"], fetch, collection, FakeEmbedder(), store)
+    assert index.sync(lexical) == 2
+    assert [chunk_id for chunk_id, _ in index.search("gpus")] == ["NVDA#0"]
+
+    profiles["NVDA"] = "NVIDIA designs accelerators."
+    run_ingest(["NVDA"], fetch, collection, FakeEmbedder(), store)
+    # Only the re-embedded chunk and the pruned one are read back.
+    assert index.sync(lexical) == 2
+    assert index.search("gpus") == [] and index.search("software") == []
+    assert [chunk_id for chunk_id, _ in index.search("accelerators")] == ["NVDA#0"]
+
+
+class FakeIndicatorEngine:
+    def __init__(self) -> None:
+        self.store = SimpleNamespace(
+            position=lambda ticker: {"NVDA": 0, "MSFT": 1}[ticker.upper()],
+            dates=np.array(["2026-10-16"], dtype="datetime64[D]"),
+        )
+        self.rows = 1
+        self.latest_calls = 0
+
+    def latest(self) -> dict:
+        self.latest_calls += 1
+        return {"rsi_14": np.array([71.5, np.nan]), "sma_20": np.array([180.25, 410.0])}
+
+
+def test_indicator_refresh_computes_the_latest_values_once(store, monkeypatch):
+    collection = MemoryCollection()
+    run_ingest(["NVDA", "MSFT"], lambda symbol: asyncio.sleep(0, f"{symbol} profile"), collection, FakeEmbedder(), store)
+    (store / "history").mkdir()
+    (store / "history" / "meta.json").write_text("{}")
+    engine = FakeIndicatorEngine()
+    monkeypatch.setattr(ingest, "get_indicator_engine", lambda: engine)
+
+    writer = ingest.CollectionWriter(collection)
+    assert asyncio.run(ingest.refresh_indicator_metadata(writer)) == 2
+    assert engine.latest_calls == 1
+    nvda, msft = collection.rows["NVDA#0"][1], collection.rows["MSFT#0"][1]
+    assert (nvda["rsi_14"], nvda["sma_20"], nvda["indicators_date"]) == (71.5, 180.25, 20261016)
+    assert "rsi_14" not in msft and msft["sma_20"] == 410.0
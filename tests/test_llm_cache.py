@@ -0,0 +1,76 @@
+import asyncio
+
+import beeai_framework.backend  # noqa: F401  (loads beeai in an order that avoids its circular import)
+import pytest
+from beeai_framework.backend import AssistantMessage, ChatModel, ChatModelOutput, UserMessage
+
+from agents.llm_cache import LLMReplayMissError, LLMResponseStore, cache_llm
+
+
+class CountingModel(ChatModel):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    @property
+    def model_id(self) -> str:
+        return "counting"
+
+    @property
+    def provider_id(self) -> str:
+        return "ollama"
+
+    async def _create(self, input, run) -> ChatModelOutput:
+        self.calls += 1
+        return ChatModelOutput(output=[AssistantMessage(f"answer {self.calls}")])
+
+    async def _create_stream(self, input, run):
+        yield await self._create(input, run)
+
+    async def clone(self) -> "CountingModel":
+        return CountingModel()
+
+
+async def ask(llm: ChatModel, question: str) -> str:
+    output = await llm.run([UserMessage(question)])
+    return output.get_text_content()
+
+
+def test_record_serves_repeats_until_the_ttl_expires(tmp_path):
+    async def scenario() -> None:
+        store = LLMResponseStore(str(tmp_path / "llm.sqlite3"))
+        model = CountingModel()
+        llm = cache_llm(model, "record", store=store, ttl_s=0.2)
+        assert await ask(llm, "NVDA price?") == "answer 1"
+        assert await ask(llm, "NVDA price?") == "answer 1"
+        assert await ask(llm, "AMD price?") == "answer 2"
+        await asyncio.sleep(0.25)
+        # Stale answers are asked again and the new response replaces the old one.
+        assert await ask(llm, "NVDA price?") == "answer 3"
+        assert model.calls == 3 and store.stats()["entries"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_replay_serves_recordings_of_any_age(tmp_path):
+    async def scenario() -> None:
+        store = LLMResponseStore(str(tmp_path / "llm.sqlite3"))
+        await ask(cache_llm(CountingModel(), "record", store=store), "NVDA price?")
+        await asyncio.sleep(0.1)
+        model = CountingModel()
+        llm = cache_llm(model, "replay", store=store, ttl_s=0.05)
+        assert await ask(llm, "NVDA price?") == "answer 1"
+        assert model.calls == 0
+
+    asyncio.run(scenario())
+
+
+def test_replay_miss_raises_instead_of_calling_the_model(tmp_path):
+    async def scenario() -> None:
+        model = CountingModel()
+        llm = cache_llm(model, "replay", store=LLMResponseStore(str(tmp_path / "llm.sqlite3")))
+        with pytest.raises(LLMReplayMissError):
+            await ask(llm, "NVDA price?")
+        assert model.calls == 0
+
+    asyncio.run(scenario())
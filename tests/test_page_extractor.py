@@ -0,0 +1,31 @@
+import beeai_framework.backend  # noqa: F401  (loads beeai in an order that avoids its circular import)
+
+from tools.page_extractor import extract_page
+
+REPORT = "NVIDIA reported record data center revenue for the quarter. " * 5
+
+
+def test_class_on_body_does_not_drop_the_page():
+    html = f'<html><head><title>NVDA</title></head><body class="modal-open"><p>{REPORT}</p></body></html>'
+    assert REPORT.strip() in extract_page(html).render()
+
+
+def test_hints_match_whole_class_tokens_only():
+    html = (
+        f'<body><div id="content" class="has-sidebar"><p>{REPORT}</p>'
+        '<div class="share-price">Price: 182.3</div></div>'
+        '<div class="share">Share on X</div><div class="sidebar">Trending tickers</div></body>'
+    )
+    text = extract_page(html).text
+    assert REPORT.strip() in text and "Price: 182.3" in text
+    assert "Share on X" not in text and "Trending tickers" not in text
+
+
+def test_hinted_wrapper_around_the_main_content_is_kept():
+    html = (
+        f'<body><div class="layout sidebar"><main><p>{REPORT}</p></main></div>'
+        '<div class="related"><a href="/amd">AMD stock</a></div></body>'
+    )
+    page = extract_page(html)
+    assert REPORT.strip() in page.text
+    assert "AMD stock" not in page.render()
@@ -0,0 +1,38 @@
+import asyncio
+
+import beeai_framework.backend  # noqa: F401  (loads beeai in an order that avoids its circular import)
+
+from rag.query_cache import SemanticQueryCache
+from rag.retrieval_batcher import RetrievalBatcher
+
+
+class SlowEmbeddingService:
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        await asyncio.sleep(0.05)
+        return [[1.0, 0.0] if "nvda" in text else [0.0, 1.0] for text in texts]
+
+
+class FakeCollection:
+    def query(self, query_embeddings, n_results, where, include):
+        return {
+            "ids": [["MSFT#0"] for _ in query_embeddings],
+            "documents": [["Microsoft builds software."] for _ in query_embeddings],
+            "metadatas": [[{"doc_id": "MSFT"}] for _ in query_embeddings],
+        }
+
+
+def test_cancelled_caller_does_not_fail_the_rest_of_its_batch():
+    async def scenario() -> None:
+        cache = SemanticQueryCache()
+        cache.put([1.0, 0.0], "null", 5, (["NVIDIA designs GPUs."], [{"doc_id": "NVDA"}]))
+        batcher = RetrievalBatcher(SlowEmbeddingService(), FakeCollection(), max_wait_ms=20, cache=cache)
+        cancelled = asyncio.create_task(batcher.query("nvda gpus", n_results=5))
+        cached = asyncio.create_task(batcher.query("nvda gpus", n_results=5))
+        fresh = asyncio.create_task(batcher.query("msft cloud", n_results=5))
+        await asyncio.sleep(0.03)  # all three are in one batch that is now being embedded
+        cancelled.cancel()
+        assert await cached == (["NVIDIA designs GPUs."], [{"doc_id": "NVDA"}])
+        assert await fresh == (["Microsoft builds software."], [{"doc_id": "MSFT"}])
+        assert batcher.batches == 1
+
+    asyncio.run(scenario())
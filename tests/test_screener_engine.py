@@ -0,0 +1,20 @@
+import numpy as np
+
+from screener.engine import Condition, condition_mask
+from screener.snapshot import Snapshot
+
+
+def make_snapshot() -> Snapshot:
+    return Snapshot(
+        columns={"ticker": np.array(["NVDA", "PLTR", "ARM"]), "sp500": np.array([True, True, False])},
+        categories={},
+    )
+
+
+def test_flag_condition_accepts_numeric_values():
+    snapshot = make_snapshot()
+    for value in (1, True, "true", "yes"):
+        condition = Condition.model_validate({"field": "sp500", "value": value})
+        assert condition_mask(snapshot, condition).tolist() == [True, True, False]
+    condition = Condition.model_validate({"field": "sp500", "value": 0})
+    assert condition_mask(snapshot, condition).tolist() == [False, False, True]
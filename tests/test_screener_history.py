@@ -0,0 +1,69 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from screener.history import NUMERIC_FIELDS, HistoryStore
+from screener.snapshot import Snapshot
+
+TICKERS = np.array(["NVDA", "PLTR", "ARM"])
+
+
+def make_snapshot(prices: list[float]) -> Snapshot:
+    columns = {field: np.full(len(TICKERS), np.nan) for field in NUMERIC_FIELDS}
+    columns.update(ticker=TICKERS, price=np.array(prices, dtype=np.float64))
+    return Snapshot(columns, categories={})
+
+
+class Crash(Exception):
+    pass
+
+
+def test_reappending_the_latest_day_replaces_it(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    reader = HistoryStore(str(tmp_path))
+    store.append(date(2024, 3, 13), make_snapshot([900.0, 25.0, 120.0]))
+    store.append(date(2024, 3, 14), make_snapshot([905.0, 24.0, 121.0]))
+    store.append(date(2024, 3, 14), make_snapshot([910.0, 24.5, 119.0]))
+
+    assert reader.refresh()
+    assert reader.dates.tolist() == [date(2024, 3, 13), date(2024, 3, 14)]
+    assert reader.history("NVDA").tolist() == [900.0, 910.0]
+    assert reader.snapshot(date(2024, 3, 14)).columns["price"].tolist() == [910.0, 24.5, 119.0]
+    assert not reader.column("price").flags.writeable
+
+
+def test_crash_before_the_commit_keeps_the_previous_day(tmp_path, monkeypatch):
+    store = HistoryStore(str(tmp_path))
+    store.append(date(2024, 3, 14), make_snapshot([905.0, 24.0, 121.0]))
+
+    def crash(self) -> None:
+        raise Crash
+
+    monkeypatch.setattr(HistoryStore, "_write_meta", crash)
+    with pytest.raises(Crash):
+        store.append(date(2024, 3, 14), make_snapshot([910.0, 24.5, 119.0]))
+    monkeypatch.undo()
+
+    reopened = HistoryStore(str(tmp_path))
+    assert reopened.history("NVDA").tolist() == [905.0]
+    assert reopened.snapshot(date(2024, 3, 14)).columns["price"].tolist() == [905.0, 24.0, 121.0]
+
+
+def test_crash_after_the_commit_is_finished_by_the_next_append(tmp_path, monkeypatch):
+    store = HistoryStore(str(tmp_path))
+    store.append(date(2024, 3, 14), make_snapshot([905.0, 24.0, 121.0]))
+
+    def crash(self) -> None:
+        raise Crash
+
+    monkeypatch.setattr(HistoryStore, "_apply_staged", crash)
+    with pytest.raises(Crash):
+        store.append(date(2024, 3, 14), make_snapshot([910.0, 24.5, 119.0]))
+    monkeypatch.undo()
+
+    reopened = HistoryStore(str(tmp_path))
+    reopened.append(date(2024, 3, 15), make_snapshot([915.0, 25.0, 118.0]))
+    assert reopened.history("NVDA").tolist() == [910.0, 915.0]
+    assert reopened.snapshot(date(2024, 3, 14)).columns["price"].tolist() == [910.0, 24.5, 119.0]
+    assert not (tmp_path / "partitions" / "2024-03-14.staged.npz").exists()
@@ -0,0 +1,60 @@
+import asyncio
+
+import beeai_framework.backend  # noqa: F401  (loads beeai in an order that avoids its circular import)
+
+from agents.tool_cache import ToolResultCache, cache_key
+
+
+def test_cancelling_the_first_caller_does_not_fail_the_others():
+    async def scenario() -> None:
+        cache = ToolResultCache(disk_path=None)
+        calls = 0
+
+        async def search() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "results"
+
+        first = asyncio.create_task(cache.get_or_run("DuckDuckGo", "k", 60, search))
+        second = asyncio.create_task(cache.get_or_run("DuckDuckGo", "k", 60, search))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "results"
+        assert first.cancelled() and calls == 1
+        assert await cache.get_or_run("DuckDuckGo", "k", 60, search) == "results" and calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_shared_call_is_cancelled_once_every_caller_left():
+    async def scenario() -> None:
+        cache = ToolResultCache(disk_path=None)
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        async def search() -> str:
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "results"
+
+        callers = [asyncio.create_task(cache.get_or_run("DuckDuckGo", "k", 60, search)) for _ in range(2)]
+        await started.wait()
+        callers[0].cancel()
+        await asyncio.sleep(0)
+        assert not cancelled.is_set()
+        callers[1].cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        assert cache.stats()["entries"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_only_free_text_fields_are_case_folded():
+    assert cache_key("DuckDuckGo", {"query": "NVDA  earnings"}) == cache_key("DuckDuckGo", {"query": "nvda earnings"})
+    assert cache_key("batch_crawl", {"urls": ["https://example.com/Report"]}) != cache_key(
+        "batch_crawl", {"urls": ["https://example.com/report"]}
+    )
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+import pytest
+
+from rag.whatsapp import detect_date_order, is_noise, read_messages
+
+ANDROID_EXPORT = """\ufeff13/03/2024, 09:15 - Messages and calls are end-to-end encrypted. No one outside of this chat can read them.
+13/03/2024, 09:16 - Priya: NVDA closed above 900 again, data center demand is wild
+Anyone trimming before earnings?
+13/03/2024, 21:04 - Rahul: <Media omitted>
+14/03/2024, 07:30 - Rahul: Holding. Guidance matters more than the beat <This message was edited>
+"""
+
+IOS_EXPORT = """[3/14/24, 9:16:02\u202fAM] Priya: NVDA closed above 900 again, data center demand is wild
+Anyone trimming before earnings?
+\u200e[3/14/24, 9:17:45\u202fAM] Rahul: \u200eimage omitted
+[3/14/24, 12:05:00\u202fPM] Rahul: Holding. Guidance matters more than the beat
+\u200e[3/14/24, 12:06:10\u202fPM] Priya changed the group name to "Chip stocks"
+"""
+
+
+@pytest.fixture
+def export(tmp_path):
+    def write(text: str) -> str:
+        path = tmp_path / "WhatsApp Chat with Chip stocks.txt"
+        path.write_text(text, encoding="utf-8")
+        return str(path)
+
+    return write
+
+
+def test_android_export(export):
+    path = export(ANDROID_EXPORT)
+    assert detect_date_order(path) == "dmy"
+    messages = list(read_messages(path))
+    assert [(m.timestamp, m.sender) for m in messages] == [
+        (datetime(2024, 3, 13, 9, 16), "Priya"),
+        (datetime(2024, 3, 13, 21, 4), "Rahul"),
+        (datetime(2024, 3, 14, 7, 30), "Rahul"),
+    ]
+    assert messages[0].text == "NVDA closed above 900 again, data center demand is wild\nAnyone trimming before earnings?"
+    assert messages[2].text == "Holding. Guidance matters more than the beat"
+    assert [is_noise(m) for m in messages] == [False, True, False]
+
+
+def test_ios_export(export):
+    path = export(IOS_EXPORT)
+    assert detect_date_order(path) == "mdy"
+    messages = list(read_messages(path))
+    assert [(m.timestamp, m.sender) for m in messages] == [
+        (datetime(2024, 3, 14, 9, 16, 2), "Priya"),
+        (datetime(2024, 3, 14, 9, 17, 45), "Rahul"),
+        (datetime(2024, 3, 14, 12, 5), "Rahul"),
+    ]
+    assert messages[0].text.endswith("\nAnyone trimming before earnings?")
+    assert messages[1].text == "image omitted" and is_noise(messages[1])
@@ -0,0 +1,298 @@
+# batch_crawler.py
+"""Concurrent multi-URL crawling with per-domain politeness.
+
+URLs are fetched concurrently over plain HTTP, while a scheduler caps the
+number of in-flight requests per domain and spaces requests to the same
+domain (widened to the site's robots.txt Crawl-delay). robots.txt is fetched
+once per host and cached, and requests identify as the same agent token the
+rules are checked for. Transient failures (network errors, 429, 5xx) are
+retried with jittered exponential backoff, and results are yielded as they
+complete.
+"""
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, ClassVar
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+from pydantic import BaseModel, Field
+
+from beeai_framework.context import RunContext
+from beeai_framework.emitter import Emitter
+from beeai_framework.tools import StringToolOutput, Tool, ToolRunOptions
+from tools.http_fetcher import FetchResult, HttpFetcher
+from tools.page_cache import get_page_cache
+from tools.page_extractor import CHARS_PER_TOKEN, extract_page
+from util import constants
+from util.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class CrawlResult:
+    url: str
+    status: int | None
+    html: str = ""
+    error: str | None = None
+    attempts: int = 0
+    elapsed_ms: float = 0.0
+
+
+class PolitenessScheduler:
+    """Caps concurrency globally and per domain, and spaces out requests to the same domain."""
+
+    def __init__(
+        self,
+        concurrency: int = constants.CRAWLER_CONCURRENCY,
+        domain_concurrency: int = constants.CRAWLER_DOMAIN_CONCURRENCY,
+        domain_interval_s: float = constants.CRAWLER_DOMAIN_INTERVAL_S,
+    ) -> None:
+        self.domain_concurrency = domain_concurrency
+        self.domain_interval_s = domain_interval_s
+        self._global = asyncio.Semaphore(concurrency)
+        self._domains: dict[str, asyncio.Semaphore] = {}
+        self._next_slot: dict[str, float] = {}
+        self._intervals: dict[str, float] = {}
+
+    def set_interval(self, domain: str, interval_s: float) -> None:
+        self._intervals[domain] = max(self.domain_interval_s, interval_s)
+
+    async def _wait_turn(self, domain: str) -> None:
+        # Reserve the next start slot synchronously, then sleep until it arrives.
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(domain, now))
+        self._next_slot[domain] = slot + self._intervals.get(domain, self.domain_interval_s)
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    @asynccontextmanager
+    async def slot(self, domain: str) -> AsyncIterator[None]:
+        semaphore = self._domains.get(domain)
+        if semaphore is None:
+            semaphore = self._domains[domain] = asyncio.Semaphore(self.domain_concurrency)
+        async with semaphore, self._global:
+            await self._wait_turn(domain)
+            yield
+
+
+class RobotsCache:
+    """robots.txt per host, fetched once and shared by every URL on it.
+
+    Following RFC 9309, a missing robots.txt (4xx) allows everything, while a
+    server error (5xx, 429) or a failed request disallows everything. Those
+    failures are cached for ``failure_ttl_s`` only, so the host is retried soon.
+    401 and 403 are read as "keep out" rather than as a missing file.
+    """
+
+    def __init__(
+        self,
+        fetcher: HttpFetcher,
+        ttl_s: float = constants.CRAWLER_ROBOTS_TTL_S,
+        user_agent: str | None = None,
+        failure_ttl_s: float = constants.CRAWLER_ROBOTS_FAILURE_TTL_S,
+    ) -> None:
+        self.fetcher = fetcher
+        self.ttl_s = ttl_s
+        self.failure_ttl_s = failure_ttl_s
+        # Rules are evaluated for the agent the requests actually identify as.
+        self.user_agent = user_agent or fetcher.user_agent
+        self._parsers: dict[str, tuple[float, RobotFileParser]] = {}
+        self._pending: dict[str, asyncio.Task] = {}
+
+    async def parser(self, url: str) -> RobotFileParser:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        cached = self._parsers.get(origin)
+        if cached and time.monotonic() < cached[0]:
+            return cached[1]
+        # Concurrent URLs on one host share a single robots.txt request. It runs in a task the
+        # cache owns, so cancelling the URL that started it doesn't cancel the others.
+        task = self._pending.get(origin)
+        if task is None:
+            task = self._pending[origin] = asyncio.get_running_loop().create_task(self._load(origin))
+            task.add_done_callback(lambda done: self._loaded(origin, done))
+        return (await asyncio.shield(task))[1]
+
+    def _loaded(self, origin: str, task: asyncio.Task) -> None:
+        del self._pending[origin]
+        if task.cancelled():
+            return
+        if task.exception() is None:  # also marks a failure as retrieved when nobody was waiting
+            self._parsers[origin] = task.result()
+
+    async def _load(self, origin: str) -> tuple[float, RobotFileParser]:
+        """The parsed robots.txt of ``origin`` and when it expires."""
+        parser = RobotFileParser(origin + "/robots.txt")
+        try:
+            result = await self.fetcher.fetch(origin + "/robots.txt")
+        except httpx.HTTPError as e:
+            logger.debug(f"robots.txt for {origin} unavailable ({e}); disallowing for now")
+            parser.disallow_all = True
+            return time.monotonic() + self.failure_ttl_s, parser
+        if result.status == 429 or result.status >= 500:
+            logger.debug(f"robots.txt for {origin} returned HTTP {result.status}; disallowing for now")
+            parser.disallow_all = True
+            return time.monotonic() + self.failure_ttl_s, parser
+        if result.status in (401, 403):
+            parser.disallow_all = True
+        elif result.status >= 400:
+            parser.parse([])
+        else:
+            parser.parse(result.html.splitlines())
+        return time.monotonic() + self.ttl_s, parser
+
+    async def allowed(self, url: str) -> tuple[bool, float | None]:
+        """Returns whether ``url`` may be fetched and the host's Crawl-delay, if any."""
+        parser = await self.parser(url)
+        return parser.can_fetch(self.user_agent, url), parser.crawl_delay(self.user_agent)
+
+
+class BatchCrawler:
+    def __init__(
+        self,
+        fetcher: HttpFetcher | None = None,
+        scheduler: PolitenessScheduler | None = None,
+        robots: RobotsCache | None = None,
+        max_retries: int = constants.CRAWLER_MAX_RETRIES,
+        backoff_base_s: float = 0.5,
+        backoff_max_s: float = 30.0,
+    ) -> None:
+        self.fetcher = fetcher or get_crawler_fetcher()
+        self.scheduler = scheduler or PolitenessScheduler()
+        self.robots = robots or RobotsCache(self.fetcher)
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+
+    def _backoff(self, attempt: int, retry_after: str | None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max_s)
+        # Full jitter: spreads retries from many workers instead of synchronizing them.
+        return random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+
+    async def fetch(self, url: str) -> CrawlResult:
+        try:
+            return await self._fetch(url)
+        except (httpx.InvalidURL, ValueError) as e:
+            # A malformed URL fails on its own instead of taking the rest of the batch down.
+            return CrawlResult(url=url, status=None, error=f"{type(e).__name__}: {e}")
+
+    async def _fetch(self, url: str) -> CrawlResult:
+        start = time.perf_counter()
+        domain = urlsplit(url).netloc
+        allowed, crawl_delay = await self.robots.allowed(url)
+        if not allowed:
+            return CrawlResult(url=url, status=None, error="disallowed by robots.txt")
+        if crawl_delay:
+            self.scheduler.set_interval(domain, float(crawl_delay))
+        # Fresh cached pages cost the site nothing, so they skip the politeness queue.
+        cached = await self.fetcher.cached(url)
+        if cached is not None:
+            return CrawlResult(
+                url=url, status=cached.status, html=cached.html, elapsed_ms=(time.perf_counter() - start) * 1000
+            )
+
+        result: FetchResult | None = None
+        error: str | None = None
+        attempt = 0
+        for attempt in range(1, self.max_retries + 2):
+            async with self.scheduler.slot(domain):
+                try:
+                    result = await self.fetcher.fetch(url)
+                    error = None
+                except httpx.HTTPError as e:
+                    result, error = None, f"{type(e).__name__}: {e}"
+            retryable = result is None or result.status == 429 or result.status >= 500
+            if not retryable or attempt > self.max_retries:
+                break
+            retry_after = result.headers.get("retry-after") if result is not None else None
+            await asyncio.sleep(self._backoff(attempt - 1, retry_after))
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if result is None:
+            return CrawlResult(url=url, status=None, error=error, attempts=attempt, elapsed_ms=elapsed_ms)
+        return CrawlResult(
+            url=url,
+            status=result.status,
+            html=result.html,
+            error=None if result.status < 400 else f"HTTP {result.status}",
+            attempts=attempt,
+            elapsed_ms=elapsed_ms,
+        )
+
+    async def crawl(self, urls: list[str]) -> AsyncIterator[CrawlResult]:
+        """Yields one result per unique URL, in completion order."""
+        tasks = [asyncio.create_task(self.fetch(url)) for url in dict.fromkeys(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+_crawler_fetcher: HttpFetcher | None = None
+
+
+def get_crawler_fetcher() -> HttpFetcher:
+    """A fetcher that identifies as ``CRAWLER_USER_AGENT_TOKEN``, the agent robots.txt is checked for."""
+    global _crawler_fetcher
+    if _crawler_fetcher is None:
+        _crawler_fetcher = HttpFetcher(cache=get_page_cache(), user_agent=constants.CRAWLER_USER_AGENT_TOKEN)
+    return _crawler_fetcher
+
+
+class BatchCrawlInput(BaseModel):
+    urls: list[str] = Field(..., min_length=1, max_length=50, description="Pages to fetch concurrently.")
+    max_chars_per_page: int = Field(4000, ge=200, le=20000, description="Content budget for each page.")
+
+
+class BatchCrawlTool(Tool):
+    name: ClassVar[str] = "batch_crawl"
+    description: ClassVar[str] = (
+        "Fetches several web pages at once (politely, honoring robots.txt) and returns their main content and links."
+    )
+
+    def __init__(self, *, extra_instructions: str = "", crawler: BatchCrawler | None = None) -> None:
+        super().__init__()
+        if extra_instructions:
+            self.description += f" {extra_instructions}"
+        self._crawler = crawler
+
+    @property
+    def input_schema(self) -> type[BatchCrawlInput]:
+        return BatchCrawlInput
+
+    @property
+    def crawler(self) -> BatchCrawler:
+        if self._crawler is None:
+            self._crawler = BatchCrawler()
+        return self._crawler
+
+    async def _run(self, input: BatchCrawlInput, options: ToolRunOptions | None, context: RunContext) -> StringToolOutput:
+        sections = []
+        raw_chars = output_chars = 0
+        async for result in self.crawler.crawl(input.urls):
+            if result.error:
+                sections.append(f"[{result.url}] failed: {result.error}")
+                continue
+            extract = await asyncio.to_thread(
+                extract_page, result.html, token_budget=input.max_chars_per_page // CHARS_PER_TOKEN
+            )
+            raw_chars += extract.raw_chars
+            output_chars += extract.output_chars
+            sections.append(f"[{result.url}]\n{extract.render()}")
+        if output_chars:
+            logger.info(f"Batch crawl reduced {raw_chars} -> {output_chars} chars ({raw_chars / output_chars:.1f}x)")
+        return StringToolOutput("\n---\n".join(sections))
+
+    def _create_emitter(self) -> Emitter:
+        return Emitter.root().child(
+            namespace=["tool", "batch_crawl"],
+            creator=self,
+        )
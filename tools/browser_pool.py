@@ -0,0 +1,267 @@
+# browser_pool.py
+"""Bounded pool of headless Chrome sessions, started lazily.
+
+Each agent run leases one session (keyed by the run's context) and keeps it
+across tool calls, so concurrent A2A sessions no longer share page state.
+Sessions are health-checked before reuse, recycled after a number of
+navigations or after a crash, and closed when idle for too long. A lease is
+returned to the pool when its run ends (``release_on_finish``), or once it
+goes unused for ``idle_timeout_s``.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable
+
+from beeai_framework.emitter import EmitterOptions
+
+from util import constants
+from util.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def create_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--window-size=1920x1080")
+    options.add_argument("--verbose")
+    options.add_argument("--headless=new")  # Use new headless mode
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    return webdriver.Chrome(options=options)
+
+
+class BrowserSession:
+    def __init__(self, driver) -> None:
+        self.driver = driver
+        self.navigations = 0
+        self.last_used = time.monotonic()
+
+    def healthy(self) -> bool:
+        try:
+            self.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def quit(self) -> None:
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning(f"Closing browser session failed: {e}")
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        max_sessions: int = constants.BROWSER_POOL_SIZE,
+        max_navigations: int = constants.BROWSER_MAX_NAVIGATIONS,
+        idle_timeout_s: float = constants.BROWSER_IDLE_TIMEOUT_S,
+        driver_factory: Callable[[], Any] = create_driver,
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.max_navigations = max_navigations
+        self.idle_timeout_s = idle_timeout_s
+        self.driver_factory = driver_factory
+        self.created = 0
+        self.recycled = 0
+        self._idle: list[BrowserSession] = []
+        self._leases: dict[Any, BrowserSession] = {}
+        self._starting = 0
+        self._condition: asyncio.Condition | None = None
+
+    @property
+    def size(self) -> int:
+        return len(self._idle) + len(self._leases) + self._starting
+
+    def _cond(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self, key: Any) -> BrowserSession:
+        """Returns the session leased to ``key``, leasing one if needed."""
+        async with self._cond():
+            self._reap()
+            session = self._leases.get(key)
+            if session is not None:
+                session.last_used = time.monotonic()
+                return session
+            while not self._idle and self.size >= self.max_sessions:
+                try:
+                    # Nothing notifies when a lease goes stale, so wake up in time to reap it.
+                    await asyncio.wait_for(self._cond().wait(), self._until_reclaimable())
+                except asyncio.TimeoutError:
+                    pass
+                self._reap()
+            while self._idle:
+                session = self._idle.pop()
+                if await asyncio.to_thread(session.healthy):
+                    break
+                await self._discard(session)
+                session = None
+            if session is None:
+                self._starting += 1
+            else:
+                session.last_used = time.monotonic()
+                self._leases[key] = session
+                return session
+        try:
+            session = BrowserSession(await asyncio.to_thread(self.driver_factory))
+            self.created += 1
+        except Exception:
+            async with self._cond():
+                self._starting -= 1
+                self._cond().notify()
+            raise
+        async with self._cond():
+            self._starting -= 1
+            self._leases[key] = session
+        return session
+
+    async def release(self, key: Any) -> None:
+        """Returns ``key``'s session to the pool (call when the agent run ends)."""
+        async with self._cond():
+            session = self._leases.pop(key, None)
+            if session is not None:
+                await self._return(session)
+            self._cond().notify()
+
+    async def recycle(self, key: Any) -> None:
+        """Closes ``key``'s session (crash or navigation limit); the next acquire starts a fresh one."""
+        async with self._cond():
+            session = self._leases.pop(key, None)
+            if session is not None:
+                await self._discard(session)
+            self._cond().notify()
+
+    @asynccontextmanager
+    async def session(self, key: Any, navigating: bool = False) -> AsyncIterator[BrowserSession]:
+        """Leases ``key``'s session for one tool call. A navigation on a worn-out
+        session starts from a fresh browser; a session that fails its health
+        check after an error is recycled."""
+        session = await self.acquire(key)
+        if navigating and session.navigations >= self.max_navigations:
+            await self.recycle(key)
+            session = await self.acquire(key)
+        try:
+            yield session
+        except Exception:
+            if not await asyncio.to_thread(session.healthy):
+                logger.warning("Browser session crashed, recycling it")
+                await self.recycle(key)
+            raise
+        finally:
+            session.last_used = time.monotonic()
+            if navigating:
+                session.navigations += 1
+
+    async def _return(self, session: BrowserSession) -> None:
+        if session.navigations >= self.max_navigations:
+            await self._discard(session)
+        else:
+            session.last_used = time.monotonic()
+            self._idle.append(session)
+
+    async def _discard(self, session: BrowserSession) -> None:
+        self.recycled += 1
+        await asyncio.to_thread(session.quit)
+
+    def _until_reclaimable(self) -> float:
+        """Seconds until the least recently used lease can be reclaimed."""
+        oldest = min((session.last_used for session in self._leases.values()), default=time.monotonic())
+        return max(oldest + self.idle_timeout_s - time.monotonic(), 0) + 0.01
+
+    def _reap(self) -> None:
+        """Closes idle sessions and reclaims leases unused for ``idle_timeout_s``."""
+        now = time.monotonic()
+        for key, session in list(self._leases.items()):
+            if now - session.last_used > self.idle_timeout_s:
+                del self._leases[key]
+                # Idle from now on, so a waiting acquire can reuse it rather than start a new browser.
+                session.last_used = now
+                self._idle.append(session)
+        expired = [session for session in self._idle if now - session.last_used > self.idle_timeout_s]
+        for session in expired:
+            self._idle.remove(session)
+            self.recycled += 1
+            # Quitting is slow; don't hold up the caller.
+            asyncio.get_running_loop().run_in_executor(None, session.quit)
+
+    async def close(self) -> None:
+        async with self._cond():
+            sessions = self._idle + list(self._leases.values())
+            self._idle, self._leases = [], {}
+        for session in sessions:
+            await asyncio.to_thread(session.quit)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "idle": len(self._idle),
+            "leased": len(self._leases),
+            "created": self.created,
+            "recycled": self.recycled,
+        }
+
+
+_lease_scope: ContextVar[Any] = ContextVar("browser_lease_scope", default=None)
+
+
+@asynccontextmanager
+async def lease_scope(key: Any) -> AsyncIterator[None]:
+    """Ties every lease taken inside the block to ``key`` and returns it to the
+    pool on exit, instead of waiting for the idle timeout."""
+    token = _lease_scope.set(key)
+    try:
+        yield
+    finally:
+        _lease_scope.reset(token)
+        if _pool is not None:
+            await _pool.release(key)
+
+
+def lease_key(context: Any) -> Any:
+    """Identifies the agent run a tool call belongs to: the enclosing
+    ``lease_scope`` if any, otherwise the run tree's shared ``group_id``."""
+    scope = _lease_scope.get()
+    if scope is not None:
+        return scope
+    group_id = getattr(context, "group_id", None)
+    if group_id is not None:
+        return group_id
+    while getattr(context, "parent", None) is not None:
+        context = context.parent
+    return id(context)
+
+
+def release_on_finish(ctx: Any) -> None:
+    """Run middleware that returns the run's browser lease to the pool when the
+    run ends, whether it succeeds, fails or is cancelled."""
+    key = lease_key(ctx)
+
+    async def release(_: Any, __: Any) -> None:
+        if _pool is not None:
+            await _pool.release(key)
+
+    ctx.emitter.on(
+        lambda meta: meta.creator is ctx and meta.name == "finish",
+        release,
+        EmitterOptions(match_nested=True, is_blocking=True),
+    )
+
+
+_pool: BrowserPool | None = None
+
+
+def get_browser_pool() -> BrowserPool:
+    global _pool
+    if constants.DISABLE_WEB_DRIVER:
+        raise RuntimeError("The web driver is disabled (DISABLE_WEB_DRIVER=1)")
+    if _pool is None:
+        _pool = BrowserPool()
+    return _pool
@@ -0,0 +1,249 @@
+# http_fetcher.py
+"""Plain-HTTP fast path for the crawler.
+
+Most finance pages are readable without running JavaScript. Pages are fetched
+with a pooled, keep-alive, compression-enabled HTTP client first; only
+responses that look JS-gated are escalated to headless Chrome. The decision is
+also learned per domain, so sites that always need a browser stop paying for
+the HTTP attempt (they are re-probed every so often in case that changes).
+
+Responses go through the persistent page cache (``tools.page_cache``): fresh
+pages are served locally and stale ones are revalidated with a conditional
+request.
+"""
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+import httpx
+
+from tools.page_cache import CachedPage, PageCache, get_page_cache
+from tools.page_extractor import extract_page
+from util import constants
+from util.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SCRIPT_OR_STYLE = re.compile(r"<(script|style|noscript|template)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r"<[^>]+>")
+_SPACE = re.compile(r"\s+")
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/126.0 Safari/537.36"
+)
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int
+    html: str
+    headers: dict[str, str] = field(default_factory=dict)
+    elapsed_ms: float = 0.0
+    # Extracted content, filled in when the page went through the cache.
+    text: str = ""
+    from_cache: bool = False
+
+    @classmethod
+    def from_cached(cls, page: CachedPage, elapsed_ms: float = 0.0) -> "FetchResult":
+        return cls(
+            url=page.url,
+            status=page.status,
+            html=page.body,
+            headers=page.headers,
+            elapsed_ms=elapsed_ms,
+            text=page.text,
+            from_cache=True,
+        )
+
+
+def visible_text(html: str) -> str:
+    return _SPACE.sub(" ", _TAG.sub(" ", _SCRIPT_OR_STYLE.sub(" ", html))).strip()
+
+
+def visible_text_length(html: str) -> int:
+    return len(visible_text(html))
+
+
+def looks_js_gated(
+    html: str,
+    min_text_chars: int = constants.CRAWLER_MIN_TEXT_CHARS,
+    markers: list[str] = constants.CRAWLER_JS_MARKERS,
+) -> bool:
+    """True when a page is a JS shell, a bot challenge, or too empty to be the real content."""
+    lowered = html.lower()
+    if any(marker.strip() and marker.strip().lower() in lowered for marker in markers):
+        # A marker inside an otherwise full page (e.g. a <noscript> banner) is not a gate.
+        return visible_text_length(html) < min_text_chars * 4
+    return visible_text_length(html) < min_text_chars
+
+
+class DomainPolicy:
+    """Learns per domain whether the HTTP attempt is worth making."""
+
+    def __init__(self, gated_threshold: int = 3, reprobe_every: int = 20) -> None:
+        self.gated_threshold = gated_threshold
+        self.reprobe_every = reprobe_every
+        self._gated: dict[str, int] = {}
+        self._skipped: dict[str, int] = {}
+
+    def should_try_http(self, domain: str) -> bool:
+        if self._gated.get(domain, 0) < self.gated_threshold:
+            return True
+        skipped = self._skipped.get(domain, 0) + 1
+        self._skipped[domain] = skipped
+        return skipped % self.reprobe_every == 0
+
+    def record(self, domain: str, gated: bool) -> None:
+        if gated:
+            self._gated[domain] = self._gated.get(domain, 0) + 1
+        else:
+            self._gated.pop(domain, None)
+            self._skipped.pop(domain, None)
+
+    def snapshot(self) -> dict[str, int]:
+        return dict(self._gated)
+
+
+def domain_of(url: str) -> str:
+    return urlsplit(url).hostname or ""
+
+
+def _cacheable(result: FetchResult) -> bool:
+    return result.status == 200 and "no-store" not in result.headers.get("cache-control", "").lower()
+
+
+class HttpFetcher:
+    def __init__(
+        self,
+        timeout_s: float = constants.CRAWLER_HTTP_TIMEOUT_S,
+        policy: DomainPolicy | None = None,
+        cache: PageCache | None = None,
+        user_agent: str = USER_AGENT,
+    ) -> None:
+        self.timeout_s = timeout_s
+        self.user_agent = user_agent
+        self.policy = policy or DomainPolicy()
+        self.cache = cache
+        self.fetched = 0
+        self.escalated = 0
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                follow_redirects=True,
+                timeout=self.timeout_s,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60),
+                headers={
+                    "User-Agent": self.user_agent,
+                    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+                    "Accept-Encoding": "gzip, deflate, br",
+                    "Accept-Language": "en-US,en;q=0.8",
+                },
+            )
+        return self._client
+
+    async def fetch(self, url: str, headers: dict[str, str] | None = None) -> FetchResult:
+        """GETs ``url``, through the page cache unless custom ``headers`` are given."""
+        if self.cache is None or headers:
+            return await self._get(url, headers)
+        cached = await asyncio.to_thread(self.cache.get, url)
+        if cached is not None and self.cache.is_fresh(cached):
+            self.cache.hits += 1
+            return FetchResult.from_cached(cached)
+
+        result = await self._get(url, cached.validators() if cached is not None else None)
+        if cached is not None and result.status == 304:
+            self.cache.revalidated += 1
+            await asyncio.to_thread(
+                self.cache.touch, url, result.headers.get("etag"), result.headers.get("last-modified")
+            )
+            return FetchResult.from_cached(cached, result.elapsed_ms)
+        self.cache.misses += 1
+        if _cacheable(result):
+            await asyncio.to_thread(self._store, url, result)
+        return result
+
+    async def cached(self, url: str) -> FetchResult | None:
+        """The cached page for ``url`` if it is still fresh, without any network I/O."""
+        if self.cache is None:
+            return None
+        page = await asyncio.to_thread(self.cache.get, url)
+        if page is None or not self.cache.is_fresh(page):
+            return None
+        self.cache.hits += 1
+        return FetchResult.from_cached(page)
+
+    def _store(self, url: str, result: FetchResult) -> None:
+        result.text = extract_page(result.html).render()
+        self.cache.put(
+            url,
+            CachedPage(
+                url=result.url,
+                status=result.status,
+                body=result.html,
+                text=result.text,
+                etag=result.headers.get("etag"),
+                last_modified=result.headers.get("last-modified"),
+                headers=result.headers,
+                fetched_at=time.time(),
+            ),
+        )
+
+    async def _get(self, url: str, headers: dict[str, str] | None) -> FetchResult:
+        start = time.perf_counter()
+        response = await self.client.get(url, headers=headers)
+        self.fetched += 1
+        return FetchResult(
+            url=str(response.url),
+            status=response.status_code,
+            html=response.text,
+            headers=dict(response.headers),
+            elapsed_ms=(time.perf_counter() - start) * 1000,
+        )
+
+    async def fetch_readable(self, url: str) -> FetchResult | None:
+        """Returns the page if plain HTTP got its real content, or None when the
+        caller should fall back to the browser."""
+        domain = domain_of(url)
+        if not self.policy.should_try_http(domain):
+            self.escalated += 1
+            return None
+        try:
+            result = await self.fetch(url)
+        except httpx.HTTPError as e:
+            logger.debug(f"HTTP fetch of {url} failed, escalating to browser: {e}")
+            self.escalated += 1
+            return None
+        gated = result.status in (401, 403, 429) or result.status >= 500 or looks_js_gated(result.html)
+        self.policy.record(domain, gated)
+        if gated:
+            self.escalated += 1
+            return None
+        return result
+
+    def stats(self) -> dict[str, float]:
+        stats = {"fetched": self.fetched, "escalated": self.escalated, "browser_domains": len(self.policy.snapshot())}
+        if self.cache is not None:
+            stats.update({f"cache_{name}": value for name, value in self.cache.stats().items()})
+        return stats
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+
+
+_fetcher: HttpFetcher | None = None
+
+
+def get_http_fetcher() -> HttpFetcher:
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = HttpFetcher(cache=get_page_cache())
+    return _fetcher
@@ -0,0 +1,219 @@
+# page_cache.py
+"""Persistent cache of crawled pages, shared by every session in the process.
+
+Entries are keyed by normalized URL and hold the zlib-compressed body and
+extracted text, the ETag/Last-Modified validators and the fetch time. A page
+younger than its domain's TTL is served without touching the network; an
+older one is revalidated with If-None-Match / If-Modified-Since, so an
+unchanged page costs a 304 instead of a full download. Once the stored size
+passes ``max_bytes`` the least recently used pages are evicted.
+"""
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from util import constants
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_TRACKING_PARAMS = ("utm_", "gclid", "fbclid", "mc_cid", "mc_eid", "guccounter")
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used as the cache key: lowercased scheme and host, no
+    default port, fragment or tracking parameters, and sorted query."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+@dataclass
+class CachedPage:
+    url: str
+    status: int
+    body: str
+    text: str = ""
+    etag: str | None = None
+    last_modified: str | None = None
+    headers: dict[str, str] = field(default_factory=dict)
+    fetched_at: float = 0.0
+
+    def age(self, now: float | None = None) -> float:
+        return (now if now is not None else time.time()) - self.fetched_at
+
+    def validators(self) -> dict[str, str]:
+        """Conditional request headers for revalidating this page."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = constants.PAGE_CACHE_MAX_BYTES,
+        default_ttl_s: float = constants.PAGE_CACHE_TTL_S,
+        domain_ttls: dict[str, float] | None = None,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl_s = default_ttl_s
+        self.domain_ttls = constants.PAGE_CACHE_DOMAIN_TTLS if domain_ttls is None else domain_ttls
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                body BLOB NOT NULL,
+                text BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                headers TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_lru ON pages (last_access)")
+        self._conn.commit()
+
+    def ttl_for(self, url: str) -> float:
+        """TTL of the most specific configured domain that ``url`` belongs to."""
+        host = (urlsplit(url).hostname or "").lower()
+        while host:
+            if host in self.domain_ttls:
+                return self.domain_ttls[host]
+            host = host.partition(".")[2]
+        return self.default_ttl_s
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return page.age() < self.ttl_for(page.url)
+
+    def get(self, url: str) -> CachedPage | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, body, text, etag, last_modified, headers, fetched_at FROM pages WHERE key = ?",
+                (normalize_url(url),),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE pages SET last_access = ? WHERE key = ?", (time.time(), normalize_url(url)))
+            self._conn.commit()
+        stored_url, status, body, text, etag, last_modified, headers, fetched_at = row
+        return CachedPage(
+            url=stored_url,
+            status=status,
+            body=zlib.decompress(body).decode("utf-8"),
+            text=zlib.decompress(text).decode("utf-8"),
+            etag=etag,
+            last_modified=last_modified,
+            headers=json.loads(headers),
+            fetched_at=fetched_at,
+        )
+
+    def put(self, key_url: str, page: CachedPage) -> None:
+        """Stores ``page`` under ``key_url`` (the URL as requested, before redirects)."""
+        body = zlib.compress(page.body.encode("utf-8"), 6)
+        text = zlib.compress(page.text.encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(key, url, status, body, text, etag, last_modified, headers, fetched_at, last_access, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    normalize_url(key_url),
+                    page.url,
+                    page.status,
+                    body,
+                    text,
+                    page.etag,
+                    page.last_modified,
+                    json.dumps(page.headers),
+                    page.fetched_at or now,
+                    now,
+                    len(body) + len(text),
+                ),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, key_url: str, etag: str | None = None, last_modified: str | None = None) -> None:
+        """Marks a page as just revalidated (the server answered 304)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ?, last_access = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE key = ?",
+                (now, now, etag, last_modified, normalize_url(key_url)),
+            )
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()
+        if total <= self.max_bytes:
+            return
+        # Walk from the least recently used page until enough bytes are freed.
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM pages ORDER BY last_access ASC"):
+            victims.append((key,))
+            freed += size
+            if total - freed <= self.max_bytes:
+                break
+        self._conn.executemany("DELETE FROM pages WHERE key = ?", victims)
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            pages, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        total = self.hits + self.revalidated + self.misses
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.revalidated) / total if total else 0.0,
+            "pages": pages,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_cache: PageCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache | None:
+    """The process-wide page cache, or None when ``PAGE_CACHE_PATH`` is empty."""
+    global _cache
+    if not constants.PAGE_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageCache(constants.PAGE_CACHE_PATH)
+        return _cache
@@ -0,0 +1,220 @@
+# page_extractor.py
+"""Turns raw page HTML into compact, LLM-ready content.
+
+Scripts, styles and navigation boilerplate are dropped; what remains is the
+readable main text plus a short list of the interactive elements (links,
+buttons, inputs with their ids) the agent can act on, trimmed to a token
+budget. Tokens are estimated at four characters each.
+"""
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+
+from util import constants
+from util.logger import get_logger
+
+logger = get_logger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "canvas", "iframe"}
+_BOILERPLATE_TAGS = {"nav", "header", "footer", "aside"}
+# Whole id/class/role tokens only: "share" is boilerplate, "share-price" is not.
+_BOILERPLATE_HINTS = {
+    "nav", "navbar", "navigation", "menu", "footer", "header", "sidebar", "breadcrumb", "breadcrumbs", "cookie",
+    "cookies", "consent", "banner", "advert", "ad", "ads", "promo", "subscribe", "newsletter", "social", "share",
+    "related", "popup", "modal", "contentinfo", "complementary",
+}
+# Containers the hints never apply to; a class like "modal-open" on <body> says nothing about its content.
+_NEVER_HINTED_TAGS = {"html", "body", "main", "article"}
+_MAIN_TAGS = {"main", "article"}
+_BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "table", "tr", "br", "hr",
+    "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "dd", "dt", "figcaption",
+}
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+@dataclass
+class Element:
+    kind: str
+    text: str = ""
+    id: str = ""
+    href: str = ""
+    name: str = ""
+
+    def render(self) -> str:
+        parts = [self.kind]
+        if self.id:
+            parts.append(f"id={self.id}")
+        if self.name:
+            parts.append(f"name={self.name}")
+        if self.text:
+            parts.append(f'"{self.text}"')
+        if self.href:
+            parts.append(f"-> {self.href}")
+        return " ".join(parts)
+
+
+@dataclass
+class PageExtract:
+    title: str
+    text: str
+    elements: list[Element] = field(default_factory=list)
+    raw_chars: int = 0
+
+    def render(self) -> str:
+        sections = []
+        if self.title:
+            sections.append(f"Title: {self.title}")
+        sections.append(self.text)
+        if self.elements:
+            sections.append("Interactive elements:\n" + "\n".join(f"- {element.render()}" for element in self.elements))
+        return "\n\n".join(sections)
+
+    @property
+    def output_chars(self) -> int:
+        return len(self.render())
+
+    @property
+    def reduction_ratio(self) -> float:
+        """Raw size divided by extracted size (e.g. 40.0 means 40x smaller)."""
+        return self.raw_chars / max(1, self.output_chars)
+
+
+class _Extractor(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.all_text: list[str] = []
+        self.main_text: list[str] = []
+        self.elements: list[Element] = []
+        self._skip_tag: str | None = None
+        self._skip_depth = 0
+        self._in_title = False
+        self._main_depth = 0
+        self._open: Element | None = None
+        self._open_tag: str | None = None
+        # Hinted elements still open: [tag, same-tag depth, all_text, main_text and elements lengths at the start].
+        self._hinted: list[list] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        attributes = {key: value or "" for key, value in attrs}
+        if tag == "title":
+            self._in_title = True
+            return
+        if tag in _SKIP_TAGS or tag in _BOILERPLATE_TAGS:
+            if tag not in _VOID_TAGS:
+                self._skip_tag, self._skip_depth = tag, 1
+            return
+        if tag not in _VOID_TAGS:
+            for hinted in self._hinted:
+                if hinted[0] == tag:
+                    hinted[1] += 1
+            hints = f"{attributes.get('id', '')} {attributes.get('class', '')} {attributes.get('role', '')}"
+            if tag not in _NEVER_HINTED_TAGS and _BOILERPLATE_HINTS.intersection(hints.lower().split()):
+                # Dropped only once it closes: if the main content turns up inside, it was a wrapper, not boilerplate.
+                self._hinted.append([tag, 1, len(self.all_text), len(self.main_text), len(self.elements)])
+        if tag in _MAIN_TAGS:
+            self._hinted.clear()
+            self._main_depth += 1
+        if tag in _BLOCK_TAGS:
+            self._append("\n")
+        if tag == "a" and attributes.get("href", "").strip() and not attributes["href"].startswith("javascript:"):
+            self._open, self._open_tag = Element("link", id=attributes.get("id", ""), href=attributes["href"].strip()), tag
+        elif tag == "button":
+            self._open, self._open_tag = Element("button", id=attributes.get("id", "")), tag
+        elif tag in ("input", "textarea", "select"):
+            kind = attributes.get("type", tag) if tag == "input" else tag
+            if kind not in ("hidden",):
+                label = attributes.get("placeholder") or attributes.get("aria-label") or attributes.get("value", "")
+                self.elements.append(
+                    Element(f"input[{kind}]", text=label.strip(), id=attributes.get("id", ""), name=attributes.get("name", ""))
+                )
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+        if tag == "title":
+            self._in_title = False
+        for i, hinted in enumerate(self._hinted):
+            if hinted[0] != tag:
+                continue
+            hinted[1] -= 1
+            if hinted[1] == 0:
+                _, _, all_len, main_len, elements_len = hinted
+                del self.all_text[all_len:], self.main_text[main_len:], self.elements[elements_len:]
+                del self._hinted[i:]
+                break
+        if tag in _MAIN_TAGS and self._main_depth:
+            self._main_depth -= 1
+        if self._open is not None and tag == self._open_tag:
+            self._open.text = " ".join(self._open.text.split())
+            if self._open.text or self._open.id:
+                self.elements.append(self._open)
+            self._open = self._open_tag = None
+        if tag in _BLOCK_TAGS:
+            self._append("\n")
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_tag is not None:
+            return
+        if self._in_title:
+            self.title += data.strip()
+            return
+        if self._open is not None:
+            self._open.text += data
+        self._append(data)
+
+    def _append(self, text: str) -> None:
+        self.all_text.append(text)
+        if self._main_depth:
+            self.main_text.append(text)
+
+
+def _normalize(pieces: list[str]) -> str:
+    text = _SPACES.sub(" ", "".join(pieces))
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+def extract_page(html: str, token_budget: int = constants.CRAWLER_PAGE_TOKEN_BUDGET, max_elements: int = 60) -> PageExtract:
+    parser = _Extractor()
+    parser.feed(html)
+    parser.close()
+
+    main_text = _normalize(parser.main_text)
+    # <main>/<article> wins when it holds real content; otherwise use the whole de-boilerplated body.
+    text = main_text if len(main_text) >= 200 else _normalize(parser.all_text)
+
+    budget_chars = token_budget * CHARS_PER_TOKEN
+    text_budget = int(budget_chars * 0.75)
+    if len(text) > text_budget:
+        text = text[:text_budget].rsplit(" ", 1)[0] + " ..."
+
+    elements: list[Element] = []
+    seen: set[tuple[str, str, str]] = set()
+    element_budget = budget_chars - len(text)
+    for element in parser.elements:
+        key = (element.kind, element.text, element.href or element.id)
+        if key in seen:
+            continue
+        seen.add(key)
+        element_budget -= len(element.render()) + 3
+        if element_budget < 0 or len(elements) >= max_elements:
+            break
+        elements.append(element)
+
+    page = PageExtract(title=parser.title, text=text, elements=elements, raw_chars=len(html))
+    logger.debug(f"Extracted {page.output_chars} of {page.raw_chars} chars ({page.reduction_ratio:.1f}x smaller)")
+    return page
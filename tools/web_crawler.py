@@ -1,22 +1,23 @@
-import time
+import asyncio
 import warnings
-from typing import ClassVar
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, ClassVar
 
-import selenium
 from pydantic import BaseModel, Field
-from google.adk.tools.load_artifacts_tool import load_artifacts_tool
-from google.adk.tools.tool_context import ToolContext
-from google.genai import types
-from PIL import Image
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
 from util import constants
+from tools.browser_pool import BrowserSession, get_browser_pool, lease_key
+from tools.http_fetcher import FetchResult, get_http_fetcher
+from tools.page_extractor import extract_page
 from beeai_framework.context import RunContext
 from beeai_framework.emitter import Emitter
 from beeai_framework.tools import StringToolOutput, Tool, ToolRunOptions
+from util.logger import get_logger
 
 warnings.filterwarnings("ignore", category=UserWarning)
 
+logger = get_logger(__name__)
+
 class WebCrawlSchema(BaseModel):
     crawl: str = Field(..., description="This helps crawl in any website and share details.")
 
@@ -53,16 +54,39 @@ class WebCrawlTool(Tool):
             creator=self,
         )
 
-if not constants.DISABLE_WEB_DRIVER:
-    options = Options()
-    options.add_argument("--window-size=1920x1080")
-    options.add_argument("--verbose")
-    options.add_argument("--headless=new")  # Use new headless mode
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-gpu")
+# Browser sessions come from tools.browser_pool: Chrome starts on the first
+# crawl, not at import, and each agent run gets its own session.
+
+
+def _selenium():
+    """Selenium is imported on first browser use; HTTP-only crawls never load it."""
+    from selenium.common import exceptions
+    from selenium.webdriver.common.by import By
+
+    return exceptions, By
+
+
+# Pages read over plain HTTP, per agent run. The browser only loads one of
+# these if a later tool call has to interact with the page.
+_http_pages: "OrderedDict[Any, FetchResult]" = OrderedDict()
+_HTTP_PAGES_MAX = 256
+
+
+def _remember_http_page(key: Any, page: FetchResult) -> None:
+    _http_pages[key] = page
+    _http_pages.move_to_end(key)
+    while len(_http_pages) > _HTTP_PAGES_MAX:
+        _http_pages.popitem(last=False)
 
-    driver = selenium.webdriver.Chrome(options=options)
+
+@asynccontextmanager
+async def _browser(context: RunContext) -> AsyncIterator[BrowserSession]:
+    key = lease_key(context)
+    page = _http_pages.pop(key, None)
+    async with get_browser_pool().session(key, navigating=page is not None) as session:
+        if page is not None:
+            await asyncio.to_thread(session.driver.get, page.url)
+        yield session
 
 class GoToURLTool(Tool):
     name: ClassVar[str]= "go_to_url"
@@ -87,8 +111,20 @@ class GoToURLTool(Tool):
     async def _run(self, input: CrawlInput, options: ToolRunOptions | None, context: RunContext) -> StringToolOutput:
         """Navigates the browser to the given URL."""
         print(f"🌐 Navigating to URL: {input.url}")  # Added print statement
-        driver.get(input.url)
-        return f"Navigated to URL: {input.url}"
+        key = lease_key(context)
+        if constants.CRAWLER_MODE != "browser":
+            fetcher = get_http_fetcher()
+            if constants.CRAWLER_MODE == "http":
+                page = await fetcher.fetch(input.url)
+            else:
+                page = await fetcher.fetch_readable(input.url)
+            if page is not None:
+                _remember_http_page(key, page)
+                return StringToolOutput(f"Navigated to URL: {input.url}")
+        _http_pages.pop(key, None)
+        async with get_browser_pool().session(key, navigating=True) as session:
+            await asyncio.to_thread(session.driver.get, input.url)
+        return StringToolOutput(f"Navigated to URL: {input.url}")
  
     def _create_emitter(self) -> Emitter:
         return Emitter.root().child(
@@ -117,8 +153,12 @@ class ClickAtCoordinates(Tool):
 
     async def _run(self, input: CrawlInput, options: ToolRunOptions | None, context: RunContext) -> StringToolOutput:
         """Clicks at the specified coordinates on the screen."""
-        driver.execute_script(f"window.scrollTo({input.x}, {input.y});")
-        driver.find_element(By.TAG_NAME, "body").click()
+        _, By = _selenium()
+        async with _browser(context) as session:
+            driver = session.driver
+            await asyncio.to_thread(driver.execute_script, f"window.scrollTo({input.x}, {input.y});")
+            await asyncio.to_thread(lambda: driver.find_element(By.TAG_NAME, "body").click())
+        return StringToolOutput(f"Clicked at coordinates ({input.x}, {input.y})")
 
     def _create_emitter(self) -> Emitter:
         return Emitter.root().child(
@@ -158,17 +198,19 @@ class FindElementWithText(Tool[WebCrawlSchema]):
     async def _run(self, input: CrawlInput, options: ToolRunOptions | None, context: RunContext) -> StringToolOutput:
         """Finds an element on the page with the given text."""
         print(f"🔍 Finding element with text: '{input.text}'")  # Added print statement
-
-        try:
-            element = driver.find_element(By.XPATH, f"//*[text()='{input.text}']")
-            if element:
-                return "Element found."
-            else:
-                return "Element not found."
-        except selenium.common.exceptions.NoSuchElementException:
-            return "Element not found."
-        except selenium.common.exceptions.ElementNotInteractableException:
-            return "Element not interactable, cannot click."
+        errors, By = _selenium()
+
+        async with _browser(context) as session:
+            try:
+                element = await asyncio.to_thread(session.driver.find_element, By.XPATH, f"//*[text()='{input.text}']")
+                if element:
+                    return StringToolOutput("Element found.")
+                else:
+                    return StringToolOutput("Element not found.")
+            except errors.NoSuchElementException:
+                return StringToolOutput("Element not found.")
+            except errors.ElementNotInteractableException:
+                return StringToolOutput("Element not interactable, cannot click.")
 
     def _create_emitter(self) -> Emitter:
         return Emitter.root().child(
@@ -193,17 +235,19 @@ class ClickElementWithText(Tool[WebCrawlSchema]):
     async def _run(self, input: CrawlInput, options: ToolRunOptions | None, context: RunContext) -> StringToolOutput:
         """Clicks on an element on the page with the given text."""
         print(f"🖱️ Clicking element with text: '{input.text}'")  # Added print statement
-
-        try:
-            element = driver.find_element(By.XPATH, f"//*[text()='{input.text}']")
-            element.click()
-            return f"Clicked element with text: {input.text}"
-        except selenium.common.exceptions.NoSuchElementException:
-            return "Element not found, cannot click."
-        except selenium.common.exceptions.ElementNotInteractableException:
-            return "Element not interactable, cannot click."
-        except selenium.common.exceptions.ElementClickInterceptedException:
-            return "Element click intercepted, cannot click."
+        errors, By = _selenium()
+
+        async with _browser(context) as session:
+            try:
+                element = await asyncio.to_thread(session.driver.find_element, By.XPATH, f"//*[text()='{input.text}']")
+                await asyncio.to_thread(element.click)
+                return StringToolOutput(f"Clicked element with text: {input.text}")
+            except errors.NoSuchElementException:
+                return StringToolOutput("Element not found, cannot click.")
+            except errors.ElementNotInteractableException:
+                return StringToolOutput("Element not interactable, cannot click.")
+            except errors.ElementClickInterceptedException:
+                return StringToolOutput("Element click intercepted, cannot click.")
 
     def _create_emitter(self) -> Emitter:
         return Emitter.root().child(
@@ -230,17 +274,19 @@ class EnterTextIntoElement(Tool[WebCrawlSchema]):
         print(
             f"📝 Entering text '{input.text_to_enter}' into element with ID: {input.element_id}"
         )  # Added print statement
-
-        try:
-            input_element = driver.find_element(By.ID, input.element_id)
-            input_element.send_keys(input.text_to_enter)
-            return (
-                f"Entered text '{input.text_to_enter}' into element with ID: {input.element_id}"
-            )
-        except selenium.common.exceptions.NoSuchElementException:
-            return "Element with given ID not found."
-        except selenium.common.exceptions.ElementNotInteractableException:
-            return "Element not interactable, cannot click."
+        errors, By = _selenium()
+
+        async with _browser(context) as session:
+            try:
+                input_element = await asyncio.to_thread(session.driver.find_element, By.ID, input.element_id)
+                await asyncio.to_thread(input_element.send_keys, input.text_to_enter)
+                return StringToolOutput(
+                    f"Entered text '{input.text_to_enter}' into element with ID: {input.element_id}"
+                )
+            except errors.NoSuchElementException:
+                return StringToolOutput("Element with given ID not found.")
+            except errors.ElementNotInteractableException:
+                return StringToolOutput("Element not interactable, cannot click.")
     def _create_emitter(self) -> Emitter:
         return Emitter.root().child(
             namespace=["tool", "enter_text_into_element"],
@@ -265,8 +311,9 @@ class ScrollDownScreen(Tool):
     async def _run(self, input: CrawlInput, options: ToolRunOptions | None, context: RunContext) -> StringToolOutput:
         """Scrolls down the screen by a moderate amount."""
         print("⬇️ scroll the screen")  # Added print statement
-        driver.execute_script("window.scrollBy(0, 500)")
-        return "Scrolled down the screen."
+        async with _browser(context) as session:
+            await asyncio.to_thread(session.driver.execute_script, "window.scrollBy(0, 500)")
+        return StringToolOutput("Scrolled down the screen.")
 
     def _create_emitter(self) -> Emitter:
         return Emitter.root().child(
@@ -277,7 +324,7 @@ class ScrollDownScreen(Tool):
 class GetPageSource(Tool):
 
     name: ClassVar[str]= "get_page_source"
-    description : ClassVar[str]= "Returns the current page source." 
+    description : ClassVar[str]= "Returns the readable content and interactive elements (links, buttons, inputs with ids) of the current page." 
     input_schema = CrawlInput
 
     def __init__(self, *, extra_instructions: str = "") -> None:
@@ -290,10 +337,21 @@ class GetPageSource(Tool):
         return CrawlInput
 
     async def _run(self, input: CrawlInput, options: ToolRunOptions | None, context: RunContext) -> StringToolOutput:
-        LIMIT = 1000000
-        """Returns the current page source."""
+        """Returns the main content and interactive elements of the current page."""
         print("📄 Getting page source...")  # Added print statement
-        return driver.page_source[0:LIMIT]
+        page = _http_pages.get(lease_key(context))
+        if page is not None and page.text:
+            # Extracted when the page was cached.
+            return StringToolOutput(page.text)
+        if page is not None:
+            page_source = page.html
+        else:
+            async with get_browser_pool().session(lease_key(context)) as session:
+                page_source = await asyncio.to_thread(lambda: session.driver.page_source)
+        # Raw HTML is mostly markup and scripts; hand the LLM only what it can read or act on.
+        extract = await asyncio.to_thread(extract_page, page_source)
+        logger.info(f"Page reduced {extract.raw_chars} -> {extract.output_chars} chars ({extract.reduction_ratio:.1f}x)")
+        return StringToolOutput(extract.render())
 
     def _create_emitter(self) -> Emitter:
         return Emitter.root().child(
@@ -320,14 +378,17 @@ class AnalyzeWebpagAndDetermineAction(Tool):
         print(
             "🤔 Analyzing webpage and determining next action..."
         )  # Added print statement
+        page_source = input.page_source
+        if "<" in page_source:
+            page_source = (await asyncio.to_thread(extract_page, page_source)).render()
 
         analysis_prompt = f"""
         You are an expert web page analyzer.
         You have been tasked with controlling a web browser to achieve a user's goal.
         The user's task is: {input.user_task}
-        Here is the current HTML source code of the webpage:
-        ```html
-        {input.page_source}
+        Here is the main content of the current webpage, followed by its interactive elements:
+        ```
+        {page_source}
         ```
 
         Based on the webpage content and the user's task, determine the next best action to take.
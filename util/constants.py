@@ -9,4 +9,92 @@ DATASET_ID = os.getenv("DATASET_ID", "products_data_agent")
 TABLE_ID = os.getenv("TABLE_ID", "shoe_items")
 DISABLE_WEB_DRIVER = int(os.getenv("DISABLE_WEB_DRIVER", "0"))
 WHL_FILE_NAME = os.getenv("ADK_WHL_FILE", "")
-STAGING_BUCKET = os.getenv("STAGING_BUCKET", "")
\ No newline at end of file
+STAGING_BUCKET = os.getenv("STAGING_BUCKET", "")
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "BAAI/bge-base-en-v1.5")
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache.sqlite3")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "32"))
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", "./onnx_models")
+EMBEDDING_QUANTIZATION = os.getenv("EMBEDDING_QUANTIZATION", "avx2")
+
+CHROMA_PATH = os.getenv("CHROMA_PATH", "./chroma_store")
+CHROMA_COLLECTION = os.getenv("CHROMA_COLLECTION", "financial_docs")
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "8"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "32"))
+INGEST_CHUNK_TOKENS = int(os.getenv("INGEST_CHUNK_TOKENS", "256"))
+INGEST_CHUNK_OVERLAP = int(os.getenv("INGEST_CHUNK_OVERLAP", "32"))
+INGEST_CHECKPOINT_PATH = os.getenv("INGEST_CHECKPOINT_PATH", "./ingest_checkpoint.txt")
+RETRIEVER_CHUNK_CANDIDATES = int(os.getenv("RETRIEVER_CHUNK_CANDIDATES", "20"))
+RETRIEVER_CHAR_BUDGET = int(os.getenv("RETRIEVER_CHAR_BUDGET", "4000"))
+RETRIEVER_MAX_WAIT_MS = float(os.getenv("RETRIEVER_MAX_WAIT_MS", "5"))
+RAG_CACHE_THRESHOLD = float(os.getenv("RAG_CACHE_THRESHOLD", "0.95"))
+RAG_CACHE_TTL_S = float(os.getenv("RAG_CACHE_TTL_S", "900"))
+RAG_CACHE_MAX_ENTRIES = int(os.getenv("RAG_CACHE_MAX_ENTRIES", "1024"))
+RETRIEVER_HYBRID = int(os.getenv("RETRIEVER_HYBRID", "1"))
+RETRIEVER_RRF_K = int(os.getenv("RETRIEVER_RRF_K", "60"))
+BM25_INDEX_PATH = os.getenv("BM25_INDEX_PATH", "./bm25_index.sqlite3")
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "4"))
+BROWSER_MAX_NAVIGATIONS = int(os.getenv("BROWSER_MAX_NAVIGATIONS", "50"))
+BROWSER_IDLE_TIMEOUT_S = float(os.getenv("BROWSER_IDLE_TIMEOUT_S", "300"))
+CRAWLER_MODE = os.getenv("CRAWLER_MODE", "auto")  # auto | http | browser
+CRAWLER_HTTP_TIMEOUT_S = float(os.getenv("CRAWLER_HTTP_TIMEOUT_S", "10"))
+CRAWLER_MIN_TEXT_CHARS = int(os.getenv("CRAWLER_MIN_TEXT_CHARS", "500"))
+CRAWLER_JS_MARKERS = os.getenv(
+    "CRAWLER_JS_MARKERS",
+    "enable javascript,javascript is disabled,javascript is required,just a moment...,checking your browser",
+).split(",")
+CRAWLER_USER_AGENT_TOKEN = os.getenv("CRAWLER_USER_AGENT_TOKEN", "financial-adviser")
+CRAWLER_CONCURRENCY = int(os.getenv("CRAWLER_CONCURRENCY", "16"))
+CRAWLER_DOMAIN_CONCURRENCY = int(os.getenv("CRAWLER_DOMAIN_CONCURRENCY", "2"))
+CRAWLER_DOMAIN_INTERVAL_S = float(os.getenv("CRAWLER_DOMAIN_INTERVAL_S", "1.0"))
+CRAWLER_MAX_RETRIES = int(os.getenv("CRAWLER_MAX_RETRIES", "3"))
+CRAWLER_ROBOTS_TTL_S = float(os.getenv("CRAWLER_ROBOTS_TTL_S", "3600"))
+CRAWLER_ROBOTS_FAILURE_TTL_S = float(os.getenv("CRAWLER_ROBOTS_FAILURE_TTL_S", "60"))
+CRAWLER_PAGE_TOKEN_BUDGET = int(os.getenv("CRAWLER_PAGE_TOKEN_BUDGET", "3000"))
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", "./page_cache.sqlite3")  # empty disables the cache
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+PAGE_CACHE_TTL_S = float(os.getenv("PAGE_CACHE_TTL_S", "900"))
+# Per-domain overrides, "domain=seconds" pairs; a domain also covers its subdomains.
+PAGE_CACHE_DOMAIN_TTLS = {
+    domain.strip(): float(ttl)
+    for domain, ttl in (
+        pair.split("=", 1)
+        for pair in os.getenv("PAGE_CACHE_DOMAIN_TTLS", "finance.yahoo.com=120,sec.gov=86400,wikipedia.org=86400").split(",")
+        if "=" in pair
+    )
+}
+WARMUP_MODE = os.getenv("WARMUP_MODE", "background")  # background | eager | off
+A2A_MAX_CONCURRENCY = int(os.getenv("A2A_MAX_CONCURRENCY", "8"))
+A2A_MAX_QUEUE = int(os.getenv("A2A_MAX_QUEUE", "32"))
+A2A_QUEUE_TIMEOUT_S = float(os.getenv("A2A_QUEUE_TIMEOUT_S", "30"))
+A2A_MAX_SESSIONS = int(os.getenv("A2A_MAX_SESSIONS", "100"))
+MEMORY_MAX_TOKENS = int(os.getenv("MEMORY_MAX_TOKENS", "6000"))
+MEMORY_SUMMARY_TOKENS = int(os.getenv("MEMORY_SUMMARY_TOKENS", "400"))
+MEMORY_TOOL_OUTPUT_CHARS = int(os.getenv("MEMORY_TOOL_OUTPUT_CHARS", "1500"))
+TOOL_CACHE_PATH = os.getenv("TOOL_CACHE_PATH", "./tool_cache.sqlite3")  # empty keeps results in memory only
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "2048"))
+TOOL_CACHE_DEFAULT_TTL_S = float(os.getenv("TOOL_CACHE_DEFAULT_TTL_S", "0"))
+# Per-tool TTLs, "tool_name=seconds" pairs; 0 disables caching for that tool.
+TOOL_CACHE_TTLS = {
+    name.strip(): float(ttl)
+    for name, ttl in (
+        pair.split("=", 1)
+        for pair in os.getenv("TOOL_CACHE_TTLS", "DuckDuckGo=600,retrieve_from_chromadb=3600,batch_crawl=300").split(",")
+        if "=" in pair
+    )
+}
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "off")  # off | record | replay
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./llm_cache.sqlite3")
+# How long record mode answers repeats from the file; replay ignores it.
+LLM_CACHE_TTL_S = float(os.getenv("LLM_CACHE_TTL_S", "600"))
+SCREENER_SNAPSHOT_PATH = os.getenv("SCREENER_SNAPSHOT_PATH", "./export.csv")
+SCREENER_MAX_ROWS = int(os.getenv("SCREENER_MAX_ROWS", "25"))
+SCREENER_HISTORY_PATH = os.getenv("SCREENER_HISTORY_PATH", "./screener_history")
+WHATSAPP_CURSOR_PATH = os.getenv("WHATSAPP_CURSOR_PATH", "./whatsapp_cursor.json")
+WHATSAPP_DATE_ORDER = os.getenv("WHATSAPP_DATE_ORDER", "auto")  # auto | dmy | mdy | ymd
+WHATSAPP_MIN_CHARS = int(os.getenv("WHATSAPP_MIN_CHARS", "20"))
+WHATSAPP_DEDUPE_WINDOW = int(os.getenv("WHATSAPP_DEDUPE_WINDOW", "100000"))